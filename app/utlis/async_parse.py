@@ -0,0 +1,347 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import AsyncIterator, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.utlis.extract_resume_part import (MODEL, PROMPT_MODES, ResumeTemplate, build_system_prompt,
+                                           response_usage)
+from app.utlis.metrics import track_call
+
+# Rough budget of output tokens per parse, counted against the TPM limit
+# together with the estimated input tokens.
+OUTPUT_TOKEN_ESTIMATE = 1500
+
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Estimates the number of tokens of some texts (about 4 characters each).
+    """
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens per minute, up to
+    `capacity` tokens (one minute worth by default).
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """
+        Waits until `amount` tokens are available and takes them. Requests
+        larger than the capacity wait for a full bucket.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits of an API key.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    async def acquire(self, tokens: int) -> None:
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(tokens)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit adapted with AIMD: every success raises the limit by
+    1/limit (about +1 per round of requests), every 429 halves it.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, throttled: bool = False) -> None:
+        async with self._changed:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._changed.notify_all()
+
+
+class ParseResult(NamedTuple):
+    """Outcome of one resume parse."""
+    key: str
+    resume: Optional[ResumeTemplate]
+    error: Optional[str]
+    attempts: int
+    seconds: float
+    usage: Optional[dict] = None
+
+
+def _retry_after(error) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AsyncResumeParser:
+    """
+    Parses many resumes concurrently over one shared AsyncOpenAI client.
+
+    Calls go through an RPM/TPM rate limiter and an adaptive concurrency
+    limit that halves on 429 responses, so a batch runs as close to the API
+    quota as possible without tripping it for long. While the shared circuit
+    breaker is open, the calls wait for it to let calls through again and
+    the concurrency limit is halved as on a 429.
+    """
+
+    def __init__(self, client=None, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 concurrency: int = 8, max_concurrency: int = 64, max_retries: int = 5,
+                 cache=None, prompt_mode: str = "full", metrics=None):
+        """
+        Args:
+            client (AsyncOpenAI, optional): Client to share, created from
+                OPENAI_API_KEY when omitted.
+            rpm (float, optional): Requests per minute allowed.
+            tpm (float, optional): Tokens per minute allowed.
+            concurrency (int): Initial number of requests in flight.
+            max_concurrency (int): Upper bound for the adaptive limit.
+            max_retries (int): Retries of a resume after 429s, server errors
+                or an open circuit breaker.
+            cache (ParseCache, optional): Cache of previous parses.
+            prompt_mode (str): Schema embedded in the prompt, one of
+                PROMPT_MODES.
+            metrics (MetricsRecorder, optional): Recorder of the API call
+                metrics, keyed by resume.
+        """
+        self.client = client
+        self.limiter = RateLimiter(rpm, tpm)
+        self.concurrency = AdaptiveConcurrency(concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.cache = cache
+        self.metrics = metrics
+        self.system_prompt = build_system_prompt(prompt_mode)
+
+    def _client(self):
+        if self.client is None:
+            from app.utlis.extract_resume_part import get_async_openai_client
+
+            # Rate limits are handled here, with the adaptive concurrency.
+            self.client = get_async_openai_client(retries=False)
+        return self.client
+
+    async def parse(self, key: str, raw_resume: str) -> ParseResult:
+        """
+        Parses one resume, retrying rate-limited and failed calls with
+        exponential backoff. Never raises: errors end up in the result.
+        """
+        start = time.perf_counter()
+        if self.cache is not None:
+            cache_key = self.cache.key(MODEL, self.system_prompt, raw_resume)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return ParseResult(key, ResumeTemplate.model_validate_json(cached), None, 0,
+                                   time.perf_counter() - start)
+
+        with track_call(self.metrics, MODEL, key) as call:
+            result = await self._parse_api(key, raw_resume,
+                                           cache_key if self.cache is not None else None, start, call)
+            call.error = result.error
+        return result
+
+    async def _parse_api(self, key: str, raw_resume: str, cache_key: Optional[str], start: float,
+                         call) -> ParseResult:
+        import openai
+
+        from app.utlis.client_pool import CircuitOpenError
+
+        tokens = estimate_tokens(self.system_prompt, raw_resume) + OUTPUT_TOKEN_ESTIMATE
+        error = None
+        for attempt in range(1, self.max_retries + 2):
+            await self.limiter.acquire(tokens)
+            await self.concurrency.acquire()
+            call.start()
+            call.attempts = attempt
+            throttled = False
+            try:
+                call_start = time.perf_counter()
+                response = await self._client().responses.parse(
+                    model=MODEL,
+                    input=[
+                        {"role": "system", "content": self.system_prompt},
+                        {"role": "user", "content": raw_resume},
+                    ],
+                    temperature=0.0,
+                    text_format=ResumeTemplate,
+                )
+                usage = response_usage(response, time.perf_counter() - call_start)
+                call.set_usage(usage)
+                parsed = response.output_parsed
+                if not isinstance(parsed, ResumeTemplate):
+                    call.validation_failed = True
+                    raise ValueError("La réponse n'est pas conforme au modèle ResumeTemplate")
+                if cache_key is not None:
+                    self.cache.put(cache_key, parsed.model_dump_json())
+                return ParseResult(key, parsed, None, attempt, time.perf_counter() - start, usage)
+            except (openai.RateLimitError, openai.InternalServerError,
+                    openai.APIConnectionError) as e:
+                throttled = isinstance(e, openai.RateLimitError)
+                error = e
+                delay = _retry_after(e) or min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+            except CircuitOpenError as e:
+                # Wait for the half-open trial, jittered so that the waiting
+                # calls do not all hit it at once.
+                throttled = True
+                error = e
+                delay = e.retry_after + min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+            except Exception as e:
+                call.validation_failed = call.validation_failed or isinstance(e, ValidationError)
+                return ParseResult(key, None, f"{type(e).__name__}: {e}", attempt,
+                                   time.perf_counter() - start)
+            finally:
+                await self.concurrency.release(throttled)
+            await asyncio.sleep(delay)
+        return ParseResult(key, None, f"{type(error).__name__}: {error}", self.max_retries + 1,
+                           time.perf_counter() - start)
+
+    async def parse_many(self, items: Iterable[Tuple[str, str]]) -> AsyncIterator[ParseResult]:
+        """
+        Parses (key, raw resume) pairs concurrently and yields the results in
+        completion order.
+
+        Tasks are only created when the concurrency limit has room for them,
+        so `items` can be a lazy iterator over a very large batch.
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        pending = 0
+
+        async def run(key, text):
+            await results.put(await self.parse(key, text))
+
+        tasks = set()
+        try:
+            for key, text in items:
+                # Do not queue far more work than can be in flight.
+                while pending >= max(2 * int(self.concurrency.limit), 1):
+                    yield await results.get()
+                    pending -= 1
+                task = asyncio.ensure_future(run(key, text))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                pending += 1
+            while pending:
+                yield await results.get()
+                pending -= 1
+        finally:
+            # The consumer stopped early: do not leave calls running.
+            for task in tasks:
+                task.cancel()
+
+
+def iter_inputs(source: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (key, raw resume) pairs from a directory of .txt files or from a
+    JSONL file written by batch_extract (records with an error are skipped).
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".txt"):
+                with open(os.path.join(source, name), "r", encoding="utf-8") as f:
+                    yield os.path.splitext(name)[0], f.read()
+        return
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("error") is None and record.get("text"):
+                yield record.get("sha256") or record["path"], record["text"]
+
+
+async def _run(args) -> None:
+    from app.utlis.extract_resume_part import open_parse_cache
+    from app.utlis.metrics import MetricsRecorder
+
+    cache = open_parse_cache(args.cache) if args.cache else None
+    metrics = MetricsRecorder(args.metrics_jsonl)
+    engine = AsyncResumeParser(rpm=args.rpm, tpm=args.tpm, concurrency=args.concurrency,
+                               max_concurrency=args.max_concurrency, cache=cache,
+                               prompt_mode=args.prompt_mode, metrics=metrics)
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    done = failed = 0
+    async for result in engine.parse_many(iter_inputs(args.input)):
+        done += 1
+        if result.error is None:
+            with open(os.path.join(args.output_dir, f"{result.key}.json"), "w", encoding="utf-8") as f:
+                f.write(result.resume.model_dump_json(indent=2))
+        else:
+            failed += 1
+            print(f"{result.key}: {result.error}", file=sys.stderr)
+        print(f"\r{done} parsed, {failed} failed, {done / (time.perf_counter() - start):.2f}/s, "
+              f"concurrency {int(engine.concurrency.limit)}", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    summary = metrics.summary()
+    print(f"Input tokens: {summary['input_tokens_total']} ({summary['cached_tokens_total']} cached), "
+          f"output tokens: {summary['output_tokens_total']}, cost: ${summary['cost_usd']:.4f}, "
+          f"retries: {summary['retries_total']}, latency p50/p95: "
+          f"{summary['latency_seconds_p50'] or 0:.2f}s/{summary['latency_seconds_p95'] or 0:.2f}s",
+          file=sys.stderr)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+    metrics.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse many resumes concurrently with the OpenAI API.")
+    parser.add_argument("input", help="Directory of .txt resumes or batch_extract JSONL file.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the parsed JSON.")
+    parser.add_argument("--rpm", type=float, default=500, help="Requests per minute allowed.")
+    parser.add_argument("--tpm", type=float, default=200_000, help="Tokens per minute allowed.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Initial requests in flight.")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Maximum requests in flight.")
+    parser.add_argument("--cache", help="SQLite cache of previous parses.")
+    parser.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                        help="Schema embedded in the prompt: pretty-printed, minified or none.")
+    parser.add_argument("--metrics-jsonl", help="Append the metrics of every API call to this file.")
+    parser.add_argument("--prometheus", help="Write the metrics in Prometheus text format here.")
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import Pool
+from typing import Iterable, Iterator, Optional
+
+from app.utlis.extract_raw_data import (DOCX_BACKENDS, ExtractionLimitError, detect_format,
+                                       iter_text_from_file)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def iter_input_files(inputs: Iterable[str]) -> Iterator[str]:
+    """
+    Lazily expands directories and glob patterns into supported files.
+
+    Args:
+        inputs (Iterable[str]): Directories (walked recursively), glob
+            patterns (``**`` is supported) or plain file paths.
+
+    Yields:
+        str: Path of the next .pdf, .docx or .txt file.
+    """
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            for path in glob.iglob(item, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield path
+
+
+@contextmanager
+def _hard_timeout(timeout: Optional[float]):
+    """
+    Interrupts the enclosed block with ExtractionLimitError after `timeout`
+    seconds, even in the middle of a page.
+
+    Relies on SIGALRM, so it only arms on Unix and in the main thread, which
+    is where pool workers run their tasks.
+    """
+    if (timeout is None or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise ExtractionLimitError("Document extraction exceeded its time limit.")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    # A zero delay would disarm the timer instead of firing it at once.
+    signal.setitimer(signal.ITIMER_REAL, max(timeout, 1e-6))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_record(path: str, max_bytes: Optional[int] = None, max_pages: Optional[int] = None,
+                   timeout: Optional[float] = None, docx_backend: str = "python-docx") -> dict:
+    """
+    Extracts one file into a JSONL-ready record.
+
+    Never raises: failures, including documents over a limit, are reported in
+    the ``error`` field so that one bad file cannot stop a batch.
+
+    Args:
+        path (str): Path to the file to process.
+        max_bytes (int, optional): Skip larger files.
+        max_pages (int, optional): Skip PDFs with more pages.
+        timeout (float, optional): Seconds allowed per file, hashing and
+            format detection included.
+        docx_backend (str): One of `extract_raw_data.DOCX_BACKENDS`.
+
+    Returns:
+        dict: Record with path, sha256, text, pages, seconds and error.
+    """
+    start = time.perf_counter()
+    record = {"path": path, "sha256": None, "text": None, "pages": None,
+              "seconds": None, "error": None}
+    try:
+        # Checked before reading anything, so oversized files cost one stat.
+        size = os.path.getsize(path)
+        if max_bytes is not None and size > max_bytes:
+            raise ExtractionLimitError(f"Document is {size} bytes, over the {max_bytes} bytes limit.")
+        with _hard_timeout(timeout):
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            record["sha256"] = digest.hexdigest()
+            file_format = detect_format(path)
+            chunks = list(iter_text_from_file(path, file_format, max_bytes=max_bytes,
+                                              max_pages=max_pages, timeout=timeout,
+                                              docx_backend=docx_backend))
+        record["text"] = "\n".join(chunks)
+        if file_format == "pdf":
+            record["pages"] = len(chunks)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_batch(inputs: Iterable[str], output, workers: Optional[int] = None,
+              chunksize: int = 4, progress=sys.stderr, max_bytes: Optional[int] = None,
+              max_pages: Optional[int] = None, timeout: Optional[float] = None,
+              docx_backend: str = "python-docx") -> dict:
+    """
+    Extracts every input file across a process pool and writes one JSON line
+    per file to `output`, in completion order.
+
+    Records are written as soon as they come back from the workers, so the
+    memory held at any time is bounded by the files in flight, not by the
+    size of the corpus.
+
+    Args:
+        inputs (Iterable[str]): Directories, glob patterns or file paths.
+        output: Text stream receiving the JSONL records.
+        workers (int, optional): Worker processes (default: one per CPU).
+        chunksize (int): Files handed to a worker at a time.
+        progress: Stream for the progress line, or None to disable it.
+        max_bytes (int, optional): Skip larger files.
+        max_pages (int, optional): Skip PDFs with more pages.
+        timeout (float, optional): Seconds allowed per file.
+        docx_backend (str): One of `extract_raw_data.DOCX_BACKENDS`.
+
+    Returns:
+        dict: Totals for the run (files, errors, seconds).
+    """
+    start = time.perf_counter()
+    done = errors = 0
+    extract = partial(extract_record, max_bytes=max_bytes, max_pages=max_pages, timeout=timeout,
+                      docx_backend=docx_backend)
+    with Pool(processes=workers) as pool:
+        for record in pool.imap_unordered(extract, iter_input_files(inputs), chunksize):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            done += 1
+            errors += record["error"] is not None
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                progress.write(f"\r{done} files, {errors} errors, {done / elapsed:.1f} files/s")
+                progress.flush()
+    if progress is not None and done:
+        progress.write("\n")
+    return {"files": done, "errors": errors, "seconds": time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract text from a directory or glob of CVs into a JSONL file.")
+    parser.add_argument("inputs", nargs="+", help="Directories, glob patterns or files.")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write.")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU).")
+    parser.add_argument("--chunksize", type=int, default=4,
+                        help="Files handed to a worker at a time.")
+    parser.add_argument("--max-bytes", type=int, default=None, help="Skip larger files.")
+    parser.add_argument("--max-pages", type=int, default=None, help="Skip PDFs with more pages.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per file.")
+    parser.add_argument("--docx-backend", choices=DOCX_BACKENDS, default="python-docx",
+                        help="DOCX extraction backend.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Hide the progress line.")
+    args = parser.parse_args(argv)
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        totals = run_batch(args.inputs, output, workers=args.workers, chunksize=args.chunksize,
+                           progress=None if args.quiet else sys.stderr, max_bytes=args.max_bytes,
+                           max_pages=args.max_pages, timeout=args.timeout,
+                           docx_backend=args.docx_backend)
+    print(f"Extracted {totals['files']} files ({totals['errors']} errors) "
+          f"in {totals['seconds']:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.utlis.extract_resume_part import (MODEL, PROMPT_MODES, ContactInfo, ResumeTemplate,
+                                           SkillSection, build_system_prompt)
+
+BATCH_ENDPOINT = "/v1/responses"
+
+# Limits of one batch input file.
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+def manifest_path_for(requests_path: str) -> str:
+    """
+    Returns the manifest file kept next to a requests file, which maps each
+    custom_id back to the source files of its resume text.
+    """
+    return os.path.splitext(requests_path)[0] + ".manifest.json"
+
+
+def iter_sources(source: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (source path, raw resume) pairs from a directory of .txt files or
+    from a JSONL file written by batch_extract (records with an error are
+    skipped).
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".txt"):
+                path = os.path.join(source, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    yield path, f.read()
+        return
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("error") is None and record.get("text"):
+                yield record["path"], record["text"]
+
+
+def strict_json_schema(schema, root: Optional[dict] = None):
+    """
+    Converts a pydantic JSON schema to the strict mode of structured outputs:
+    every object forbids additional properties and requires all of its
+    properties (optional ones stay nullable), defaults are dropped, and a
+    $ref with sibling keywords (a described sub-model) is inlined, since
+    strict mode does not allow them next to a $ref.
+
+    Returns:
+        A converted copy of `schema`.
+    """
+    root = schema if root is None else root
+    if isinstance(schema, list):
+        return [strict_json_schema(item, root) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    if "$ref" in schema and len(schema) > 1:
+        definition = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            definition = definition[part]
+        schema = {**definition, **{key: value for key, value in schema.items() if key != "$ref"}}
+    strict = {key: strict_json_schema(value, root) for key, value in schema.items()
+              if key != "default"}
+    if strict.get("type") == "object" and "properties" in strict:
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+def response_format() -> dict:
+    """
+    Returns the strict JSON schema output format of ResumeTemplate, as sent by
+    `client.responses.parse(text_format=ResumeTemplate)`.
+    """
+    return {"format": {"type": "json_schema", "name": "ResumeTemplate",
+                       "schema": strict_json_schema(ResumeTemplate.model_json_schema()),
+                       "strict": True}}
+
+
+def build_request(custom_id: str, raw_resume: str, system_prompt: str, text_format: dict) -> dict:
+    """
+    Builds one line of a batch input file, the same call as `parse_resume`.
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": MODEL,
+            "input": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": raw_resume},
+            ],
+            "temperature": 0.0,
+            "text": text_format,
+        },
+    }
+
+
+def part_path(requests_path: str, part: int) -> str:
+    """
+    Returns the path of a part of a requests file: the file itself for the
+    first part, then "requests.2.jsonl", "requests.3.jsonl"...
+    """
+    if part == 0:
+        return requests_path
+    stem, extension = os.path.splitext(requests_path)
+    return f"{stem}.{part + 1}{extension}"
+
+
+def write_requests(source: str, requests_path: str, prompt_mode: str = "full",
+                   max_requests: int = MAX_BATCH_REQUESTS,
+                   max_bytes: int = MAX_BATCH_BYTES) -> List[str]:
+    """
+    Writes the batch input files for the resumes of `source`, each with its
+    manifest.
+
+    The custom_id of a request is the SHA-256 of the resume text, so
+    identical resumes are only sent once and all their source files get the
+    result. A new file (see `part_path`) is started whenever the current one
+    would exceed `max_requests` requests or `max_bytes` bytes, the limits of
+    one batch; each file is submitted as its own batch.
+
+    Args:
+        source (str): Directory of .txt resumes or batch_extract JSONL file.
+        requests_path (str): Batch input JSONL file to write (first part).
+        prompt_mode (str): Schema embedded in the prompt, one of PROMPT_MODES.
+        max_requests (int): Maximum requests per file.
+        max_bytes (int): Maximum size of a file.
+
+    Returns:
+        List[str]: Paths of the requests files written.
+
+    Raises:
+        ValueError: If a single request is larger than `max_bytes`.
+    """
+    system_prompt = build_system_prompt(prompt_mode)
+    text_format = response_format()
+    paths: List[str] = []
+    manifests: List[Dict[str, List[str]]] = []
+    # custom_id -> source files, the list held by the manifest of its part
+    sources: Dict[str, List[str]] = {}
+    f = None
+    size = 0
+    try:
+        for path, text in iter_sources(source):
+            custom_id = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if custom_id not in sources:
+                line = (json.dumps(build_request(custom_id, text, system_prompt, text_format))
+                        + "\n").encode("utf-8")
+                if len(line) > max_bytes:
+                    raise ValueError(f"Request of {path} is {len(line)} bytes, over the "
+                                     f"{max_bytes} bytes limit of a batch file.")
+                if f is None or len(manifests[-1]) >= max_requests or size + len(line) > max_bytes:
+                    if f is not None:
+                        f.close()
+                    paths.append(part_path(requests_path, len(paths)))
+                    manifests.append({})
+                    f = open(paths[-1], "wb")
+                    size = 0
+                f.write(line)
+                size += len(line)
+                sources[custom_id] = manifests[-1][custom_id] = []
+            sources[custom_id].append(path)
+    finally:
+        if f is not None:
+            f.close()
+    for path, manifest in zip(paths, manifests):
+        with open(manifest_path_for(path), "w", encoding="utf-8") as out:
+            json.dump(manifest, out, indent=2)
+    return paths
+
+
+def submit(requests_path: str, client=None, completion_window: str = "24h"):
+    """
+    Uploads a requests file and creates a batch on it.
+
+    Returns:
+        Batch: The created batch; keep its id to fetch the results.
+    """
+    from app.utlis.extract_resume_part import get_openai_client
+
+    client = client or get_openai_client()
+    with open(requests_path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    return client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT,
+                                 completion_window=completion_window)
+
+
+def fetch(batch_id: str, results_path: str, client=None) -> str:
+    """
+    Downloads the results of a finished batch.
+
+    Results and per-request errors are written together to `results_path`,
+    one JSON line each; nothing is written while the batch is still running.
+
+    Returns:
+        str: Status of the batch ("completed", "in_progress", "expired"...).
+    """
+    from app.utlis.extract_resume_part import get_openai_client
+
+    client = client or get_openai_client()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status not in ("completed", "expired", "cancelled"):
+        return batch.status
+    with open(results_path, "w", encoding="utf-8") as f:
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                # Line by line: a file may not end with a newline.
+                for line in client.files.content(file_id).text.splitlines():
+                    if line.strip():
+                        f.write(line + "\n")
+    return batch.status
+
+
+def output_text(body: dict) -> str:
+    """
+    Returns the text output of a Responses API response body.
+
+    Raises:
+        ValueError: If the model refused or returned no text.
+    """
+    for item in body.get("output") or ():
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content") or ():
+            if content.get("type") == "output_text":
+                return content["text"]
+            if content.get("type") == "refusal":
+                raise ValueError(f"Refusal: {content.get('refusal')}")
+    raise ValueError(f"No text output (status {body.get('status')})")
+
+
+def ingest(results_path: str, requests_path: str, output_dir: str,
+           retry_path: Optional[str] = None) -> dict:
+    """
+    Validates batch results into ResumeTemplate and writes them per source.
+
+    Each parsed resume is written to `output_dir` as <custom_id>.json and
+    `output_dir`/index.json maps every source file to its parsed JSON.
+    Requests that failed, did not validate or have no result (expired batch)
+    are written to `retry_path` with their manifest, ready to be submitted
+    again.
+
+    Args:
+        results_path (str): Results fetched with `fetch`.
+        requests_path (str): Requests file the batch was created from.
+        output_dir (str): Directory for the parsed resumes.
+        retry_path (str, optional): Requests file for the failed requests.
+
+    Returns:
+        dict: Counts of parsed and failed requests, and the errors by custom_id.
+    """
+    with open(manifest_path_for(requests_path), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    os.makedirs(output_dir, exist_ok=True)
+    index_path = os.path.join(output_dir, "index.json")
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+    errors = {}
+    parsed = set()
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            result = json.loads(line)
+            custom_id = result["custom_id"]
+            if custom_id not in manifest:
+                continue
+            response = result.get("response") or {}
+            try:
+                if result.get("error"):
+                    raise ValueError(result["error"].get("message", result["error"]))
+                if response.get("status_code") != 200:
+                    raise ValueError(f"HTTP {response.get('status_code')}")
+                resume = ResumeTemplate.model_validate_json(output_text(response["body"]))
+            except (ValueError, ValidationError) as e:
+                errors[custom_id] = f"{type(e).__name__}: {e}"
+                continue
+            output_path = os.path.join(output_dir, f"{custom_id}.json")
+            with open(output_path, "w", encoding="utf-8") as out:
+                out.write(resume.model_dump_json(indent=2))
+            for source in manifest[custom_id]:
+                index[source] = output_path
+            parsed.add(custom_id)
+            errors.pop(custom_id, None)
+
+    for custom_id in manifest:
+        if custom_id not in parsed and custom_id not in errors:
+            errors[custom_id] = "No result"
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+    if retry_path and errors:
+        with open(requests_path, "r", encoding="utf-8") as f, \
+                open(retry_path, "w", encoding="utf-8") as retry:
+            for line in f:
+                if json.loads(line)["custom_id"] in errors:
+                    retry.write(line)
+        with open(manifest_path_for(retry_path), "w", encoding="utf-8") as f:
+            json.dump({custom_id: manifest[custom_id] for custom_id in errors}, f, indent=2)
+    return {"parsed": len(parsed), "failed": len(errors), "errors": errors}
+
+
+def placeholder_resume(body: dict) -> str:
+    """
+    Default answer of the fake batch endpoint: a minimal valid ResumeTemplate
+    named after the first line of the resume text.
+    """
+    text = body["input"][-1]["content"].strip()
+    name = text.splitlines()[0].strip() if text else ""
+    return ResumeTemplate(
+        contact_info=ContactInfo(name=name),
+        professional_summary="",
+        skills_section=SkillSection(core_skills=[]),
+        work_experience=[],
+    ).model_dump_json()
+
+
+class FakeBatchClient:
+    """
+    In-memory stand-in for the files and batches endpoints of the OpenAI
+    client, for running the batch mode end to end without the API.
+
+    Batches complete as soon as they are created. Each request is answered
+    with `respond(body)`, and a request fails with a 500 error when
+    `fail(custom_id)` is true.
+    """
+
+    def __init__(self, respond: Callable[[dict], str] = placeholder_resume,
+                 fail: Callable[[str], bool] = lambda custom_id: False):
+        self.respond = respond
+        self.fail = fail
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._batches.__getitem__)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self._files)}"
+        self._files[file_id] = file.read() if hasattr(file, "read") else bytes(file)
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id].decode("utf-8"))
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        output = io.StringIO()
+        for line in self._files[input_file_id].decode("utf-8").splitlines():
+            request = json.loads(line)
+            custom_id = request["custom_id"]
+            if self.fail(custom_id):
+                response = {"status_code": 500, "body": {"error": {"message": "Injected failure"}}}
+            else:
+                response = {"status_code": 200, "body": {
+                    "status": "completed",
+                    "output": [{"type": "message", "role": "assistant", "content": [
+                        {"type": "output_text", "text": self.respond(request["body"])}]}],
+                }}
+            output.write(json.dumps({"id": f"batch_req_{custom_id[:8]}", "custom_id": custom_id,
+                                     "response": response, "error": None}) + "\n")
+        output_file = self._create_file(output.getvalue().encode("utf-8"), "batch_output")
+        batch_id = f"batch-{len(self._batches)}"
+        self._batches[batch_id] = SimpleNamespace(
+            id=batch_id, endpoint=endpoint, status="completed", input_file_id=input_file_id,
+            output_file_id=output_file.id, error_file_id=None)
+        return self._batches[batch_id]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse resumes through the OpenAI batch API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prepare = commands.add_parser("prepare", help="Write the batch requests file.")
+    prepare.add_argument("input", help="Directory of .txt resumes or batch_extract JSONL file.")
+    prepare.add_argument("-o", "--output", required=True, help="Batch requests JSONL file.")
+    prepare.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                         help="Schema embedded in the prompt: pretty-printed, minified or none.")
+
+    submit_cmd = commands.add_parser("submit", help="Upload a requests file and start a batch.")
+    submit_cmd.add_argument("requests", help="Batch requests JSONL file.")
+
+    fetch_cmd = commands.add_parser("fetch", help="Download the results of a finished batch.")
+    fetch_cmd.add_argument("batch_id", help="Batch id printed by submit.")
+    fetch_cmd.add_argument("-o", "--output", required=True, help="Results JSONL file.")
+
+    ingest_cmd = commands.add_parser("ingest", help="Validate results and write the parsed resumes.")
+    ingest_cmd.add_argument("results", help="Results JSONL file.")
+    ingest_cmd.add_argument("--requests", required=True, help="Requests file of the batch.")
+    ingest_cmd.add_argument("-o", "--output-dir", required=True, help="Directory for the parsed JSON.")
+    ingest_cmd.add_argument("--retry", help="Requests file for the failed requests.")
+
+    fake = commands.add_parser("fake", help="Run a requests file through the local fake endpoint.")
+    fake.add_argument("requests", help="Batch requests JSONL file.")
+    fake.add_argument("-o", "--output", required=True, help="Results JSONL file.")
+    args = parser.parse_args(argv)
+
+    if args.command == "prepare":
+        for path in write_requests(args.input, args.output, args.prompt_mode):
+            with open(manifest_path_for(path), "r", encoding="utf-8") as f:
+                count = len(json.load(f))
+            print(f"{count} requests written to {path}", file=sys.stderr)
+    elif args.command == "submit":
+        print(submit(args.requests).id)
+    elif args.command == "fetch":
+        status = fetch(args.batch_id, args.output)
+        print(f"Batch {args.batch_id}: {status}", file=sys.stderr)
+    elif args.command == "ingest":
+        stats = ingest(args.results, args.requests, args.output_dir, args.retry)
+        for custom_id, error in stats["errors"].items():
+            print(f"{custom_id}: {error}", file=sys.stderr)
+        print(f"{stats['parsed']} parsed, {stats['failed']} failed", file=sys.stderr)
+    else:
+        client = FakeBatchClient()
+        batch = submit(args.requests, client)
+        fetch(batch.id, args.output, client)
+
+
+if __name__ == "__main__":
+    main()
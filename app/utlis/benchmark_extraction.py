@@ -0,0 +1,274 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import time
+from typing import Dict, List
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_RESUME = os.path.join(SCRIPT_DIR, 'resume_ats_optimized.json')
+
+# Number of work experiences per size class. With the compact PDF renderer
+# this gives 1, 4 and 12 pages: large PDFs exceed PARALLEL_PAGE_THRESHOLD of
+# extract_raw_data, so pdf_to_txt[workers=4] runs its process pool on them.
+SIZES = {"small": 2, "medium": 40, "large": 150}
+
+FIRST_NAMES = ["Amina", "Lucas", "Chloé", "Kofi", "Yuki", "Mateo", "Sara", "Ivan", "Noor", "Liam"]
+LAST_NAMES = ["Martin", "Diallo", "Nguyen", "Rossi", "Kowalski", "Haddad", "Silva", "Dubois"]
+COMPANIES = ["Acme Analytics", "Orange", "Thales", "CNRS", "Capgemini", "Airbus", "Criteo", "OVHcloud"]
+VERBS = ["Designed", "Built", "Led", "Optimized", "Deployed", "Automated", "Maintained", "Migrated"]
+OBJECTS = ["a data pipeline", "an ML model", "a REST API", "the CI/CD workflow", "a dashboard",
+           "the ETL jobs", "a recommendation engine", "the monitoring stack"]
+RESULTS = ["cutting latency by {n}%", "serving {n}k daily users", "saving {n} hours per week",
+           "improving accuracy by {n} points", "reducing costs by {n}%"]
+
+
+def synthetic_resume(rng: random.Random, base: dict, n_experiences: int) -> dict:
+    """
+    Builds a resume in the format of resume_ats_optimized.json, expanded to
+    `n_experiences` work experiences with randomized content.
+    """
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    contact = dict(base['contact_info'], name=name,
+                   email=name.lower().replace(" ", ".") + "@example.com",
+                   phone=f"+33 6 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}")
+    experience = []
+    year = 2024
+    for _ in range(n_experiences):
+        template = rng.choice(base['experience'])
+        start = year - rng.randint(1, 3)
+        achievements = [
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}, {rng.choice(RESULTS).format(n=rng.randint(5, 60))}"
+            for _ in range(rng.randint(2, 5))
+        ] + rng.sample(template['achievements'], k=min(2, len(template['achievements'])))
+        experience.append(dict(template, company=rng.choice(COMPANIES),
+                               dates=f"{start} - {year}", achievements=achievements))
+        year = start
+    return dict(base, contact_info=contact, experience=experience,
+                skills=rng.sample(base['skills'], k=rng.randint(6, len(base['skills']))))
+
+
+def render_text(resume: dict) -> str:
+    """
+    Renders a resume as plain text, section by section.
+    """
+    contact = resume['contact_info']
+    lines = [contact['name'], f"{contact['email']} | {contact['phone']} | {contact['linkedin']}", "",
+             "PROFESSIONAL SUMMARY", resume['summary'], "", "SKILLS", ", ".join(resume['skills']), "",
+             "PROFESSIONAL EXPERIENCE"]
+    for exp in resume['experience']:
+        lines += [f"{exp['title']}, {exp['company']} | {exp['location']}", exp['dates']]
+        lines += [f"• {achievement}" for achievement in exp['achievements']]
+        lines.append("")
+    lines.append("EDUCATION")
+    for edu in resume['education']:
+        lines += [f"{edu['degree']}, {edu['institution']}", str(edu['year'])]
+    lines += ["", "LANGUAGES", " • ".join(f"{lang['language']} ({lang['level']})" for lang in resume['languages'])]
+    return "\n".join(lines) + "\n"
+
+
+def generate_corpus(directory: str, docs_per_size: int = 10, seed: int = 0) -> List[str]:
+    """
+    Generates a reproducible corpus of PDF, DOCX and TXT resumes of every size
+    class, rendered with the repository's own generators.
+
+    The corpus is reused as is when `directory` already holds one generated
+    with the same parameters.
+
+    Args:
+        directory (str): Output directory.
+        docs_per_size (int): Resumes per size class and format.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        List[str]: Paths of the generated documents.
+    """
+    from app.utlis.generate_compact_resume import generate_resume_pdf
+    from app.utlis.generate_resume_docx import generate_resume
+
+    manifest_path = os.path.join(directory, 'corpus.json')
+    params = {"docs_per_size": docs_per_size, "seed": seed, "sizes": SIZES}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['params'] == params:
+            return [os.path.join(directory, name) for name in manifest['files']]
+
+    os.makedirs(directory, exist_ok=True)
+    with open(BASE_RESUME, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    rng = random.Random(seed)
+    files = []
+    for size, n_experiences in SIZES.items():
+        for i in range(docs_per_size):
+            resume = synthetic_resume(rng, base, n_experiences)
+            stem = os.path.join(directory, f"{size}_{i:04d}")
+            with open(stem + '.json', 'w', encoding='utf-8') as f:
+                json.dump(resume, f, ensure_ascii=False, indent=2)
+            with open(stem + '.txt', 'w', encoding='utf-8') as f:
+                f.write(render_text(resume))
+            # The renderers report every file they write on stdout.
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_resume_pdf(resume, stem + '.pdf')
+                generate_resume(stem + '.json', stem + '.docx')
+            files += [os.path.basename(stem + ext) for ext in ('.pdf', '.docx', '.txt')]
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({"params": params, "files": files}, f, indent=2)
+    return [os.path.join(directory, name) for name in files]
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of the current process, in MB.
+
+    Reads VmHWM on Linux: unlike ru_maxrss, it is not inherited from the
+    parent through fork/exec, so a freshly spawned benchmark process reports
+    its own peak only.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    import sys
+
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _extractor(backend: str):
+    from app.utlis import extract_raw_data
+
+    return {
+        "pdf_to_txt": extract_raw_data.pdf_to_txt,
+        "pdf_to_txt[workers=4]": lambda path: extract_raw_data.pdf_to_txt(path, workers=4),
+        "extract_text_from_docx": extract_raw_data.extract_text_from_docx,
+        "extract_text_from_docx[stream]": lambda path: extract_raw_data.extract_text_from_docx(path, backend="stream"),
+        "extract_text_from_file": extract_raw_data.extract_text_from_file,
+    }[backend]
+
+
+# backend -> extensions of the corpus files it is run on
+BACKENDS = {
+    "pdf_to_txt": (".pdf",),
+    "pdf_to_txt[workers=4]": (".pdf",),
+    "extract_text_from_docx": (".docx",),
+    "extract_text_from_docx[stream]": (".docx",),
+    "extract_text_from_file": (".pdf", ".docx", ".txt"),
+}
+
+
+def _run_backend(backend: str, paths: List[str], repeat: int) -> dict:
+    """
+    Times one backend over `paths`. Runs in a fresh process so that the
+    reported peak RSS belongs to that backend alone (see `_backend_process`).
+    """
+    extract = _extractor(backend)
+    latencies = []
+    for _ in range(repeat):
+        for path in paths:
+            start = time.perf_counter()
+            extract(path)
+            latencies.append(time.perf_counter() - start)
+    seconds = sum(latencies)
+    megabytes = sum(os.path.getsize(path) for path in paths) * repeat / 1e6
+    return {
+        "backend": backend,
+        "docs": len(latencies),
+        "docs_per_sec": len(latencies) / seconds,
+        "mb_per_sec": megabytes / seconds,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _backend_process(connection, backend: str, paths: List[str], repeat: int) -> None:
+    """
+    Entry point of the benchmark process of one backend: sends the result of
+    `_run_backend`, or the traceback of its failure, through `connection`.
+    """
+    try:
+        connection.send(("ok", _run_backend(backend, paths, repeat)))
+    except Exception:
+        import traceback
+
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def run_benchmarks(paths: List[str], backends: List[str] = None, repeat: int = 1) -> List[Dict]:
+    """
+    Runs every backend over the corpus files it applies to.
+
+    Args:
+        paths (List[str]): Corpus files.
+        backends (List[str], optional): Subset of `BACKENDS` to run.
+        repeat (int): Passes over the corpus per backend.
+
+    Returns:
+        List[Dict]: One result per backend with docs/sec, MB/sec, p50/p95
+        latency and peak RSS.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in backends or BACKENDS:
+        selected = [path for path in paths if path.endswith(BACKENDS[backend])]
+        # A plain (non-daemonic) process: pool workers are daemonic and could
+        # not start the page extraction pool of pdf_to_txt[workers=4].
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_backend_process, args=(sender, backend, selected, repeat))
+        process.start()
+        sender.close()
+        try:
+            status, result = receiver.recv()
+        except EOFError:
+            status, result = "error", "process exited without a result"
+        finally:
+            receiver.close()
+        process.join()
+        if status != "ok":
+            raise RuntimeError(f"Benchmark of {backend} failed: {result}")
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark text extraction over a synthetic CV corpus.")
+    parser.add_argument("--corpus", default=os.path.join(SCRIPT_DIR, 'bench_corpus'),
+                        help="Corpus directory (generated if missing).")
+    parser.add_argument("--docs-per-size", type=int, default=10, help="Resumes per size class and format.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the corpus generator.")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per backend.")
+    parser.add_argument("--backend", action="append", choices=list(BACKENDS),
+                        help="Backend to run (repeatable, default: all).")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    paths = generate_corpus(args.corpus, args.docs_per_size, args.seed)
+    results = run_benchmarks(paths, args.backend, args.repeat)
+    print(f"{'backend':<32}{'docs':>6}{'docs/s':>10}{'MB/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}")
+    for r in results:
+        print(f"{r['backend']:<32}{r['docs']:>6}{r['docs_per_sec']:>10.1f}{r['mb_per_sec']:>8.2f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['peak_rss_mb']:>9.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
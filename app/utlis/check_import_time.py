@@ -0,0 +1,85 @@
+"""
+Import-time regression check for the extraction and parsing modules.
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+fails if a heavy dependency is loaded eagerly again or if the cumulative
+import time goes over its budget. Run from anywhere:
+
+    python app/utlis/check_import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def sdk_http_package() -> str:
+    """
+    Returns the top-level package of the HTTP client the installed OpenAI
+    SDK loads: httpx, or httpx2 in its recent releases.
+    """
+    try:
+        from openai import DEFAULT_CONNECTION_LIMITS
+    except ImportError:
+        return "httpx"
+    return type(DEFAULT_CONNECTION_LIMITS).__module__.split(".")[0]
+
+# module -> (budget in milliseconds, top-level packages it must not import)
+BUDGETS = {
+    "app.utlis.extract_raw_data": (60, ("PyPDF2", "docx", "lxml", "zipfile")),
+    "app.utlis.text_cache": (30, ("PyPDF2", "docx", "lxml")),
+    "app.utlis.docx_stream": (100, ("PyPDF2", "docx", "lxml")),
+    "app.utlis.batch_extract": (150, ("PyPDF2", "docx", "lxml")),
+    # pydantic is needed to define the models, everything else is lazy.
+    "app.utlis.extract_resume_part": (500, ("openai", "dotenv", "PyPDF2", sdk_http_package())),
+}
+
+# Best of several runs, to keep the check stable on a busy machine.
+RUNS = 3
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module: str):
+    """
+    Imports `module` in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time of `module` in ms, set of every
+        top-level package imported along the way).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative_ms = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name.split(".")[0])
+        if name == module:
+            cumulative_ms = int(match.group(2)) / 1000
+    return cumulative_ms, imported
+
+
+def main() -> int:
+    failures = 0
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        runs = [measure(module) for _ in range(RUNS)]
+        best_ms = min(ms for ms, _ in runs)
+        eager = sorted(set(forbidden) & runs[0][1])
+        ok = best_ms <= budget_ms and not eager
+        failures += not ok
+        status = "ok" if ok else "FAIL"
+        print(f"{status:>4}  {module:<32} {best_ms:7.1f} ms (budget {budget_ms} ms)"
+              + (f"  eagerly imports {', '.join(eager)}" if eager else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+import asyncio
+import inspect
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+# Settings of the process-wide clients, see `configure`.
+_settings = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+    "timeout": 120.0,
+    "max_retries": 4,
+    "backoff_base": 0.5,
+    "backoff_max": 30.0,
+    "failure_threshold": 5,
+    "reset_timeout": 30.0,
+}
+
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_client = None
+_async_clients = {}  # Event loop -> AsyncOpenAI, connections are bound to their loop.
+_breaker = None
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling the API while the circuit breaker is open.
+
+    Attributes:
+        retry_after (float): Seconds until the circuit lets a trial call
+            through (0 when the trial call is already running).
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling the API after `failure_threshold` consecutive failures.
+
+    Once open, calls fail fast for `reset_timeout` seconds. Then one trial
+    call is let through (half-open): its success closes the circuit, its
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with the
+                trial call already running.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpenError(
+                f"OpenAI circuit open after {self.failures} consecutive failures",
+                max(0.0, self.opened_at + self.reset_timeout - time.monotonic()))
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self) -> None:
+        """
+        Ends a call without recording its outcome, letting another call be
+        the half-open trial.
+        """
+        with self._lock:
+            self._trial = False
+
+
+def _is_retryable(error: BaseException) -> bool:
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error: BaseException, attempt: int) -> float:
+    """
+    Exponential backoff with jitter, at least the Retry-After of the response.
+    """
+    delay = min(_settings["backoff_max"], _settings["backoff_base"] * 2 ** attempt)
+    delay = random.uniform(delay / 2, delay)
+    response = getattr(error, "response", None)
+    try:
+        retry_after = float(response.headers.get("retry-after")) if response is not None else 0.0
+    except (TypeError, ValueError):
+        retry_after = 0.0
+    return max(delay, retry_after)
+
+
+class ResilientClient:
+    """
+    Proxy of an OpenAI client (or one of its resources) whose API calls go
+    through the circuit breaker and, with `retries`, are retried on 429, 5xx
+    and connection errors.
+
+    `client.responses.parse(...)` and the like are used as on the wrapped
+    client; non-callable attributes with a __dict__ (resources) are proxied
+    too. The streaming helpers (`client.responses.stream(...)`) only send
+    their request when their context manager is entered: the entry goes
+    through the breaker and the retries.
+
+    Only 5xx and connection errors count as breaker failures, and only for
+    calls with `retries`: a 429 shows the API is up, and callers without
+    retries (e.g. `async_parse`) apply their own backoff.
+    """
+
+    def __init__(self, target, breaker: CircuitBreaker, asynchronous: bool = False,
+                 retries: bool = True):
+        self._target = target
+        self._breaker = breaker
+        self._asynchronous = asynchronous
+        self._retries = retries
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if callable(attr):
+            if name == "stream":
+                return lambda *args, **kwargs: _ResilientStream(self, attr, args, kwargs)
+            if not self._asynchronous:
+                return self._wrap(attr)
+            return self._wrap_async(attr) if inspect.iscoroutinefunction(attr) else attr
+        if hasattr(attr, "__dict__"):
+            return ResilientClient(attr, self._breaker, self._asynchronous, self._retries)
+        return attr
+
+    def _max_attempts(self) -> int:
+        return _settings["max_retries"] + 1 if self._retries else 1
+
+    def _failed(self, error: BaseException, attempt: int) -> bool:
+        """
+        Records a failed attempt on the breaker.
+
+        Returns:
+            bool: Whether the call should be attempted again.
+        """
+        import openai
+
+        retryable = _is_retryable(error)
+        if not retryable or isinstance(error, openai.RateLimitError):
+            # The API answered (e.g. a 400 or a 429): it is up.
+            self._breaker.on_success()
+        elif self._retries:
+            self._breaker.on_failure()
+        else:
+            self._breaker.release()
+        return retryable and attempt + 1 < self._max_attempts()
+
+    def _wrap(self, method):
+        def call(*args, **kwargs):
+            for attempt in range(self._max_attempts()):
+                self._breaker.before_call()
+                try:
+                    result = method(*args, **kwargs)
+                except Exception as e:
+                    if not self._failed(e, attempt):
+                        raise
+                    time.sleep(_retry_delay(e, attempt))
+                    continue
+                self._breaker.on_success()
+                return result
+        return call
+
+    def _wrap_async(self, method):
+        async def call(*args, **kwargs):
+            for attempt in range(self._max_attempts()):
+                self._breaker.before_call()
+                try:
+                    result = await method(*args, **kwargs)
+                except Exception as e:
+                    if not self._failed(e, attempt):
+                        raise
+                    await asyncio.sleep(_retry_delay(e, attempt))
+                    continue
+                self._breaker.on_success()
+                return result
+        return call
+
+
+class _ResilientStream:
+    """
+    Context manager of a streaming helper call of a ResilientClient. Each
+    attempt builds a new stream manager, since an async one can only be
+    entered once.
+    """
+
+    def __init__(self, client: ResilientClient, method, args, kwargs):
+        self._client = client
+        self._method = method
+        self._args = args
+        self._kwargs = kwargs
+        self._manager = None
+
+    def __enter__(self):
+        client = self._client
+        for attempt in range(client._max_attempts()):
+            client._breaker.before_call()
+            manager = self._method(*self._args, **self._kwargs)
+            try:
+                stream = manager.__enter__()
+            except Exception as e:
+                if not client._failed(e, attempt):
+                    raise
+                time.sleep(_retry_delay(e, attempt))
+                continue
+            client._breaker.on_success()
+            self._manager = manager
+            return stream
+
+    def __exit__(self, *exc_info):
+        return self._manager.__exit__(*exc_info)
+
+    async def __aenter__(self):
+        client = self._client
+        for attempt in range(client._max_attempts()):
+            client._breaker.before_call()
+            manager = self._method(*self._args, **self._kwargs)
+            try:
+                stream = await manager.__aenter__()
+            except Exception as e:
+                if not client._failed(e, attempt):
+                    raise
+                await asyncio.sleep(_retry_delay(e, attempt))
+                continue
+            client._breaker.on_success()
+            self._manager = manager
+            return stream
+
+    async def __aexit__(self, *exc_info):
+        return await self._manager.__aexit__(*exc_info)
+
+
+def configure(**settings) -> None:
+    """
+    Changes the pool settings and drops the current clients, so that the next
+    `get_client` / `get_async_client` builds them with the new settings.
+
+    Settings: max_connections, max_keepalive_connections, keepalive_expiry
+    and timeout (seconds) of the HTTP pool; max_retries, backoff_base and
+    backoff_max (seconds) of the retries; failure_threshold and
+    reset_timeout (seconds) of the circuit breaker.
+    """
+    global _client, _breaker
+    unknown = settings.keys() - _settings.keys()
+    if unknown:
+        raise ValueError(f"Unknown client pool settings: {sorted(unknown)}")
+    with _lock:
+        _settings.update(settings)
+        _client, _breaker = None, None
+        _async_clients.clear()
+
+
+def _api_key() -> str:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EnvironmentError("OPENAI_API_KEY not set")
+    return api_key
+
+
+def _http_options(asynchronous: bool) -> dict:
+    from openai import DEFAULT_CONNECTION_LIMITS
+
+    from app.utlis.metrics import event_hooks
+
+    # The Limits class of the httpx build the SDK depends on.
+    limits = type(DEFAULT_CONNECTION_LIMITS)(max_connections=_settings["max_connections"],
+                          max_keepalive_connections=_settings["max_keepalive_connections"],
+                          keepalive_expiry=_settings["keepalive_expiry"])
+    return {"limits": limits, "timeout": _settings["timeout"],
+            "event_hooks": event_hooks(asynchronous=asynchronous)}
+
+
+def _check_pid() -> None:
+    """
+    Drops the clients inherited from a parent process: sockets must not be
+    shared across a fork. The parent's connections are left for it to close.
+    """
+    global _pid, _client, _breaker
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _client, _breaker = None, None
+        _async_clients.clear()
+
+
+def get_breaker() -> CircuitBreaker:
+    """
+    Returns the process-wide circuit breaker shared by all the clients.
+    """
+    global _breaker
+    with _lock:
+        _check_pid()
+        if _breaker is None:
+            _breaker = CircuitBreaker(_settings["failure_threshold"], _settings["reset_timeout"])
+        return _breaker
+
+
+def get_client(retries: bool = True) -> ResilientClient:
+    """
+    Returns the process-wide OpenAI client, created on first use (and again
+    after a fork) with a keep-alive connection pool.
+
+    The SDK's own retries are disabled: calls are retried with exponential
+    backoff and jitter by the returned proxy, behind the circuit breaker.
+
+    Args:
+        retries (bool): Retry 429, 5xx and connection errors.
+    """
+    global _client
+    breaker = get_breaker()
+    with _lock:
+        if _client is None:
+            from openai import DefaultHttpxClient, OpenAI
+
+            _client = OpenAI(api_key=_api_key(), max_retries=0,
+                             http_client=DefaultHttpxClient(**_http_options(False)))
+        return ResilientClient(_client, breaker, retries=retries)
+
+
+def get_async_client(retries: bool = True) -> ResilientClient:
+    """
+    Returns the AsyncOpenAI client of the running event loop, see
+    `get_client`. Without a running loop the client is shared by the calls
+    made outside of any loop.
+    """
+    breaker = get_breaker()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        for closed in [other for other in _async_clients if other is not None and other.is_closed()]:
+            del _async_clients[closed]
+        client = _async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            client = AsyncOpenAI(api_key=_api_key(), max_retries=0,
+                                 http_client=DefaultAsyncHttpxClient(**_http_options(True)))
+            _async_clients[loop] = client
+        return ResilientClient(client, breaker, asynchronous=True, retries=retries)
@@ -0,0 +1,184 @@
+import argparse
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from typing import Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+from app.utlis.extract_raw_data import Source, check_deadline, get_deadline, open_source
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+_PARAGRAPH = W_NS + "p"
+_TEXT = W_NS + "t"
+# Run-level elements rendered the same way as python-docx's Run.text.
+_SPECIAL_CHARS = {
+    W_NS + "tab": "\t",
+    W_NS + "br": "\n",
+    W_NS + "cr": "\n",
+    W_NS + "noBreakHyphen": "-",
+}
+# Legacy VML copy of drawing content (e.g. text boxes), duplicated in
+# mc:Choice; reading both would emit every text box twice.
+_FALLBACK = MC_NS + "Fallback"
+
+_HEADER_PART = re.compile(r"word/header(\d*)\.xml$")
+_FOOTER_PART = re.compile(r"word/footer(\d*)\.xml$")
+
+
+def _numbered_parts(names: List[str], pattern: re.Pattern) -> List[str]:
+    matches = [(pattern.match(name), name) for name in names]
+    return [name for match, name in sorted(
+        ((m, n) for m, n in matches if m), key=lambda item: int(item[0].group(1) or 0))]
+
+
+def _iter_part_paragraphs(part, deadline: Optional[float]) -> Iterator[str]:
+    """
+    Streams the paragraphs of one WordprocessingML part (body, header or
+    footer) in document order.
+
+    Paragraphs nested in tables, content controls and text boxes are emitted
+    where they appear. Each element is dropped from the tree as soon as it
+    ends, so memory stays flat whatever the size of the part.
+    """
+    open_elements = []
+    paragraphs = []  # Text boxes put paragraphs inside paragraphs.
+    fallback_depth = 0
+    for event, elem in iterparse(part, events=("start", "end")):
+        if event == "start":
+            open_elements.append(elem)
+            if elem.tag == _FALLBACK:
+                fallback_depth += 1
+            elif elem.tag == _PARAGRAPH and not fallback_depth:
+                paragraphs.append([])
+            continue
+
+        open_elements.pop()
+        tag = elem.tag
+        if tag == _FALLBACK:
+            fallback_depth -= 1
+        elif fallback_depth or not paragraphs:
+            pass
+        elif tag == _TEXT:
+            paragraphs[-1].append(elem.text or "")
+        elif tag in _SPECIAL_CHARS:
+            paragraphs[-1].append(_SPECIAL_CHARS[tag])
+        elif tag == _PARAGRAPH:
+            check_deadline(deadline)
+            yield "".join(paragraphs.pop())
+        if open_elements:
+            # A closing element is always the last child of its parent.
+            del open_elements[-1][-1]
+
+
+def iter_docx_stream(source: Source, use_mmap: bool = False, timeout: Optional[float] = None,
+                     include_headers: bool = True) -> Iterator[str]:
+    """
+    Yields the paragraphs of a DOCX file by streaming its XML parts, without
+    building the python-docx object model.
+
+    Unlike `extract_raw_data.iter_docx_paragraphs`, the text of tables, text
+    boxes, headers and footers is included, which is where many CV templates
+    put contact details and skills. Parts are read in reading order: headers,
+    then the body, then footers.
+
+    Args:
+        source (Source): Path, bytes-like object or binary file object.
+        use_mmap (bool): Memory-map the file when `source` is a path.
+        timeout (float, optional): Seconds allowed for decoding, checked
+            between paragraphs.
+        include_headers (bool): Also read header and footer parts.
+
+    Yields:
+        str: Text of the next paragraph.
+
+    Raises:
+        ExtractionLimitError: If the time limit is exceeded.
+    """
+    deadline = get_deadline(timeout)
+    with open_source(source, use_mmap) as docx_file:
+        with zipfile.ZipFile(docx_file) as archive:
+            names = archive.namelist()
+            parts = ["word/document.xml"]
+            if include_headers:
+                parts = (_numbered_parts(names, _HEADER_PART) + parts
+                         + _numbered_parts(names, _FOOTER_PART))
+            for name in parts:
+                with archive.open(name) as part:
+                    yield from _iter_part_paragraphs(part, deadline)
+
+
+def extract_text_from_docx_stream(source: Source, use_mmap: bool = False,
+                                  timeout: Optional[float] = None,
+                                  include_headers: bool = True) -> str:
+    """
+    Extracts text from a DOCX file with the streaming backend.
+
+    Args:
+        source (Source): Path to the DOCX file, or its content as a bytes-like
+            object or binary file object.
+        use_mmap (bool): Memory-map the file when `source` is a path.
+        timeout (float, optional): Seconds allowed for decoding.
+        include_headers (bool): Also read header and footer parts.
+
+    Returns:
+        str: Extracted text from the DOCX.
+    """
+    return "\n".join(iter_docx_stream(source, use_mmap, timeout, include_headers))
+
+
+def _run_backend(backend: str, paths: List[str], repeat: int) -> dict:
+    """
+    Extracts `paths` `repeat` times with one backend. Runs in a fresh process
+    so that the reported peak RSS belongs to that backend alone.
+    """
+    from app.utlis.benchmark_extraction import peak_rss_mb
+    from app.utlis.extract_raw_data import extract_text_from_docx
+
+    extract = extract_text_from_docx_stream if backend == "stream" else extract_text_from_docx
+    start = time.perf_counter()
+    chars = 0
+    for _ in range(repeat):
+        for path in paths:
+            chars += len(extract(path))
+    seconds = time.perf_counter() - start
+    return {"backend": backend, "seconds": seconds, "chars": chars, "peak_rss_mb": peak_rss_mb()}
+
+
+def benchmark_backends(paths: List[str], repeat: int = 10) -> List[dict]:
+    """
+    Compares the python-docx and streaming backends on throughput and peak
+    memory.
+
+    Args:
+        paths (List[str]): DOCX files to extract.
+        repeat (int): Number of passes over `paths` per backend.
+
+    Returns:
+        List[dict]: One result per backend with docs/sec, MB/sec, the
+        extracted character count and the peak RSS of its process.
+    """
+    total_mb = sum(os.path.getsize(path) for path in paths) * repeat / 1e6
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in ("python-docx", "stream"):
+        with context.Pool(1) as pool:
+            result = pool.apply(_run_backend, (backend, paths, repeat))
+        result["docs_per_sec"] = len(paths) * repeat / result["seconds"]
+        result["mb_per_sec"] = total_mb / result["seconds"]
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DOCX extraction backends.")
+    parser.add_argument("paths", nargs="+", help="DOCX files to extract.")
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the files per backend.")
+    args = parser.parse_args()
+    for result in benchmark_backends(args.paths, args.repeat):
+        print(f"{result['backend']:>12}: {result['docs_per_sec']:8.1f} docs/s "
+              f"{result['mb_per_sec']:7.2f} MB/s  peak RSS {result['peak_rss_mb']:.1f} MB  "
+              f"({result['chars']} chars)")
@@ -1,70 +1,570 @@
+import codecs
+import io
+import mmap
 import os
-from PyPDF2 import PdfReader
-from docx import Document
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Union
 
+# PyPDF2, python-docx, zipfile and the process pool are imported inside the functions
+# that use them: importing this module must stay cheap for short-lived CLI
+# runs and freshly spawned workers (see check_import_time.py).
 
-def pdf_to_txt(path: str) -> str:
+# Bump whenever a change to the extractors alters their output, so cached
+# text produced by an older version is not reused.
+EXTRACTOR_VERSION = "1"
+
+# Below this many pages the cost of spawning workers outweighs the gain.
+PARALLEL_PAGE_THRESHOLD = 8
+
+# "python-docx" reads body paragraphs through the python-docx object model;
+# "stream" (see docx_stream.py) streams the XML parts and also covers tables,
+# text boxes, headers and footers.
+DOCX_BACKENDS = ("python-docx", "stream")
+
+# Anything the extractors can read from: a filesystem path, an in-memory
+# buffer or an open binary file object.
+Source = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+class ExtractionLimitError(ValueError):
+    """Raised when a document exceeds its size, page or wall-clock budget."""
+
+
+class _BufferReader(io.RawIOBase):
     """
-    Extracts text from a PDF file and returns it as a string.
+    Read-only, seekable binary stream over a buffer (bytes, memoryview, mmap).
+
+    The buffer is exposed through a memoryview, so wrapping it never copies
+    the document; only the slices handed out by `read` are materialized.
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = bytes(self._view[self._pos:end]) if end > self._pos else b""
+        self._pos = max(self._pos, end)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def _is_path(source: Source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+@contextmanager
+def open_source(source: Source, use_mmap: bool = False) -> Iterator[BinaryIO]:
+    """
+    Opens any supported source as a seekable binary stream.
+
+    Paths are opened (and memory-mapped when `use_mmap` is set), in-memory
+    buffers are wrapped without copying, and file objects are passed through
+    untouched: they are neither rewound nor closed.
+
+    Args:
+        source (Source): Path, bytes-like object or binary file object.
+        use_mmap (bool): Memory-map paths instead of reading them through
+            regular file I/O. Useful for large local inputs.
+
+    Yields:
+        BinaryIO: Stream positioned at the start of the document.
+    """
+    if _is_path(source):
+        with open(source, "rb") as f:
+            if use_mmap and os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with _BufferReader(mapped) as stream:
+                        yield stream
+            else:
+                yield f
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        with _BufferReader(source) as stream:
+            yield stream
+    else:
+        yield source
+
+
+def detect_format(source: Source) -> str:
+    """
+    Detects the format of a document from its content rather than its name.
+
+    Looks for a PDF header, a ZIP archive holding word/document.xml, or
+    NUL-free UTF-8 text in the leading bytes. File objects are rewound to
+    where they were.
 
     Args:
-        path (str): Path to the PDF file.
+        source (Source): Path, bytes-like object or seekable binary file object.
 
     Returns:
-        str: Extracted text from the PDF.
+        str: "pdf", "docx" or "txt".
+
+    Raises:
+        ValueError: If the content matches none of the supported formats.
+    """
+    import zipfile
+
+    with open_source(source) as stream:
+        position = stream.tell()
+        try:
+            head = stream.read(1024)
+            if b"%PDF-" in head:
+                return "pdf"
+            if head.startswith(b"PK\x03\x04"):
+                stream.seek(position)
+                try:
+                    with zipfile.ZipFile(stream) as archive:
+                        if "word/document.xml" in archive.namelist():
+                            return "docx"
+                except zipfile.BadZipFile:
+                    pass
+            elif b"\0" not in head:
+                try:
+                    # final=False tolerates a multi-byte character cut at 1024.
+                    codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+                    return "txt"
+                except UnicodeDecodeError:
+                    pass
+        finally:
+            stream.seek(position)
+    raise ValueError("Unsupported file format. Please provide a .pdf, .docx, or .txt file.")
+
+
+def _source_size(source: Source) -> int:
+    """
+    Returns the number of bytes left to read from a source.
+    """
+    if _is_path(source):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    position = source.tell()
+    size = source.seek(0, io.SEEK_END)
+    source.seek(position)
+    return size - position
+
+
+def _check_size(source: Source, max_bytes: Optional[int]) -> None:
+    if max_bytes is not None:
+        size = _source_size(source)
+        if size > max_bytes:
+            raise ExtractionLimitError(f"Document is {size} bytes, over the {max_bytes} bytes limit.")
+
+
+def _check_pages(page_count: int, max_pages: Optional[int]) -> None:
+    if max_pages is not None and page_count > max_pages:
+        raise ExtractionLimitError(f"Document has {page_count} pages, over the {max_pages} pages limit.")
+
+
+def get_deadline(timeout: Optional[float]) -> Optional[float]:
+    """
+    Returns the deadline of an extraction starting now, to pass to
+    `check_deadline`.
+
+    Args:
+        timeout (float, optional): Seconds allowed, None for no limit.
+
+    Returns:
+        float: Wall-clock time (time.time()), so that the deadline is
+        shared with worker processes, or None.
     """
+    return None if timeout is None else time.time() + timeout
+
+
+def check_deadline(deadline: Optional[float]) -> None:
+    """
+    Called between pages or paragraphs of an extraction.
+
+    Raises:
+        ExtractionLimitError: If `deadline` (from `get_deadline`) is past.
+    """
+    if deadline is not None and time.time() > deadline:
+        raise ExtractionLimitError("Document extraction exceeded its time limit.")
+
+
+def _extract_page_range(path: str, start: int, stop: int,
+                        deadline: Optional[float] = None) -> List[str]:
+    """
+    Extracts the text of pages [start, stop) of a PDF file.
+
+    Runs inside a worker process: each worker opens its own reader, so no
+    PyPDF2 objects have to be pickled across processes.
+    """
+    from PyPDF2 import PdfReader
+
+    pages = []
     with open(path, "rb") as pdf_file:
         reader = PdfReader(pdf_file)
-        pages = [page.extract_text() or "" for page in reader.pages]
-        return "\n".join(pages)
+        try:
+            for i in range(start, stop):
+                check_deadline(deadline)
+                pages.append(reader.pages[i].extract_text() or "")
+        except RecursionError as e:
+            raise ExtractionLimitError("PDF object nesting is too deep.") from e
+    return pages
+
+
+def _extract_pages_parallel(path: str, page_count: int, workers: int,
+                            deadline: Optional[float] = None) -> List[str]:
+    """
+    Splits the pages of a PDF into contiguous ranges, extracts them across a
+    process pool and returns the page texts in document order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, page_count)
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(
+            _extract_page_range,
+            [path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+            [deadline] * len(ranges),
+        )
+        return [page for chunk in chunks for page in chunk]
 
 
-def extract_text_from_docx(filepath):
+def iter_pdf_pages(source: Source, use_mmap: bool = False, max_pages: Optional[int] = None,
+                   timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Yields the text of a PDF file one page at a time, as each page is decoded.
+
+    Args:
+        source (Source): Path, bytes-like object or binary file object.
+        use_mmap (bool): Memory-map the file when `source` is a path.
+        max_pages (int, optional): Refuse documents with more pages.
+        timeout (float, optional): Seconds allowed for decoding, checked
+            between pages.
+
+    Yields:
+        str: Text of the next page ("" for pages without a text layer).
+
+    Raises:
+        ExtractionLimitError: If a limit is exceeded.
+    """
+    from PyPDF2 import PdfReader
+
+    deadline = get_deadline(timeout)
+    with open_source(source, use_mmap) as pdf_file:
+        reader = PdfReader(pdf_file)
+        try:
+            _check_pages(len(reader.pages), max_pages)
+            for page in reader.pages:
+                check_deadline(deadline)
+                yield page.extract_text() or ""
+        except RecursionError as e:
+            raise ExtractionLimitError("PDF object nesting is too deep.") from e
+
+
+def pdf_to_txt(path: Source, workers: Optional[int] = 1,
+               parallel_threshold: int = PARALLEL_PAGE_THRESHOLD,
+               use_mmap: bool = False, max_pages: Optional[int] = None,
+               timeout: Optional[float] = None) -> str:
+    """
+    Extracts text from a PDF file and returns it as a string.
+
+    Args:
+        path (Source): Path to the PDF file, or its content as a bytes-like
+            object or binary file object.
+        workers (int, optional): Number of worker processes used to extract
+            pages. 1 (the default) extracts serially, None uses one worker
+            per CPU. Only paths are extracted in parallel.
+        parallel_threshold (int): Documents with fewer pages than this are
+            always extracted serially.
+        use_mmap (bool): Memory-map the file when `path` is a path.
+        max_pages (int, optional): Refuse documents with more pages.
+        timeout (float, optional): Seconds allowed for decoding, checked
+            between pages (in every worker when extracting in parallel).
+
+    Returns:
+        str: Extracted text from the PDF.
+
+    Raises:
+        ExtractionLimitError: If a limit is exceeded.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and _is_path(path):
+        from PyPDF2 import PdfReader
+
+        deadline = get_deadline(timeout)
+        with open(path, "rb") as pdf_file:
+            page_count = len(PdfReader(pdf_file).pages)
+        _check_pages(page_count, max_pages)
+        if page_count >= max(parallel_threshold, 2):
+            return "\n".join(_extract_pages_parallel(path, page_count, workers, deadline))
+    return "\n".join(iter_pdf_pages(path, use_mmap, max_pages, timeout))
+
+
+def _check_docx_backend(backend: str) -> None:
+    if backend not in DOCX_BACKENDS:
+        raise ValueError(f"Unknown DOCX backend {backend!r}, expected one of {DOCX_BACKENDS}.")
+
+
+def iter_docx_paragraphs(filepath: Source, use_mmap: bool = False,
+                         timeout: Optional[float] = None,
+                         backend: str = "python-docx") -> Iterator[str]:
+    """
+    Yields the paragraphs of a DOCX file one at a time.
+
+    Args:
+        filepath (Source): Path, bytes-like object or binary file object.
+        use_mmap (bool): Memory-map the file when `filepath` is a path.
+        timeout (float, optional): Seconds allowed for decoding, checked
+            between paragraphs.
+        backend (str): One of `DOCX_BACKENDS`.
+
+    Yields:
+        str: Text of the next paragraph.
+
+    Raises:
+        ExtractionLimitError: If the time limit is exceeded.
+    """
+    _check_docx_backend(backend)
+    if backend == "stream":
+        from app.utlis.docx_stream import iter_docx_stream
+        yield from iter_docx_stream(filepath, use_mmap, timeout)
+        return
+    from docx import Document
+
+    deadline = get_deadline(timeout)
+    with open_source(filepath, use_mmap) as docx_file:
+        doc = Document(docx_file)
+    for p in doc.paragraphs:
+        check_deadline(deadline)
+        yield p.text
+
+
+def extract_text_from_docx(filepath: Source, use_mmap: bool = False,
+                           timeout: Optional[float] = None, backend: str = "python-docx"):
     """
     Extracts text from a DOCX file and returns it as a string.
 
     Args:
-        filepath (str): Path to the DOCX file.
+        filepath (Source): Path to the DOCX file, or its content as a
+            bytes-like object or binary file object.
+        use_mmap (bool): Memory-map the file when `filepath` is a path.
+        timeout (float, optional): Seconds allowed for decoding.
+        backend (str): One of `DOCX_BACKENDS`.
 
     Returns:
         str: Extracted text from the DOCX.
     """
-    doc = Document(filepath)
-    return "\n".join(p.text for p in doc.paragraphs)
+    return "\n".join(iter_docx_paragraphs(filepath, use_mmap, timeout, backend))
+
+
+@contextmanager
+def _open_text(source: Source) -> Iterator[io.TextIOBase]:
+    """
+    Opens a source as UTF-8 text with universal newlines, like open(path, "r").
+    """
+    if _is_path(source):
+        with open(source, "r", encoding="utf-8") as f:
+            yield f
+        return
+    with open_source(source) as stream:
+        if not isinstance(stream, io.BufferedIOBase):
+            stream = io.BufferedReader(stream)
+        text = io.TextIOWrapper(stream, encoding="utf-8")
+        try:
+            yield text
+        finally:
+            # Leave caller-provided file objects open.
+            text.detach()
+
+
+def iter_txt_lines(filepath: Source, timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Yields the lines of a text file one at a time, without their newline.
+
+    A trailing newline (or an empty file) yields a final empty line, so that
+    "\\n".join() of the chunks is identical to `extract_text_from_txt`.
+
+    Args:
+        filepath (Source): Path, bytes-like object or binary file object.
+        timeout (float, optional): Seconds allowed for decoding, checked
+            between lines.
+
+    Yields:
+        str: Next line of the file.
+
+    Raises:
+        ExtractionLimitError: If the time limit is exceeded.
+    """
+    deadline = get_deadline(timeout)
+    with _open_text(filepath) as f:
+        ends_with_newline = True
+        for line in f:
+            check_deadline(deadline)
+            ends_with_newline = line.endswith("\n")
+            yield line[:-1] if ends_with_newline else line
+        if ends_with_newline:
+            yield ""
 
 
-def extract_text_from_txt(filepath):
+def extract_text_from_txt(filepath: Source):
     """
     Reads the content of a text file (.txt) and returns it as a string.
 
     Args:
-        filepath (str): Path to the text file.
+        filepath (Source): Path to the text file, or its content as a
+            bytes-like object or binary file object.
 
     Returns:
         str: Content of the text file.
     """
-    with open(filepath, "r", encoding="utf-8") as f:
+    with _open_text(filepath) as f:
         return f.read()
 
 
-def extract_text_from_file(filepath: str) -> str:
+def _resolve_format(source: Source, file_format: Optional[str]) -> str:
+    """
+    Returns the format ("pdf", "docx" or "txt") of a source, taken from
+    `file_format` when given and sniffed from its content otherwise.
     """
-    Extracts text from a file based on its extension (.pdf, .docx, .txt).
+    if file_format is None:
+        return detect_format(source)
+    file_format = file_format.lower().lstrip(".")
+    if file_format not in ("pdf", "docx", "txt"):
+        raise ValueError("Unsupported file format. Please provide a .pdf, .docx, or .txt file.")
+    return file_format
+
+
+def iter_text_from_file(filepath: Source, file_format: Optional[str] = None,
+                        use_mmap: bool = False, max_bytes: Optional[int] = None,
+                        max_pages: Optional[int] = None, timeout: Optional[float] = None,
+                        docx_backend: str = "python-docx") -> Iterator[str]:
+    """
+    Streaming counterpart of `extract_text_from_file`.
+
+    Yields page (.pdf), paragraph (.docx) or line (.txt) chunks as they are
+    decoded, so callers can start processing before the whole document has
+    been read. "\\n".join() of the chunks equals `extract_text_from_file`.
 
     Args:
-        filepath (str): Path to the file to process.
+        filepath (Source): Path, bytes-like object or binary file object.
+        file_format (str, optional): "pdf", "docx" or "txt". Detected from
+            the file content when omitted.
+        use_mmap (bool): Memory-map PDF and DOCX files given by path.
+        max_bytes (int, optional): Refuse larger documents.
+        max_pages (int, optional): Refuse PDFs with more pages.
+        timeout (float, optional): Seconds allowed for decoding, checked
+            between chunks.
+        docx_backend (str): One of `DOCX_BACKENDS`.
+
+    Yields:
+        str: Next chunk of text.
+
+    Raises:
+        ValueError: If the file format is not supported.
+        ExtractionLimitError: If a limit is exceeded.
+    """
+    _check_size(filepath, max_bytes)
+    file_format = _resolve_format(filepath, file_format)
+    if file_format == "pdf":
+        return iter_pdf_pages(filepath, use_mmap, max_pages, timeout)
+    elif file_format == "docx":
+        return iter_docx_paragraphs(filepath, use_mmap, timeout, docx_backend)
+    else:
+        return iter_txt_lines(filepath, timeout)
+
+
+def extract_text_from_file(filepath: Source, workers: Optional[int] = 1, cache=None,
+                           file_format: Optional[str] = None, use_mmap: bool = False,
+                           max_bytes: Optional[int] = None, max_pages: Optional[int] = None,
+                           timeout: Optional[float] = None,
+                           docx_backend: str = "python-docx") -> str:
+    """
+    Extracts text from a PDF, DOCX or plain-text file.
+
+    The format is detected from the file content, so mislabeled files are
+    decoded with the right backend. Documents over one of the optional
+    budgets are aborted with `ExtractionLimitError`, so a pathological
+    input cannot hold a worker for minutes.
+
+    Args:
+        filepath (Source): Path to the file to process, or its content as a
+            bytes-like object or binary file object (e.g. an upload body).
+        workers (int, optional): Worker processes for PDF page extraction,
+            see `pdf_to_txt`.
+        cache (TextCache, optional): Cache consulted before decoding the
+            file, and filled with the result on a miss.
+        file_format (str, optional): "pdf", "docx" or "txt". Detected from
+            the file content when omitted.
+        use_mmap (bool): Memory-map PDF and DOCX files given by path.
+        max_bytes (int, optional): Refuse larger documents.
+        max_pages (int, optional): Refuse PDFs with more pages.
+        timeout (float, optional): Seconds allowed for decoding. Checked
+            between pages and paragraphs, so a single page that never
+            finishes still has to be interrupted by the caller.
+        docx_backend (str): One of `DOCX_BACKENDS`.
 
     Returns:
         str: Extracted text from the file.
 
     Raises:
         ValueError: If the file format is not supported.
+        ExtractionLimitError: If a limit is exceeded.
     """
-    if filepath.endswith('.pdf'):
-        return pdf_to_txt(filepath)
-    elif filepath.endswith('.docx'):
-        return extract_text_from_docx(filepath)
-    elif filepath.endswith('.txt'):
-        return extract_text_from_txt(filepath)
+    _check_size(filepath, max_bytes)
+    file_format = _resolve_format(filepath, file_format)
+    _check_docx_backend(docx_backend)
+    if cache is not None:
+        version = EXTRACTOR_VERSION
+        if file_format == "docx" and docx_backend != "python-docx":
+            version = f"{EXTRACTOR_VERSION}+{docx_backend}"
+        key = cache.key_for(filepath, version)
+        text = cache.get(key)
+        if text is None:
+            text = extract_text_from_file(filepath, workers=workers, file_format=file_format,
+                                          use_mmap=use_mmap, max_pages=max_pages, timeout=timeout,
+                                          docx_backend=docx_backend)
+            cache.put(key, text)
+        return text
+
+    if file_format == "pdf":
+        return pdf_to_txt(filepath, workers=workers, use_mmap=use_mmap,
+                          max_pages=max_pages, timeout=timeout)
+    elif file_format == "docx":
+        return extract_text_from_docx(filepath, use_mmap, timeout, docx_backend)
     else:
-        raise ValueError("Unsupported file format. Please provide a .pdf, .docx, or .txt file.")
\ No newline at end of file
+        return extract_text_from_txt(filepath)
@@ -1,11 +1,38 @@
+import argparse
+import hashlib
 import json
 import os
+import re
+import time
+from functools import lru_cache
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from openai import OpenAI
-from dotenv import load_dotenv
-import PyPDF2
-load_dotenv()
+
+from app.utlis.metrics import track_call
+
+
+def get_openai_client():
+    """
+    Returns the process-wide OpenAI client, see `client_pool.get_client`.
+
+    The OpenAI SDK and dotenv are only loaded on first use, and the .env file
+    and OPENAI_API_KEY are read at that point.
+    """
+    from app.utlis.client_pool import get_client
+
+    return get_client()
+
+
+def get_async_openai_client(retries: bool = True):
+    """
+    Returns the AsyncOpenAI client of the running event loop, see
+    `client_pool.get_async_client`.
+    """
+    from app.utlis.client_pool import get_async_client
+
+    return get_async_client(retries)
+
+
 class ContactInfo(BaseModel):
     """Basic contact details of the candidate."""
     name: str = Field(..., description="Full name of the candidate.")
@@ -147,55 +174,283 @@ class ResumeTemplate(BaseModel):
 
 
 
-def main():
-    # Load API key
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise EnvironmentError("OPENAI_API_KEY not set")
+MODEL = "gpt-4.1"
 
-    client = OpenAI(api_key=api_key)
+# Instructions come first and the schema last, so that every request shares
+# the longest possible static prefix for the provider's prompt caching.
+SYSTEM_PROMPT_TEMPLATE = """
+You are a resume parser. Convert the following resume into a JSON object matching the ResumeTemplate Pydantic schema.
+Ensure that the output keys match the schema exactly and return valid JSON.
+"""
 
-    # Load a raw resume text from a TXT file
-    with open("CV_original.txt") as file:
-        raw_resume = file.read()
-    print(f"Extracted resume length: {len(raw_resume)} characters")
+SCHEMA_PROMPT_TEMPLATE = """Here is the schema definition for ResumeTemplate:
+{schema_json}
+"""
 
-    # Generate JSON Schema for ResumeTemplate
+# How much of the schema the system prompt embeds. The output is enforced by
+# text_format=ResumeTemplate in every mode; the schema in the prompt only
+# costs input tokens ("full" is the pretty-printed schema, "compact" the
+# minified one, "none" leaves it out).
+PROMPT_MODES = ("full", "compact", "none")
+
+
+@lru_cache(maxsize=None)
+def resume_schema_json(compact: bool = False) -> str:
+    """
+    Returns the JSON schema of ResumeTemplate, computed once per process.
+
+    Args:
+        compact (bool): Minify the JSON instead of indenting it.
+    """
     schema_dict = ResumeTemplate.model_json_schema(by_alias=False)
-    schema_json = json.dumps(schema_dict, indent=2)
-    with open("resume_template_schema.json", "w") as schema_file:
-        schema_file.write(schema_json)
+    if compact:
+        return json.dumps(schema_dict, separators=(",", ":"))
+    return json.dumps(schema_dict, indent=2)
 
-    # Construct prompts
-    system_prompt = f"""
-You are a resume parser. Convert the following resume into a JSON object matching this Pydantic schema.
-Here is the schema definition for ResumeTemplate:
-{schema_json}
-Ensure that the output keys match the schema exactly and return valid JSON.
-"""
-    user_prompt = raw_resume
 
-    # Call OpenAI using .parse instead of .create
-    response = client.responses.parse(
-        model="gpt-4.1",
-        input=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.0,
+@lru_cache(maxsize=None)
+def build_system_prompt(prompt_mode: str = "full") -> str:
+    """
+    Builds the system prompt for one of the PROMPT_MODES.
+    """
+    if prompt_mode not in PROMPT_MODES:
+        raise ValueError(f"Unknown prompt mode {prompt_mode!r}, expected one of {PROMPT_MODES}")
+    if prompt_mode == "none":
+        return SYSTEM_PROMPT_TEMPLATE
+    schema_json = resume_schema_json(compact=prompt_mode == "compact")
+    return SYSTEM_PROMPT_TEMPLATE + SCHEMA_PROMPT_TEMPLATE.format(schema_json=schema_json)
+
+
+def response_usage(response, seconds: float) -> dict:
+    """
+    Summarizes the token usage and latency of a Responses API call.
+
+    Returns:
+        dict: input_tokens, cached_tokens (served from the prompt cache),
+        output_tokens and seconds.
+    """
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+        "output_tokens": getattr(usage, "output_tokens", None),
+        "seconds": seconds,
+    }
+
+
+def open_parse_cache(path: str, ttl: Optional[float] = None, max_bytes: Optional[int] = 256 * 1024 * 1024):
+    """
+    Opens the persistent parse cache for ResumeTemplate parses.
+
+    Entries cached under an older ResumeTemplate schema are dropped.
+
+    Args:
+        path (str): SQLite database file.
+        ttl (float, optional): Lifetime of an entry in seconds.
+        max_bytes (int, optional): Maximum total size of the cached parses.
+
+    Returns:
+        ParseCache: The cache.
+    """
+    from app.utlis.parse_cache import ParseCache
 
-        text_format=ResumeTemplate,
-    )
+    return ParseCache(path, resume_schema_json(), ttl=ttl, max_bytes=max_bytes)
 
 
-    parsed = response.output_parsed
+def parse_resume(raw_resume: str, client=None, cache=None, prompt_mode: str = "full",
+                 report=None, metrics=None) -> ResumeTemplate:
+    """
+    Parses a raw resume text into a ResumeTemplate with the OpenAI API.
+
+    Args:
+        raw_resume (str): Extracted resume text.
+        client (OpenAI, optional): Client to use, defaults to
+            `get_openai_client()`.
+        cache (ParseCache, optional): Cache of previous parses, see
+            `open_parse_cache`. Identical requests are answered from it
+            without calling the API.
+        prompt_mode (str): How much of the schema the prompt embeds, one of
+            PROMPT_MODES.
+        report (callable, optional): Called with the `response_usage` of the
+            API call (not called on cache hits).
+        metrics (MetricsRecorder, optional): Recorder of the API call metrics.
+
+    Returns:
+        ResumeTemplate: The validated resume.
+
+    Raises:
+        ValueError: If the response does not match ResumeTemplate.
+    """
+    system_prompt = build_system_prompt(prompt_mode)
+    if cache is not None:
+        key = cache.key(MODEL, system_prompt, raw_resume)
+        cached = cache.get(key)
+        if cached is not None:
+            return ResumeTemplate.model_validate_json(cached)
 
+    client = client or get_openai_client()
+
+    # Call OpenAI using .parse instead of .create
+    start = time.perf_counter()
+    with track_call(metrics, MODEL) as call:
+        response = client.responses.parse(
+            model=MODEL,
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": raw_resume},
+            ],
+            temperature=0.0,
+
+            text_format=ResumeTemplate,
+        )
+        usage = response_usage(response, time.perf_counter() - start)
+        call.set_usage(usage)
+        if report is not None:
+            report(usage)
+
+        parsed = response.output_parsed
+
+        if not isinstance(parsed, ResumeTemplate):
+            call.validation_failed = True
+            raise ValueError("La réponse n'est pas conforme au modèle ResumeTemplate")
+    if cache is not None:
+        cache.put(key, parsed.model_dump_json())
+    return parsed
+
+
+# Contact details of a resume text. Phones have 9 to 15 digits with at most
+# two separators between consecutive digits, and do not start with a year
+# range: "2018 - 2020" or "2018.01 - 2020.03" are dates.
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"(?<![\w+])(?!(?:19|20)\d{2}\D{1,3}(?:19|20)\d{2}\b)"
+                           r"\+?\(?\d(?:[\s().-]{0,2}\d){8,14}(?!\d)")
+LINKEDIN_PATTERN = re.compile(r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/in/[\w%-]+/?", re.IGNORECASE)
+
+
+def patch_contact_info(resume: ResumeTemplate, raw_resume: str) -> ResumeTemplate:
+    """
+    Refreshes the email, phone and LinkedIn URL of an already parsed resume
+    from a new version of its text, the fields that most often change between
+    two near-identical submissions.
 
-    if not isinstance(parsed, ResumeTemplate):
-        raise ValueError("La réponse n'est pas conforme au modèle ResumeTemplate")
+    Returns:
+        ResumeTemplate: A patched copy of `resume`.
+    """
+    update = {}
+    for field, pattern in (("email", EMAIL_PATTERN), ("phone", PHONE_PATTERN),
+                           ("linkedin", LINKEDIN_PATTERN)):
+        match = pattern.search(raw_resume)
+        if match:
+            update[field] = match.group(0).strip()
+    contact_info = resume.contact_info.model_copy(update=update)
+    return resume.model_copy(update={"contact_info": contact_info})
+
+
+def parse_resume_deduplicated(raw_resume: str, store, threshold: Optional[float] = None,
+                              client=None, cache=None, prompt_mode: str = "full", report=None,
+                              metrics=None):
+    """
+    Parses a resume, reusing the parse of a near-identical resume seen before.
+
+    Previously parsed resumes are kept in a `near_duplicates.DedupStore`.
+    When the new text is at least `threshold` similar to one of them, the
+    stored ResumeTemplate is reused with its contact details patched from
+    the new text, and no API call is made. Otherwise the resume is parsed
+    and added to the store, whose index is written when it is saved or
+    closed.
+
+    Args:
+        raw_resume (str): Extracted resume text.
+        store (DedupStore or str): Store of previous parses, or its directory
+            to open it for this call only (the index is then loaded and
+            written again: keep a DedupStore open for a series of resumes).
+        threshold (float, optional): Minimum estimated similarity to reuse a
+            parse (default: the threshold of the store).
+        client (OpenAI, optional): Client used for fresh parses.
+        cache (ParseCache, optional): Cache consulted for fresh parses.
+        prompt_mode (str): Prompt mode of fresh parses, see `parse_resume`.
+        report (callable, optional): Usage callback of fresh parses.
+        metrics (MetricsRecorder, optional): Recorder of fresh parse metrics.
+
+    Returns:
+        tuple: (ResumeTemplate, key of the reused resume or None, its
+        estimated similarity or None).
+    """
+    from app.utlis.near_duplicates import DedupStore
+
+    if isinstance(store, str):
+        with DedupStore(store) as opened:
+            return parse_resume_deduplicated(raw_resume, opened, threshold, client, cache,
+                                             prompt_mode, report, metrics)
+
+    signature = store.index.signature(raw_resume)
+    found = store.find(signature=signature, threshold=threshold)
+    if found is not None:
+        key, similarity, previous = found
+        return (patch_contact_info(ResumeTemplate.model_validate_json(previous), raw_resume),
+                key, similarity)
+
+    parsed = parse_resume(raw_resume, client, cache, prompt_mode, report, metrics)
+    key = hashlib.sha256(raw_resume.encode("utf-8")).hexdigest()
+    store.add(key, parsed.model_dump_json(), signature=signature)
+    return parsed, None, None
+
+
+def _print_usage(usage: dict) -> None:
+    print(f"Input tokens: {usage['input_tokens']} ({usage['cached_tokens']} cached), "
+          f"output tokens: {usage['output_tokens']}, latency: {usage['seconds']:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a resume text into a ResumeTemplate JSON.")
+    parser.add_argument("--input", default="CV_original.txt", help="Raw resume text file.")
+    parser.add_argument("--output", default="parsed_resume.json", help="Parsed resume JSON file.")
+    parser.add_argument("--dedup-dir", help="Reuse parses of near-duplicate resumes stored here.")
+    parser.add_argument("--dedup-threshold", type=float, default=0.9,
+                        help="Minimum similarity to reuse a previous parse.")
+    parser.add_argument("--cache", help="SQLite cache of previous parses.")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="Lifetime of a cached parse in seconds.")
+    parser.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                        help="Schema embedded in the prompt: pretty-printed, minified or none.")
+    parser.add_argument("--metrics-jsonl", help="Append the metrics of the API call to this file.")
+    parser.add_argument("--prometheus", help="Write the metrics in Prometheus text format here.")
+    args = parser.parse_args(argv)
+    cache = open_parse_cache(args.cache, ttl=args.cache_ttl) if args.cache else None
+    metrics = None
+    if args.metrics_jsonl or args.prometheus:
+        from app.utlis.metrics import MetricsRecorder
+
+        metrics = MetricsRecorder(args.metrics_jsonl)
+
+    # Load a raw resume text from a TXT file
+    with open(args.input) as file:
+        raw_resume = file.read()
+    print(f"Extracted resume length: {len(raw_resume)} characters")
+
+    # Generate JSON Schema for ResumeTemplate
+    with open("resume_template_schema.json", "w") as schema_file:
+        schema_file.write(resume_schema_json())
+
+    if args.dedup_dir:
+        parsed, key, similarity = parse_resume_deduplicated(
+            raw_resume, args.dedup_dir, args.dedup_threshold, cache=cache,
+            prompt_mode=args.prompt_mode, report=_print_usage, metrics=metrics)
+        if key is not None:
+            print(f"Near-duplicate of {key} (similarity {similarity:.2f}), reused its parse")
+    else:
+        parsed = parse_resume(raw_resume, cache=cache, prompt_mode=args.prompt_mode,
+                              report=_print_usage, metrics=metrics)
     print("Parsed resume successfully:", parsed)
+    if cache is not None:
+        print("Parse cache:", cache.stats())
+    if metrics is not None:
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+        metrics.close()
     # Save the parsed resume to a JSON file
-    with open("parsed_resume.json", "w") as json_file:
+    with open(args.output, "w") as json_file:
         json.dump(parsed.model_dump(), json_file, indent=2)
 
 if __name__ == "__main__":
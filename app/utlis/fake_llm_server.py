@@ -0,0 +1,486 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from app.utlis.async_parse import estimate_tokens
+from app.utlis.extract_resume_part import MODEL, PROMPT_MODES, ResumeTemplate
+from app.utlis.rule_parser import parse_resume_rules
+from app.utlis.section_parse import SECTION_MODELS
+
+# Prompt caching of the API: prefixes of at least 1024 tokens seen before are
+# cached, in increments of 128 tokens.
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+
+# Output characters sent per streamed delta (about 4 tokens).
+DELTA_CHARACTERS = 16
+
+_MODELS = {model.__name__: model for model in (ResumeTemplate, *SECTION_MODELS.values())}
+
+
+class FakeLLMSettings:
+    """
+    Behavior of the fake server.
+
+    Latencies are drawn from a log-normal distribution of median `latency`
+    seconds before the first byte, then the output is generated at
+    `tokens_per_second` (0 for instantly). Each request fails with a 429,
+    500 or 503 error with the given probabilities; 429 and 503 carry a
+    Retry-After of `retry_after` seconds.
+
+    All draws are seeded by `seed`, the request body and the number of times
+    the same body was received, so that a run is reproducible and retries of
+    a request get fresh draws.
+    """
+
+    def __init__(self, latency: float = 0.5, latency_sigma: float = 0.5,
+                 tokens_per_second: float = 0.0, error_429: float = 0.0, error_500: float = 0.0,
+                 error_503: float = 0.0, retry_after: float = 1.0, seed: int = 0):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.error_503 = error_503
+        self.retry_after = retry_after
+        self.seed = seed
+
+
+def _message_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def _messages(body: dict) -> Tuple[str, str]:
+    """
+    Returns the system prompt and the user text of a Responses API request.
+    """
+    items = body.get("input")
+    if isinstance(items, str):
+        return body.get("instructions") or "", items
+    system = [_message_text(item.get("content")) for item in items if item.get("role") == "system"]
+    user = [_message_text(item.get("content")) for item in items if item.get("role") != "system"]
+    return "\n".join(system) or body.get("instructions") or "", "\n".join(user)
+
+
+def answer(body: dict) -> str:
+    """
+    Builds the output text of a request: the rule-based parse of the user
+    text, as an instance of the model named by the requested text format
+    (ResumeTemplate or a section model).
+
+    Raises:
+        ValueError: If the requested format is not a known model.
+    """
+    name = ((body.get("text") or {}).get("format") or {}).get("name", ResumeTemplate.__name__)
+    model = _MODELS.get(name)
+    if model is None:
+        raise ValueError(f"Unknown text format {name!r}, expected one of {sorted(_MODELS)}")
+    resume, _ = parse_resume_rules(_messages(body)[1])
+    if model is ResumeTemplate:
+        return resume.model_dump_json()
+    data = resume.model_dump()
+    return model.model_validate({
+        field: data[field] if data[field] is not None or not info.is_required() else []
+        for field, info in model.model_fields.items()
+    }).model_dump_json()
+
+
+class FakeLLMServer:
+    """
+    Local HTTP server answering the subset of the Responses API used by
+    `client.responses.parse` and `client.responses.stream` (POST
+    /v1/responses, with or without SSE streaming), for load tests without
+    network access or API key.
+
+    `GET /stats` returns the request counts by status.
+
+    Usage:
+        with FakeLLMServer(FakeLLMSettings(latency=0.2, error_429=0.05)) as server:
+            client = OpenAI(base_url=server.base_url, api_key="fake")
+    """
+
+    def __init__(self, settings: Optional[FakeLLMSettings] = None, host: str = "127.0.0.1",
+                 port: int = 0):
+        self.settings = settings or FakeLLMSettings()
+        self.stats: Dict[str, int] = {"requests": 0, "streamed": 0}
+        self._seen: Dict[str, int] = {}
+        self._prefixes = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._http = ThreadingHTTPServer((host, port), _Handler)
+        self._http.daemon_threads = True
+        self._http.fake = self
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        """Serves in a background thread."""
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._http.serve_forever()
+
+    def stop(self) -> None:
+        self._http.shutdown()
+        self._http.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def draw(self, raw_body: bytes) -> random.Random:
+        """Returns the random generator of a request, see FakeLLMSettings."""
+        digest = hashlib.sha256(raw_body).hexdigest()
+        with self._lock:
+            occurrence = self._seen.get(digest, 0)
+            self._seen[digest] = occurrence + 1
+        return random.Random(f"{self.settings.seed}:{digest}:{occurrence}")
+
+    def usage(self, body: dict, output_text: str) -> dict:
+        """
+        Estimates the token usage of a request, with the system prompt cached
+        from its second occurrence on, like the API's prompt caching.
+        """
+        system, user = _messages(body)
+        schema = json.dumps(((body.get("text") or {}).get("format") or {}).get("schema", {}))
+        system_tokens = estimate_tokens(system, schema)
+        input_tokens = system_tokens + estimate_tokens(user)
+        with self._lock:
+            cached = system in self._prefixes
+            self._prefixes.add(system)
+        cached_tokens = 0
+        if cached and system_tokens >= CACHE_MIN_TOKENS:
+            cached_tokens = system_tokens // CACHE_INCREMENT * CACHE_INCREMENT
+        output_tokens = estimate_tokens(output_text)
+        return {"input_tokens": input_tokens,
+                "input_tokens_details": {"cached_tokens": cached_tokens},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens}
+
+
+def _response(response_id: str, body: dict, text: Optional[str], usage: Optional[dict]) -> dict:
+    """Response object, in progress (empty output) when `text` is None."""
+    output = []
+    if text is not None:
+        output.append({"id": f"msg_{response_id}", "type": "message", "role": "assistant",
+                       "status": "completed",
+                       "content": [{"type": "output_text", "text": text, "annotations": [],
+                                    "logprobs": []}]})
+    return {
+        "id": f"resp_{response_id}", "object": "response", "created_at": time.time(),
+        "model": body.get("model", MODEL), "status": "completed" if text is not None else "in_progress",
+        "output": output, "usage": usage, "error": None, "incomplete_details": None,
+        "instructions": body.get("instructions"), "metadata": {}, "parallel_tool_calls": True,
+        "temperature": body.get("temperature"), "text": body.get("text"), "tool_choice": "auto",
+        "tools": [],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.fake.count(str(status))
+
+    def _send_error(self, status: int, error_type: str, message: str,
+                    headers: Optional[dict] = None) -> None:
+        self._send_json(status, {"error": {"message": message, "type": error_type, "param": None,
+                                           "code": None}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.fake._lock:
+                stats = dict(self.server.fake.stats)
+            self._send_json(200, stats)
+        else:
+            self._send_error(404, "invalid_request_error", f"Unknown path {self.path}")
+
+    def do_POST(self):
+        fake = self.server.fake
+        settings = fake.settings
+        raw_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        fake.count("requests")
+        if self.path.rstrip("/") not in ("/v1/responses", "/responses"):
+            self._send_error(404, "invalid_request_error", f"Unknown path {self.path}")
+            return
+        try:
+            body = json.loads(raw_body)
+        except ValueError:
+            self._send_error(400, "invalid_request_error", "Invalid JSON body")
+            return
+
+        rng = fake.draw(raw_body)
+        time.sleep(settings.latency * math.exp(rng.gauss(0.0, settings.latency_sigma)))
+        failure = rng.random()
+        retry_after = {"Retry-After": f"{settings.retry_after:g}"}
+        if failure < settings.error_429:
+            self._send_error(429, "rate_limit_error", "Injected rate limit", retry_after)
+            return
+        failure -= settings.error_429
+        if failure < settings.error_500:
+            self._send_error(500, "server_error", "Injected server error")
+            return
+        failure -= settings.error_500
+        if failure < settings.error_503:
+            self._send_error(503, "server_error", "Injected overload", retry_after)
+            return
+
+        try:
+            text = answer(body)
+        except ValueError as e:
+            self._send_error(400, "invalid_request_error", str(e))
+            return
+        usage = fake.usage(body, text)
+        response_id = hashlib.sha256(raw_body).hexdigest()[:24]
+        if body.get("stream"):
+            fake.count("streamed")
+            self._stream(response_id, body, text, usage)
+            return
+        if settings.tokens_per_second:
+            time.sleep(usage["output_tokens"] / settings.tokens_per_second)
+        self._send_json(200, _response(response_id, body, text, usage))
+
+    def _stream(self, response_id: str, body: dict, text: str, usage: dict) -> None:
+        """Sends the response as the server-sent events of a streamed response."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        tokens_per_second = self.server.fake.settings.tokens_per_second
+        item_id = f"msg_{response_id}"
+        final = _response(response_id, body, text, usage)
+        message, part = final["output"][0], final["output"][0]["content"][0]
+        events = [
+            {"type": "response.created", "response": _response(response_id, body, None, None)},
+            {"type": "response.output_item.added", "output_index": 0,
+             "item": dict(message, status="in_progress", content=[])},
+            {"type": "response.content_part.added", "item_id": item_id, "output_index": 0,
+             "content_index": 0, "part": dict(part, text="")},
+        ]
+        events += [{"type": "response.output_text.delta", "item_id": item_id, "output_index": 0,
+                    "content_index": 0, "delta": text[i:i + DELTA_CHARACTERS], "logprobs": []}
+                   for i in range(0, len(text), DELTA_CHARACTERS)]
+        events += [
+            {"type": "response.output_text.done", "item_id": item_id, "output_index": 0,
+             "content_index": 0, "text": text, "logprobs": []},
+            {"type": "response.content_part.done", "item_id": item_id, "output_index": 0,
+             "content_index": 0, "part": part},
+            {"type": "response.output_item.done", "output_index": 0, "item": message},
+            {"type": "response.completed", "response": final},
+        ]
+        for sequence_number, event in enumerate(events):
+            if tokens_per_second and event["type"] == "response.output_text.delta":
+                time.sleep(estimate_tokens(event["delta"]) / tokens_per_second)
+            event["sequence_number"] = sequence_number
+            data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.server.fake.count("200")
+
+
+def _settings(args) -> FakeLLMSettings:
+    return FakeLLMSettings(latency=args.latency, latency_sigma=args.latency_sigma,
+                           tokens_per_second=args.tokens_per_second, error_429=args.error_429,
+                           error_500=args.error_500, error_503=args.error_503,
+                           retry_after=args.retry_after, seed=args.seed)
+
+
+def synthetic_inputs(count: int, experiences: int = 4, seed: int = 0):
+    """
+    Yields (key, text) pairs of `count` distinct synthetic resumes.
+    """
+    from app.utlis.benchmark_extraction import BASE_RESUME, render_text, synthetic_resume
+
+    with open(BASE_RESUME, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    rng = random.Random(seed)
+    for i in range(count):
+        yield f"resume-{i:06d}", render_text(synthetic_resume(rng, base, experiences))
+
+
+def _load_sync(args, items, metrics) -> Tuple[int, int]:
+    from app.utlis.extract_resume_part import get_openai_client, parse_resume
+    from app.utlis.section_parse import parse_resume_sections
+
+    client = get_openai_client()
+    if args.pipeline == "sections":
+        def parse(key, text):
+            return parse_resume_sections(text, client, prompt_mode=args.prompt_mode, metrics=metrics)
+    else:
+        def parse(key, text):
+            return parse_resume(text, client, prompt_mode=args.prompt_mode, metrics=metrics)
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(parse, key, text): key for key, text in items}
+        for future in as_completed(futures):
+            done += 1
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{futures[future]}: {type(e).__name__}: {e}", file=sys.stderr)
+    return done, failed
+
+
+def _load_async(args, items, metrics) -> Tuple[int, int]:
+    import asyncio
+
+    from app.utlis.async_parse import AsyncResumeParser
+
+    async def run():
+        engine = AsyncResumeParser(rpm=args.rpm, tpm=args.tpm, concurrency=args.concurrency,
+                                   max_concurrency=args.max_concurrency,
+                                   prompt_mode=args.prompt_mode, metrics=metrics)
+        done = failed = 0
+        async for result in engine.parse_many(items):
+            done += 1
+            if result.error is not None:
+                failed += 1
+                print(f"{result.key}: {result.error}", file=sys.stderr)
+        return done, failed
+
+    return asyncio.run(run())
+
+
+def load_test(args) -> None:
+    """
+    Parses synthetic resumes with the full pipeline, pointed at a fake
+    server started here (or at `--base-url`), and prints the throughput, the
+    call metrics and the server statistics.
+    """
+    from urllib.request import urlopen
+
+    from app.utlis import client_pool
+    from app.utlis.metrics import MetricsRecorder
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = FakeLLMServer(_settings(args), port=args.port).start()
+        base_url = server.base_url
+    # Read by the OpenAI clients of the pool, which are rebuilt by configure().
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "fake-key"
+    client_pool.configure(max_connections=max(args.concurrency, args.max_concurrency),
+                          max_keepalive_connections=max(args.concurrency, args.max_concurrency))
+
+    metrics = MetricsRecorder(args.metrics_jsonl)
+    items = list(synthetic_inputs(args.resumes, args.experiences, args.seed))
+    start = time.perf_counter()
+    try:
+        if args.pipeline == "async":
+            done, failed = _load_async(args, items, metrics)
+        else:
+            done, failed = _load_sync(args, items, metrics)
+        elapsed = time.perf_counter() - start
+        with urlopen(base_url.rsplit("/v1", 1)[0] + "/stats") as response:
+            stats = json.load(response)
+    finally:
+        if server is not None:
+            server.stop()
+
+    summary = metrics.summary()
+    print(f"{done} resumes in {elapsed:.2f}s ({done / elapsed:.1f}/s), {failed} failed")
+    print(f"Calls: {summary['calls_total']}, retries: {summary['retries_total']}, "
+          f"latency p50/p95/p99: {summary['latency_seconds_p50'] or 0:.2f}s/"
+          f"{summary['latency_seconds_p95'] or 0:.2f}s/{summary['latency_seconds_p99'] or 0:.2f}s")
+    print(f"Input tokens: {summary['input_tokens_total']} ({summary['cached_tokens_total']} cached), "
+          f"output tokens: {summary['output_tokens_total']}, cost: ${summary['cost_usd']:.4f}")
+    print("Server: " + ", ".join(f"{name} {count}" for name, count in sorted(stats.items())))
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+    metrics.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Responses API server for offline load tests.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def server_options(command):
+        command.add_argument("--port", type=int, default=0, help="Port (default: any free port).")
+        command.add_argument("--latency", type=float, default=0.5,
+                             help="Median seconds before the first byte.")
+        command.add_argument("--latency-sigma", type=float, default=0.5,
+                             help="Sigma of the log-normal latency distribution.")
+        command.add_argument("--tokens-per-second", type=float, default=0.0,
+                             help="Output generation speed (0: instant).")
+        command.add_argument("--error-429", type=float, default=0.0, help="Rate of 429 errors.")
+        command.add_argument("--error-500", type=float, default=0.0, help="Rate of 500 errors.")
+        command.add_argument("--error-503", type=float, default=0.0, help="Rate of 503 errors.")
+        command.add_argument("--retry-after", type=float, default=1.0,
+                             help="Retry-After seconds of 429 and 503 errors.")
+        command.add_argument("--seed", type=int, default=0, help="Seed of all the random draws.")
+
+    serve = sub.add_parser("serve", help="Run the fake server in the foreground.")
+    server_options(serve)
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+
+    load = sub.add_parser("loadtest", help="Drive the parse pipeline against a fake server.")
+    server_options(load)
+    load.add_argument("--base-url", help="Use this running fake server instead of starting one.")
+    load.add_argument("--pipeline", choices=("async", "sync", "sections"), default="async",
+                      help="Parse path: AsyncResumeParser, parse_resume or parse_resume_sections.")
+    load.add_argument("--resumes", type=int, default=200, help="Number of synthetic resumes.")
+    load.add_argument("--experiences", type=int, default=4, help="Work experiences per resume.")
+    load.add_argument("--concurrency", type=int, default=8, help="Requests in flight (initial).")
+    load.add_argument("--max-concurrency", type=int, default=64, help="Maximum requests in flight.")
+    load.add_argument("--rpm", type=float, default=None, help="Requests per minute allowed.")
+    load.add_argument("--tpm", type=float, default=None, help="Tokens per minute allowed.")
+    load.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                      help="Schema embedded in the prompt: pretty-printed, minified or none.")
+    load.add_argument("--metrics-jsonl", help="Append the metrics of every API call to this file.")
+    load.add_argument("--prometheus", help="Write the metrics in Prometheus text format here.")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = FakeLLMServer(_settings(args), host=args.host, port=args.port)
+        print(f"Fake Responses API listening on {server.base_url}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        load_test(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.utlis.rule_parser import find_dates, strip_accents
+
+VERSION = 2
+
+# Column -> dtype of the feature table. `experience_months` is counted up to
+# the `as_of` month index of the row, and `ongoing` is 1 when a role was still
+# running then. `live` is 0 for rows superseded by a later row of the same key.
+COLUMNS = {
+    "experience_months": np.dtype("<u2"),
+    "as_of": np.dtype("<u2"),
+    "ongoing": np.dtype("u1"),
+    "roles": np.dtype("u1"),
+    "graduation_year": np.dtype("<u2"),
+    "degree_level": np.dtype("u1"),
+    "languages": np.dtype("<u8"),
+    "skills": np.dtype("<u2"),
+    "live": np.dtype("u1"),
+}
+
+# Serial number in its ResumeStore of the record each row was computed from,
+# -1 for rows not appended by `FeatureTable.sync`.
+SERIAL_DTYPE = np.dtype("<i8")
+
+DEGREE_LEVELS = ("unknown", "secondary", "associate", "bachelor", "master", "doctorate")
+
+# What may follow the bare abbreviations "ma", "ms", "ba", "bs": without it
+# they are other words ("MS Office", "BA" of an airline...).
+_DEGREE_CONTEXT = r"(?=\s*(?:$|[(,:-]|in\b|of\b|en\b|degree\b|hons\b))"
+# Series of the French baccalaureate ("Bac S", "Bac pro").
+_BAC_CONTEXT = (r"(?=\s*(?:$|[(,:-]|s|es|l|sti2d|stmg|stl|st2s|pro|professionnel|scientifique|"
+                r"general|technologique|litteraire|economique|mention)\b)")
+
+# Checked from the highest level down, on lowercased text without accents.
+_DEGREE_PATTERNS = (
+    (5, re.compile(r"\b(?:ph\.?\s?d|doctora[lt]e?|doctorat|dphil)\b")),
+    (4, re.compile(r"\b(?:master|masters|mastere|msc|m\.sc|mba|meng|m\.eng|m\.a|m\.s|mres|"
+                   r"ingenieur|engineering degree|dea|dess|bac\s*\+\s*5)\b"
+                   r"|\b(?:ma|ms)\b" + _DEGREE_CONTEXT)),
+    (3, re.compile(r"\b(?:bachelor|bachelors|licence|bsc|b\.sc|b\.a|b\.s|beng|b\.eng|"
+                   r"bac\s*\+\s*3)\b|\b(?:ba|bs)\b" + _DEGREE_CONTEXT)),
+    (2, re.compile(r"\b(?:associate|bts|dut|deug|hnd|bac\s*\+\s*2)\b")),
+    (1, re.compile(r"\b(?:high school|secondary|baccalaureat|a levels?|ged|lycee)\b"
+                   r"|\bbac\b" + _BAC_CONTEXT)),
+)
+
+# Language names (English and French, without accents) -> canonical name.
+LANGUAGE_ALIASES = {
+    "anglais": "english", "francais": "french", "espagnol": "spanish", "castellano": "spanish",
+    "allemand": "german", "deutsch": "german", "italien": "italian", "portugais": "portuguese",
+    "arabe": "arabic", "chinois": "chinese", "mandarin": "chinese", "japonais": "japanese",
+    "russe": "russian", "neerlandais": "dutch", "coreen": "korean", "turc": "turkish",
+    "polonais": "polish", "suedois": "swedish", "grec": "greek", "hebreu": "hebrew",
+}
+MAX_LANGUAGES = 63
+OTHER_LANGUAGE_BIT = 63  # Set for languages past the first MAX_LANGUAGES seen.
+
+_ISO_DATE = re.compile(r"^\s*((?:19|20)\d{2})(?:[-/.](\d{1,2}))?\b")
+_WORD = re.compile(r"[a-z]+")
+
+
+def month_index(value: Optional[str], as_of: int) -> Optional[int]:
+    """
+    Converts a resume date to a month count (year * 12 + month - 1).
+
+    Accepts YYYY-MM and YYYY, and the free-form dates understood by the rule
+    parser ("Jan 2020", "03/2021", "Present", ...). Year-only dates count
+    from January; ongoing dates are `as_of`.
+
+    Returns:
+        Optional[int]: The month index, or None if no date was found.
+    """
+    if not value:
+        return None
+    match = _ISO_DATE.match(value)
+    if match:
+        month = int(match.group(2) or 1)
+        return int(match.group(1)) * 12 + min(max(month, 1), 12) - 1
+    dates = find_dates(value)
+    if not dates:
+        return None
+    if dates[0] == "Present":
+        return as_of
+    year, _, month = dates[0].partition("-")
+    return int(year) * 12 + int(month or 1) - 1
+
+
+def _month(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def is_ongoing(role: dict) -> bool:
+    """Tells whether a dated role has no end date or ends "Present"."""
+    if month_index(role.get("start_date"), 0) is None:
+        return False
+    end = role.get("end_date")
+    # "Present" resolves to the as_of month, -1 here.
+    return not end or month_index(end, -1) == -1
+
+
+def experience_months(work_experience: Sequence[dict], as_of: int) -> int:
+    """
+    Counts the months covered by the work experiences, end months included,
+    overlapping roles counted once. Roles without an end date are ongoing.
+    """
+    intervals = []
+    for role in work_experience:
+        start = month_index(role.get("start_date"), as_of)
+        if start is None:
+            continue
+        end = month_index(role.get("end_date"), as_of) if role.get("end_date") else as_of
+        if end is not None and end >= start:
+            intervals.append((start, end + 1))
+    months = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        months += current_end - current_start
+    return months
+
+
+def degree_level(degree: str) -> int:
+    """Returns the index in DEGREE_LEVELS of a degree name."""
+    text = strip_accents(degree).lower()
+    for level, pattern in _DEGREE_PATTERNS:
+        if pattern.search(text):
+            return level
+    return 0
+
+
+def canonical_language(name: str) -> Optional[str]:
+    """
+    Normalizes a language name ("Anglais (courant)" -> "english").
+    """
+    words = _WORD.findall(strip_accents(name).lower())
+    if not words:
+        return None
+    return LANGUAGE_ALIASES.get(words[0], words[0])
+
+
+class FeatureTable:
+    """
+    Columnar table of features derived from parsed resumes, one row per
+    resume, for vectorized candidate filtering.
+
+    Each column of COLUMNS is a raw little-endian array `<column>.bin`,
+    memory-mapped on read, so that appends only write the new rows. The row
+    keys are in keys.txt and the store serials of the rows in serials.bin.
+    meta.json holds the row count, the name of the current `live` column file
+    and the language bit of each canonical language name. It is replaced
+    last: appended rows beyond its row count, and a new `live` file it does
+    not name yet, are ignored, so an interrupted append leaves the table as
+    it was.
+
+    Rows appended at different dates count ongoing roles up to their own
+    `as_of` month; `months` brings them to a common date.
+
+    Appending a key again supersedes its previous row.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+            if self.meta.get("version") != VERSION:
+                raise ValueError(f"Feature table {directory} has version {self.meta.get('version')}, "
+                                 f"expected {VERSION}: rebuild it")
+        else:
+            self.meta = {"version": VERSION, "rows": 0, "languages": []}
+        self.keys: List[str] = []
+        keys_path = os.path.join(directory, "keys.txt")
+        if os.path.exists(keys_path):
+            with open(keys_path, "r", encoding="utf-8") as f:
+                self.keys = [line.rstrip("\n") for _, line in zip(range(self.meta["rows"]), f)]
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def _column_path(self, name: str) -> str:
+        if name == "live":
+            # Rewritten on every append, under a new name committed by meta.json.
+            return os.path.join(self.directory, self.meta.get("live", "live.bin"))
+        return os.path.join(self.directory, f"{name}.bin")
+
+    @property
+    def serials(self) -> np.ndarray:
+        """Store serial of every row, see SERIAL_DTYPE."""
+        rows = self.meta["rows"]
+        path = os.path.join(self.directory, "serials.bin")
+        serials = (np.fromfile(path, dtype=SERIAL_DTYPE, count=rows) if os.path.exists(path)
+                   else np.zeros(0, dtype=SERIAL_DTYPE))
+        # Tables built before the serials were kept.
+        return np.concatenate([serials, np.full(rows - len(serials), -1, dtype=SERIAL_DTYPE)])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Returns a column over all the rows, superseded ones included."""
+        column = self._columns.get(name)
+        if column is None:
+            rows = self.meta["rows"]
+            if rows:
+                column = np.memmap(self._column_path(name), dtype=COLUMNS[name], mode="r",
+                                   shape=(rows,))
+            else:
+                column = np.empty(0, dtype=COLUMNS[name])
+            self._columns[name] = column
+        return column
+
+    def language_bit(self, name: str, create: bool = False) -> Optional[int]:
+        """
+        Returns the bit of a language in the `languages` column, assigning the
+        next free one if `create`.
+        """
+        language = canonical_language(name)
+        if language is None:
+            return None
+        languages = self.meta["languages"]
+        if language in languages:
+            return languages.index(language)
+        if not create:
+            return None
+        if len(languages) >= MAX_LANGUAGES:
+            return OTHER_LANGUAGE_BIT
+        languages.append(language)
+        return len(languages) - 1
+
+    def features(self, resume, as_of: int) -> Tuple[int, ...]:
+        """
+        Computes the feature row of a resume, in the order of COLUMNS.
+
+        Args:
+            resume: ResumeTemplate or its dict (e.g. a trusted ResumeStore
+                record).
+            as_of (int): Month index of ongoing roles.
+        """
+        if not isinstance(resume, dict):
+            resume = resume.model_dump()
+        work = resume.get("work_experience") or []
+        education = resume.get("education") or []
+        skills_section = resume.get("skills_section") or {}
+
+        languages = 0
+        names = [entry.get("language", "") for entry in resume.get("language_proficiency") or []]
+        for name in names + list(skills_section.get("languages") or []):
+            bit = self.language_bit(name, create=True)
+            if bit is not None:
+                languages |= 1 << bit
+
+        skills = set()
+        for values in (skills_section.get("core_skills"), skills_section.get("tools_and_technologies"),
+                       *(role.get("used_skills_and_tools") for role in work)):
+            skills.update(skill.strip().lower() for skill in values or [])
+
+        years = [entry["graduation_year"] for entry in education
+                 if entry.get("graduation_year") and 0 < entry["graduation_year"] < 65536]
+        return (
+            min(experience_months(work, as_of), 65535),
+            as_of,
+            int(any(is_ongoing(role) for role in work)),
+            min(len(work), 255),
+            max(years, default=0),
+            max((degree_level(entry.get("degree", "")) for entry in education), default=0),
+            languages,
+            min(len(skills), 65535),
+            1,
+        )
+
+    def append(self, items: Iterable[Tuple[str, object]], as_of: Optional[date] = None,
+               serials: Optional[Dict[str, int]] = None) -> int:
+        """
+        Computes and appends the feature rows of (key, resume) pairs.
+
+        Args:
+            as_of (date, optional): Date of the ongoing roles (default: today).
+            serials (Dict[str, int], optional): ResumeStore serial of the
+                record of each key.
+
+        Returns:
+            int: Number of rows appended.
+        """
+        month = _month(as_of or date.today())
+        keys, rows = [], []
+        for key, resume in items:
+            keys.append(key)
+            rows.append(self.features(resume, month))
+        if not rows:
+            return 0
+        values = list(zip(*rows))
+        return self.append_columns(keys, {name: np.asarray(column, dtype=dtype)
+                                          for (name, dtype), column in zip(COLUMNS.items(), values)},
+                                   [serials.get(key, -1) for key in keys] if serials else None)
+
+    def append_columns(self, keys: Sequence[str], columns: Dict[str, np.ndarray],
+                       serials: Optional[Sequence[int]] = None) -> int:
+        """
+        Appends precomputed feature rows, one array per column of COLUMNS.
+
+        Args:
+            serials (Sequence[int], optional): Store serial of each row
+                (default: -1).
+
+        Returns:
+            int: Number of rows appended.
+        """
+        rows = self.meta["rows"]
+        serials = np.full(len(keys), -1, dtype=SERIAL_DTYPE) if serials is None else serials
+        appended = {name: np.ascontiguousarray(columns[name], dtype=dtype)
+                    for name, dtype in COLUMNS.items()}
+        appended["serials"] = np.ascontiguousarray(serials, dtype=SERIAL_DTYPE)
+        for name, column in appended.items():
+            if len(column) != len(keys):
+                raise ValueError(f"Column {name} has {len(column)} rows, expected {len(keys)}")
+
+        # Everything is staged before meta.json names it: appended rows past
+        # the committed row count, and a new live file.
+        live = np.concatenate([self["live"], appended.pop("live")])
+        live[[self._rows[key] for key in keys if key in self._rows]] = 0
+        for name, column in appended.items():
+            with open(os.path.join(self.directory, f"{name}.bin"), "ab") as f:
+                f.truncate(rows * column.dtype.itemsize)  # Drops an interrupted append.
+                f.write(column.tobytes())
+        with open(os.path.join(self.directory, "keys.txt"), "a", encoding="utf-8") as f:
+            f.truncate(sum(len(key.encode("utf-8")) + 1 for key in self.keys))
+            f.writelines(f"{key}\n" for key in keys)
+        old_live = self._column_path("live")
+        live_name = f"live-{rows + len(keys)}.bin"
+        live.tofile(os.path.join(self.directory, live_name))
+
+        self.meta["rows"] = rows + len(keys)
+        self.meta["live"] = live_name
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+        for row, key in enumerate(keys, rows):
+            self._rows[key] = row
+        self.keys.extend(keys)
+        self._columns.clear()
+        try:
+            os.remove(old_live)
+        except OSError:
+            pass  # Missing (empty table) or still mapped (Windows).
+        return len(keys)
+
+    def sync(self, store, as_of: Optional[date] = None) -> int:
+        """
+        Appends the rows of the resumes of a ResumeStore that are not in the
+        table yet, or whose record was replaced since their row was computed.
+
+        Returns:
+            int: Number of rows appended.
+        """
+        serials = store.serials()
+        known = self.serials
+        stale = [key for key in store.keys()
+                 if key not in self._rows or known[self._rows[key]] != serials[key]]
+        if len(stale) > len(store) // 10:
+            wanted = set(stale)
+            records = (item for item in store.items(trusted=True) if item[0] in wanted)
+        else:
+            records = ((key, store.get(key, trusted=True)) for key in stale)
+        return self.append(records, as_of, serials)
+
+    def months(self, as_of: Optional[date] = None) -> np.ndarray:
+        """
+        Returns the months of experience of every row counted up to `as_of`
+        (default: today): rows with an ongoing role gain the months elapsed
+        since their own as_of. Roles dated after the as_of of their row are
+        not re-examined.
+        """
+        elapsed = np.maximum(_month(as_of or date.today()) - self["as_of"].astype(np.int32), 0)
+        return self["experience_months"].astype(np.int32) + self["ongoing"] * elapsed
+
+    def mask(self, min_months: Optional[int] = None, max_months: Optional[int] = None,
+             min_roles: Optional[int] = None, min_degree: Union[int, str, None] = None,
+             min_graduation_year: Optional[int] = None, max_graduation_year: Optional[int] = None,
+             languages: Sequence[str] = (), any_language: Sequence[str] = (),
+             min_skills: Optional[int] = None, as_of: Optional[date] = None) -> np.ndarray:
+        """
+        Computes the boolean mask of the live rows matching every given
+        condition.
+
+        Args:
+            min_months, max_months (int, optional): Bounds of the total months
+                of experience, see `months`.
+            min_roles (int, optional): Minimum number of roles.
+            min_degree (int or str, optional): Minimum degree level, as an
+                index or a name of DEGREE_LEVELS.
+            min_graduation_year, max_graduation_year (int, optional): Bounds
+                of the latest graduation year (resumes without one never match).
+            languages (Sequence[str]): Languages all required.
+            any_language (Sequence[str]): Languages of which one is required.
+            min_skills (int, optional): Minimum number of distinct skills.
+            as_of (date, optional): Date the experience is counted to
+                (default: today).
+
+        Returns:
+            np.ndarray: Boolean mask over all the rows.
+        """
+        mask = self["live"].astype(bool)
+        if min_months is not None or max_months is not None:
+            months = self.months(as_of)
+            if min_months is not None:
+                mask &= months >= min_months
+            if max_months is not None:
+                mask &= months <= max_months
+        if min_roles is not None:
+            mask &= self["roles"] >= min_roles
+        if min_degree is not None:
+            level = DEGREE_LEVELS.index(min_degree) if isinstance(min_degree, str) else min_degree
+            mask &= self["degree_level"] >= level
+        if min_graduation_year is not None:
+            mask &= self["graduation_year"] >= min_graduation_year
+        if max_graduation_year is not None:
+            mask &= (self["graduation_year"] <= max_graduation_year) & (self["graduation_year"] > 0)
+        if min_skills is not None:
+            mask &= self["skills"] >= min_skills
+        for names, require_all in ((languages, True), (any_language, False)):
+            if not names:
+                continue
+            bits = [self.language_bit(name) for name in names]
+            if require_all and None in bits:
+                return np.zeros_like(mask)
+            wanted = np.uint64(sum(1 << bit for bit in set(bits) if bit is not None))
+            matched = self["languages"] & wanted
+            mask &= matched == wanted if require_all else matched != 0
+        return mask
+
+    def filter(self, **conditions) -> List[str]:
+        """Returns the keys of the rows matching `mask(**conditions)`."""
+        return [self.keys[row] for row in np.flatnonzero(self.mask(**conditions))]
+
+
+def _conditions(args) -> dict:
+    return {
+        "min_months": args.min_years * 12 if args.min_years is not None else None,
+        "max_months": args.max_years * 12 if args.max_years is not None else None,
+        "min_degree": args.min_degree, "min_graduation_year": args.graduated_after,
+        "max_graduation_year": args.graduated_before, "languages": args.language,
+        "min_skills": args.min_skills,
+    }
+
+
+def _bench(args) -> None:
+    rng = np.random.default_rng(0)
+    n = args.rows
+    today = _month(date.today())
+    columns = {
+        "experience_months": rng.integers(0, 480, n),
+        "as_of": rng.integers(today - 24, today + 1, n),
+        "ongoing": rng.integers(0, 2, n),
+        "roles": rng.integers(0, 12, n),
+        "graduation_year": np.where(rng.random(n) < 0.9, rng.integers(1975, 2026, n), 0),
+        "degree_level": rng.integers(0, len(DEGREE_LEVELS), n),
+        "languages": rng.integers(0, 1 << 8, n),
+        "skills": rng.integers(0, 80, n),
+        "live": np.ones(n),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        table = FeatureTable(directory)
+        table.meta["languages"] = ["english", "french", "spanish", "german", "italian",
+                                   "portuguese", "arabic", "chinese"]
+        start = time.perf_counter()
+        table.append_columns([f"resume-{i:07d}" for i in range(n)], columns)
+        print(f"Appended {n} rows in {time.perf_counter() - start:.2f}s")
+        table = FeatureTable(directory)
+        queries = {
+            "5+ years, master": dict(min_months=60, min_degree="master"),
+            "english and french": dict(languages=["english", "french"]),
+            "graduated 2015-2020, 20+ skills": dict(min_graduation_year=2015,
+                                                   max_graduation_year=2020, min_skills=20),
+            "all conditions": dict(min_months=36, max_months=120, min_roles=2, min_degree=3,
+                                   languages=["english"], min_skills=10),
+        }
+        for name, conditions in queries.items():
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                count = int(np.count_nonzero(table.mask(**conditions)))
+                timings.append(time.perf_counter() - start)
+            print(f"{name:>32}: {count} rows, {np.median(timings) * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar table of derived resume features.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Add the resumes of a store missing from the table.")
+    build.add_argument("store", help="ResumeStore data file.")
+    build.add_argument("table", help="Feature table directory.")
+    query = sub.add_parser("filter", help="Print the keys of the matching resumes.")
+    query.add_argument("table", help="Feature table directory.")
+    query.add_argument("--min-years", type=float, help="Minimum years of experience.")
+    query.add_argument("--max-years", type=float, help="Maximum years of experience.")
+    query.add_argument("--min-degree", choices=DEGREE_LEVELS, help="Minimum degree level.")
+    query.add_argument("--graduated-after", type=int, help="Minimum graduation year.")
+    query.add_argument("--graduated-before", type=int, help="Maximum graduation year.")
+    query.add_argument("--language", action="append", default=[], help="Required language.")
+    query.add_argument("--min-skills", type=int, help="Minimum number of distinct skills.")
+    query.add_argument("--limit", type=int, default=20, help="Number of keys printed.")
+    bench = sub.add_parser("bench", help="Time the filters over synthetic rows.")
+    bench.add_argument("--rows", type=int, default=1_000_000, help="Number of rows.")
+    bench.add_argument("--repeat", type=int, default=20, help="Runs per query.")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        _bench(args)
+    elif args.command == "build":
+        from app.utlis.resume_store import ResumeStore
+
+        table = FeatureTable(args.table)
+        start = time.perf_counter()
+        added = table.sync(ResumeStore(args.store))
+        print(f"Added {added} rows in {time.perf_counter() - start:.2f}s, {len(table)} resumes")
+    else:
+        table = FeatureTable(args.table)
+        start = time.perf_counter()
+        keys = table.filter(**_conditions(args))
+        elapsed = time.perf_counter() - start
+        for key in keys[:args.limit]:
+            print(key)
+        print(f"{len(keys)} of {len(table)} resumes match ({elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.utlis.rule_parser import strip_accents
+from app.utlis.skill_index import SKILL_ALIASES, resume_skills
+
+VERSION = 1
+
+# Field -> weight of its BM25 score in the total.
+FIELD_WEIGHTS = {"skills": 2.0, "achievements": 1.0, "summary": 0.5}
+
+K1 = 1.2
+B = 0.75
+# Saturation of repeated job description terms.
+K3 = 1.5
+
+STOPWORDS = frozenset("""
+a an and are as at be been by for from has have in into is it its of on or our that the their
+this to was we were will with you your who what which while within etc including strong good
+experience years year work working team ability skills knowledge plus
+le la les un une des du de d l et ou en au aux pour par sur avec dans est sont nous vous votre
+vos notre nos que qui ce cette ces son sa ses leur leurs pas plus ans annee annees experience
+competences connaissance connaissances equipe travail poste
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lowercase terms without accents, keeping "c++", "c#"
+    and ".net"-like tokens, dropping stopwords and resolving skill aliases.
+    """
+    tokens = []
+    for token in _TOKEN.findall(strip_accents(text).lower()):
+        token = token.rstrip(".")
+        if not token or token in STOPWORDS:
+            continue
+        alias = SKILL_ALIASES.get(token)
+        tokens.extend(alias.split() if alias else (token,))
+    return tokens
+
+
+def field_texts(resume) -> Dict[str, List[str]]:
+    """
+    Returns the tokens of the matching fields of a resume: the skill terms,
+    the job titles with their achievements, and the introduction with the
+    professional summary.
+
+    Args:
+        resume: ResumeTemplate or its dict.
+    """
+    if not isinstance(resume, dict):
+        resume = resume.model_dump()
+    achievements = []
+    for role in resume.get("work_experience") or []:
+        achievements.append(role.get("job_title") or "")
+        achievements += role.get("achievements") or []
+    return {
+        "skills": [token for term in sorted(resume_skills(resume)) for token in tokenize(term)],
+        "achievements": tokenize("\n".join(achievements)),
+        "summary": tokenize(f"{resume.get('introduction') or ''}\n"
+                            f"{resume.get('professional_summary') or ''}"),
+    }
+
+
+def bm25_matrix(rows: np.ndarray, cols: np.ndarray, tf: np.ndarray, n_docs: int, n_terms: int,
+                k1: float = K1, b: float = B) -> sparse.csc_matrix:
+    """
+    Builds the BM25 weight matrix (documents x terms) of term counts.
+
+    Args:
+        rows, cols, tf (np.ndarray): Document, term and count of each
+            (document, term) pair, each pair once.
+
+    Returns:
+        sparse.csc_matrix: float32 weights, column-major so that the columns
+        of the query terms are sliced without touching the others.
+    """
+    tf = tf.astype(np.float32)
+    lengths = np.bincount(rows, weights=tf, minlength=n_docs).astype(np.float32)
+    average = lengths.mean() if n_docs and lengths.mean() > 0 else 1.0
+    df = np.bincount(cols, minlength=n_terms).astype(np.float32)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norm = k1 * (1 - b + b * lengths[rows] / average)
+    weights = idf[cols] * tf * (k1 + 1) / (tf + norm)
+    return sparse.csc_matrix((weights, (rows, cols)), shape=(n_docs, n_terms), dtype=np.float32)
+
+
+class Match(NamedTuple):
+    """
+    A candidate of `JobMatcher.top_k`: total score, weighted score of each
+    field, and the job terms contributing most to each field.
+    """
+    key: str
+    score: float
+    fields: Dict[str, float]
+    terms: Dict[str, List[Tuple[str, float]]]
+
+
+class JobMatcher:
+    """
+    Scores job descriptions against a corpus of parsed resumes with BM25,
+    one sparse document x term matrix per field of FIELD_WEIGHTS.
+
+    Scoring slices the columns of the job terms out of each CSC matrix and
+    multiplies them by the job term weights, so the cost only depends on
+    the number of postings of those terms. The fields share one vocabulary.
+
+    The matrices are rebuilt from the whole corpus (the IDF depends on it)
+    and saved as .npz files with vocabulary.json, keys.txt and meta.json.
+    """
+
+    def __init__(self, keys: Sequence[str], vocabulary: Dict[str, int],
+                 matrices: Dict[str, sparse.csc_matrix],
+                 weights: Optional[Dict[str, float]] = None):
+        self.keys = list(keys)
+        self.vocabulary = vocabulary
+        self.matrices = matrices
+        self.weights = dict(weights or FIELD_WEIGHTS)
+        self._terms = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, object]], weights: Optional[Dict[str, float]] = None,
+              k1: float = K1, b: float = B) -> "JobMatcher":
+        """
+        Builds the matrices of (key, resume) pairs, resumes being
+        ResumeTemplate instances or dicts.
+        """
+        keys, vocabulary = [], {}
+        pairs = {field: ([], [], []) for field in FIELD_WEIGHTS}
+        for row, (key, resume) in enumerate(items):
+            keys.append(key)
+            for field, tokens in field_texts(resume).items():
+                rows, cols, tf = pairs[field]
+                for token, count in Counter(tokens).items():
+                    rows.append(row)
+                    cols.append(vocabulary.setdefault(token, len(vocabulary)))
+                    tf.append(count)
+        matrices = {
+            field: bm25_matrix(np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32),
+                               np.asarray(tf, dtype=np.float32), len(keys), len(vocabulary), k1, b)
+            for field, (rows, cols, tf) in pairs.items()
+        }
+        return cls(keys, vocabulary, matrices, weights)
+
+    @classmethod
+    def from_store(cls, store, weights: Optional[Dict[str, float]] = None) -> "JobMatcher":
+        """Builds the matrices of every resume of a ResumeStore."""
+        return cls.build(store.items(trusted=True), weights)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for field, matrix in self.matrices.items():
+            sparse.save_npz(os.path.join(directory, f"{field}.npz"), matrix, compressed=False)
+        with open(os.path.join(directory, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocabulary, f, separators=(",", ":"))
+        with open(os.path.join(directory, "keys.txt"), "w", encoding="utf-8") as f:
+            f.writelines(f"{key}\n" for key in self.keys)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "rows": len(self.keys), "weights": self.weights}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "JobMatcher":
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, "vocabulary.json"), "r", encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        with open(os.path.join(directory, "keys.txt"), "r", encoding="utf-8") as f:
+            keys = [line.rstrip("\n") for line in f]
+        matrices = {field: sparse.load_npz(os.path.join(directory, f"{field}.npz")).tocsc()
+                    for field in meta["weights"]}
+        return cls(keys, vocabulary, matrices, meta["weights"])
+
+    def query_terms(self, job_description: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the vocabulary columns of the job description terms and their
+        saturated counts. Terms absent from the corpus are dropped.
+        """
+        counts = Counter(token for token in tokenize(job_description) if token in self.vocabulary)
+        cols = np.fromiter((self.vocabulary[token] for token in counts), dtype=np.int64,
+                           count=len(counts))
+        qtf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return cols, (K3 + 1) * qtf / (K3 + qtf)
+
+    def field_scores(self, job_description: str) -> Tuple[Dict[str, np.ndarray], np.ndarray,
+                                                          Dict[str, sparse.csc_matrix]]:
+        """
+        Scores every resume against a job description, field by field.
+
+        Returns:
+            Tuple: Weighted score vector of each field, the query columns, and
+            the weighted contributions of the query terms (documents x query
+            columns) of each field.
+        """
+        cols, qweights = self.query_terms(job_description)
+        scores, contributions = {}, {}
+        for field, matrix in self.matrices.items():
+            contributions[field] = matrix[:, cols] @ sparse.diags(qweights * self.weights[field],
+                                                                  format="csc")
+            scores[field] = np.asarray(contributions[field].sum(axis=1), dtype=np.float32).ravel()
+        return scores, cols, contributions
+
+    def score(self, job_description: str) -> np.ndarray:
+        """Returns the total score of every resume, in the order of `keys`."""
+        return sum(self.field_scores(job_description)[0].values())
+
+    def top_k(self, job_description: str, k: int = 10, explain: int = 5) -> List[Match]:
+        """
+        Returns the `k` best resumes for a job description, best first,
+        leaving out resumes without any job term.
+
+        Args:
+            explain (int): Number of contributing terms reported per field.
+        """
+        scores, cols, contributions = self.field_scores(job_description)
+        total = sum(scores.values())
+        k = min(k, int(np.count_nonzero(total)))
+        if k <= 0:
+            return []
+        best = np.argpartition(-total, k - 1)[:k]
+        best = best[np.argsort(-total[best], kind="stable")]
+        if self._terms is None:
+            self._terms = {col: term for term, col in self.vocabulary.items()}
+
+        # Contributions of the query terms to the best rows only.
+        best_contributions = {field: matrix[best].toarray() for field, matrix in contributions.items()}
+        matches = []
+        for i, row in enumerate(best):
+            terms = {}
+            for field, values in best_contributions.items():
+                order = np.argsort(-values[i])[:explain]
+                terms[field] = [(self._terms[int(cols[j])], float(values[i, j]))
+                                for j in order if values[i, j] > 0]
+            matches.append(Match(self.keys[row], float(total[row]),
+                                 {field: float(scores[field][row]) for field in scores}, terms))
+        return matches
+
+
+def _bench(args) -> None:
+    rng = np.random.default_rng(0)
+    n, vocabulary_size = args.resumes, args.vocabulary
+    weights = 1.0 / np.arange(1, vocabulary_size + 1) ** 1.05
+    weights /= weights.sum()
+    vocabulary = {f"term{i}": i for i in range(vocabulary_size)}
+
+    start = time.perf_counter()
+    matrices = {}
+    for field, mean_length in (("skills", 25), ("achievements", 120), ("summary", 40)):
+        lengths = rng.poisson(mean_length, n)
+        rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        cols = rng.choice(vocabulary_size, size=len(rows), p=weights)
+        pairs, tf = np.unique(rows * vocabulary_size + cols, return_counts=True)
+        matrices[field] = bm25_matrix(pairs // vocabulary_size, pairs % vocabulary_size, tf, n,
+                                      vocabulary_size)
+    matcher = JobMatcher([f"resume-{i:07d}" for i in range(n)], vocabulary, matrices)
+    nnz = sum(matrix.nnz for matrix in matrices.values())
+    print(f"Built {n} resumes, {nnz} nonzeros in {time.perf_counter() - start:.2f}s")
+
+    for terms in (30, 100):
+        job = " ".join(f"term{i}" for i in rng.choice(vocabulary_size, size=terms, p=weights))
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matcher.top_k(job, k=args.k)
+            timings.append(time.perf_counter() - start)
+        print(f"Top {args.k} for a {terms}-term job description: {np.median(timings) * 1000:.0f} ms "
+              f"(median of {args.repeat})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score resumes against job descriptions with BM25.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the matrices of the resumes of a store.")
+    build.add_argument("store", help="ResumeStore data file.")
+    build.add_argument("output", help="Directory for the matrices.")
+    match = sub.add_parser("match", help="Print the best resumes for a job description.")
+    match.add_argument("matrices", help="Directory of the matrices.")
+    match.add_argument("job", help="Job description text file.")
+    match.add_argument("-k", type=int, default=10, help="Number of resumes.")
+    bench = sub.add_parser("bench", help="Time the scoring over synthetic resumes.")
+    bench.add_argument("--resumes", type=int, default=500_000, help="Number of resumes.")
+    bench.add_argument("--vocabulary", type=int, default=30_000, help="Number of distinct terms.")
+    bench.add_argument("-k", type=int, default=10, help="Number of resumes returned.")
+    bench.add_argument("--repeat", type=int, default=10, help="Runs per query.")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        _bench(args)
+    elif args.command == "build":
+        from app.utlis.resume_store import ResumeStore
+
+        start = time.perf_counter()
+        matcher = JobMatcher.from_store(ResumeStore(args.store))
+        matcher.save(args.output)
+        print(f"Built {len(matcher)} resumes, {len(matcher.vocabulary)} terms "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        matcher = JobMatcher.load(args.matrices)
+        with open(args.job, "r", encoding="utf-8") as f:
+            job_description = f.read()
+        start = time.perf_counter()
+        matches = matcher.top_k(job_description, args.k)
+        elapsed = time.perf_counter() - start
+        for match in matches:
+            fields = ", ".join(f"{field} {score:.2f}" for field, score in match.fields.items())
+            terms = ", ".join(term for field_terms in match.terms.values() for term, _ in field_terms[:3])
+            print(f"{match.score:7.2f}  {match.key}  ({fields}; {terms})")
+        print(f"Scored {len(matcher)} resumes in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# USD per million tokens, used for the cost estimates.
+PRICES_PER_MILLION = {
+    "gpt-4.1": {"input": 2.00, "cached": 0.50, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached": 0.10, "output": 1.60},
+}
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+PREFIX = "resume_parse"
+
+# Call being tracked in the current thread or task, updated by the HTTP hooks.
+_current_call: ContextVar[Optional["CallRecord"]] = ContextVar("current_llm_call", default=None)
+
+
+class Histogram:
+    """
+    Cumulative histogram with Prometheus semantics (`le` buckets, sum, count).
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile by linear interpolation inside its bucket, like
+        Prometheus' histogram_quantile.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def prometheus_lines(self, name: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum:g}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class CallRecord:
+    """
+    Measurements of one resume parse, filled in while the call runs.
+
+    `queued_at` is when the resume entered the parse path, `start()` marks
+    its dispatch (after rate limiting), and the HTTP hooks of
+    `event_hooks` record every request sent and the arrival of the response
+    headers.
+    """
+
+    def __init__(self, key: Optional[str], model: str):
+        self.key = key
+        self.model = model
+        self.queued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.sent_at: Optional[float] = None
+        self.headers_at: Optional[float] = None
+        self.requests = 0
+        self.attempts = 1
+        self.usage: Dict[str, Optional[int]] = {}
+        self.validation_failed = False
+        self.error: Optional[str] = None
+
+    def start(self) -> None:
+        """Marks the end of the queueing, on the first call only."""
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def set_usage(self, usage: dict) -> None:
+        """Stores the token counts of a `response_usage` summary."""
+        self.usage = {name: usage.get(name) for name in ("input_tokens", "cached_tokens",
+                                                          "output_tokens")}
+
+
+def _on_request(request) -> None:
+    call = _current_call.get()
+    if call is not None:
+        call.requests += 1
+        call.sent_at = time.perf_counter()
+        call.headers_at = None
+
+
+def _on_response(response) -> None:
+    call = _current_call.get()
+    if call is not None and call.headers_at is None:
+        call.headers_at = time.perf_counter()
+
+
+async def _on_request_async(request) -> None:
+    _on_request(request)
+
+
+async def _on_response_async(response) -> None:
+    _on_response(response)
+
+
+def event_hooks(asynchronous: bool = False) -> dict:
+    """
+    Returns httpx event hooks recording request and response-header times of
+    the tracked calls, for the `http_client` of the OpenAI clients. They do
+    nothing outside of `MetricsRecorder.track`.
+    """
+    if asynchronous:
+        return {"request": [_on_request_async], "response": [_on_response_async]}
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+def call_cost(model: str, usage: dict, prices: Dict[str, dict] = PRICES_PER_MILLION) -> Optional[float]:
+    """
+    Estimates the cost in USD of a call from its token usage.
+    """
+    price = prices.get(model)
+    if price is None or usage.get("input_tokens") is None:
+        return None
+    cached = usage.get("cached_tokens") or 0
+    return (price["input"] * (usage["input_tokens"] - cached) + price["cached"] * cached
+            + price["output"] * (usage.get("output_tokens") or 0)) / 1e6
+
+
+class MetricsRecorder:
+    """
+    Aggregates per-call LLM metrics into histograms and counters, exported in
+    the Prometheus text format, and optionally appends every call to a JSONL
+    file.
+
+    Thread-safe; one recorder is meant to be shared by all the parses of a run.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None,
+                 prices: Dict[str, dict] = PRICES_PER_MILLION):
+        """
+        Args:
+            jsonl_path (str, optional): File receiving one JSON line per call.
+            prices (Dict[str, dict]): USD per million input, cached and output
+                tokens by model.
+        """
+        self.prices = prices
+        self.histograms = {
+            "queue_seconds": Histogram(LATENCY_BUCKETS),
+            "ttfb_seconds": Histogram(LATENCY_BUCKETS),
+            "latency_seconds": Histogram(LATENCY_BUCKETS),
+            "input_tokens": Histogram(TOKEN_BUCKETS),
+            "output_tokens": Histogram(TOKEN_BUCKETS),
+        }
+        self.counters = {name: 0 for name in (
+            "calls_total", "errors_total", "retries_total", "validation_failures_total",
+            "input_tokens_total", "cached_tokens_total", "output_tokens_total")}
+        self.cost_usd = 0.0
+        self._lock = threading.Lock()
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+
+    @contextmanager
+    def track(self, model: str, key: Optional[str] = None) -> Iterator[CallRecord]:
+        """
+        Tracks one resume parse; the call is recorded when the block exits,
+        including when it raises.
+
+        Yields:
+            CallRecord: Record to fill with the usage, attempts and failures.
+        """
+        from pydantic import ValidationError
+
+        call = CallRecord(key, model)
+        token = _current_call.set(call)
+        try:
+            yield call
+        except ValidationError as e:
+            call.validation_failed = True
+            call.error = f"{type(e).__name__}: {e.error_count()} errors"
+            raise
+        except BaseException as e:
+            call.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_call.reset(token)
+            self.record(call, time.perf_counter())
+
+    def record(self, call: CallRecord, finished_at: float) -> dict:
+        """
+        Adds a finished call to the aggregates and the JSONL file.
+
+        Returns:
+            dict: The JSON record of the call.
+        """
+        started_at = call.started_at or call.queued_at
+        entry = {
+            "timestamp": time.time(),
+            "key": call.key,
+            "model": call.model,
+            "queue_seconds": started_at - call.queued_at,
+            "ttfb_seconds": (call.headers_at - call.sent_at
+                             if call.headers_at is not None and call.sent_at is not None else None),
+            "latency_seconds": finished_at - started_at,
+            "input_tokens": call.usage.get("input_tokens"),
+            "cached_tokens": call.usage.get("cached_tokens"),
+            "output_tokens": call.usage.get("output_tokens"),
+            "retries": max(call.requests, call.attempts, 1) - 1,
+            "validation_failed": call.validation_failed,
+            "error": call.error,
+            "cost_usd": call_cost(call.model, call.usage, self.prices),
+        }
+        with self._lock:
+            for name, histogram in self.histograms.items():
+                if entry[name] is not None:
+                    histogram.observe(entry[name])
+            self.counters["calls_total"] += 1
+            self.counters["errors_total"] += entry["error"] is not None
+            self.counters["retries_total"] += entry["retries"]
+            self.counters["validation_failures_total"] += entry["validation_failed"]
+            for name in ("input_tokens", "cached_tokens", "output_tokens"):
+                self.counters[f"{name}_total"] += entry[name] or 0
+            self.cost_usd += entry["cost_usd"] or 0.0
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps(entry) + "\n")
+                self._jsonl.flush()
+        return entry
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the aggregates in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name, value in self.counters.items():
+                lines += [f"# TYPE {PREFIX}_{name} counter", f"{PREFIX}_{name} {value}"]
+            lines += [f"# TYPE {PREFIX}_cost_usd_total counter",
+                      f"{PREFIX}_cost_usd_total {self.cost_usd:.6f}"]
+            for name, histogram in self.histograms.items():
+                lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                lines += histogram.prometheus_lines(f"{PREFIX}_{name}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Writes `to_prometheus` atomically, e.g. for the textfile collector of
+        node_exporter.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def summary(self) -> dict:
+        """
+        Returns the call counts, totals and p50/p95/p99 of the histograms.
+        """
+        with self._lock:
+            summary = dict(self.counters, cost_usd=self.cost_usd)
+            for name, histogram in self.histograms.items():
+                for q in (0.5, 0.95, 0.99):
+                    summary[f"{name}_p{int(q * 100)}"] = histogram.quantile(q)
+        return summary
+
+    def close(self) -> None:
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+def track_call(metrics: Optional[MetricsRecorder], model: str, key: Optional[str] = None):
+    """
+    Returns `metrics.track(model, key)`, or a context yielding a throwaway
+    CallRecord when `metrics` is None, so call sites need no special case.
+    """
+    if metrics is None:
+        return nullcontext(CallRecord(key, model))
+    return metrics.track(model, key)
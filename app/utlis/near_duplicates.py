@@ -0,0 +1,244 @@
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Mersenne prime used by the universal hash family h(x) = (a * x + b) mod p.
+# With x and a below 2**32 the product never overflows uint64.
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """
+    Splits a text into overlapping word n-grams after lowercasing it, so that
+    layout and whitespace changes do not affect the result.
+
+    Args:
+        text (str): Raw resume text.
+        size (int): Number of words per shingle.
+
+    Returns:
+        List[str]: The shingles (a single one for texts shorter than `size`).
+    """
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return [" ".join(tokens)]
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+class MinHashIndex:
+    """
+    MinHash signatures with an LSH band index, used to spot near-duplicate
+    resumes before paying for an LLM parse.
+
+    Signatures of `num_perm` hashes are split into `bands` bands; two texts
+    become candidates when any band matches exactly, and are reported when
+    the fraction of equal hashes (an estimate of the Jaccard similarity of
+    their shingle sets) reaches `threshold`. With the defaults, pairs above
+    ~0.7 similarity are almost always found as candidates.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.9,
+                 shingle_size: int = 3, seed: int = 1):
+        """
+        Args:
+            num_perm (int): Number of hash functions per signature.
+            bands (int): Number of LSH bands, must divide `num_perm`.
+            threshold (float): Minimum estimated similarity reported by `query`.
+            shingle_size (int): Number of words per shingle.
+            seed (int): Seed of the hash functions. Signatures are only
+                comparable between indexes built with the same parameters.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.keys: List[str] = []
+        self._signatures: List[np.ndarray] = []
+        self._positions: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Computes the MinHash signature of a text.
+
+        Returns:
+            np.ndarray: `num_perm` uint64 values.
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in set(shingles(text, self.shingle_size))),
+            dtype=np.uint64,
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return (permuted & _MAX_HASH).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: str, text: Optional[str] = None, signature: Optional[np.ndarray] = None) -> None:
+        """
+        Indexes a document under `key`, from its text or precomputed signature.
+        Re-adding an existing key replaces its signature.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        if key in self._positions:
+            self.remove(key)
+        position = len(self.keys)
+        self.keys.append(key)
+        self._signatures.append(signature)
+        self._positions[key] = position
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(position)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes `key` from the index; its slot stays empty.
+        """
+        position = self._positions.pop(key)
+        for band, band_key in self._band_keys(self._signatures[position]):
+            self._buckets[band][band_key].remove(position)
+        self.keys[position] = None
+
+    def query(self, text: Optional[str] = None, signature: Optional[np.ndarray] = None,
+              threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Finds indexed documents similar to a text or signature.
+
+        Returns:
+            List[Tuple[str, float]]: (key, estimated similarity) pairs at or
+            above the threshold, most similar first.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        threshold = self.threshold if threshold is None else threshold
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        matches = []
+        for position in candidates:
+            similarity = float(np.mean(self._signatures[position] == signature))
+            if similarity >= threshold:
+                matches.append((self.keys[position], similarity))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def __len__(self):
+        return len(self._positions)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the index to a .npz file, atomically: an interrupted save
+        leaves the previous file in place.
+        """
+        keys = [key for key in self.keys if key is not None]
+        signatures = np.array([self._signatures[self._positions[key]] for key in keys],
+                              dtype=np.uint64).reshape(len(keys), self.num_perm)
+        params = np.array([self.num_perm, self.bands, self.shingle_size, self.seed])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # A file object, or np.savez would add a .npz extension to the name.
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(keys, dtype=str), signatures=signatures,
+                     params=params, threshold=np.array(self.threshold))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashIndex":
+        """
+        Reads an index written by `save`.
+        """
+        with np.load(path) as data:
+            num_perm, bands, shingle_size, seed = (int(v) for v in data["params"])
+            index = cls(num_perm, bands, float(data["threshold"]), shingle_size, seed)
+            for key, signature in zip(data["keys"], data["signatures"]):
+                index.add(str(key), signature=signature)
+        return index
+
+
+class DedupStore:
+    """
+    Directory of previous parses (one JSON file per key) with their
+    MinHashIndex, loaded once and kept in memory.
+
+    Lookups only touch the index in memory and the JSON file of a match;
+    the index file is rewritten by `save` or `close`, not by every `add`.
+    """
+
+    INDEX_FILE = "minhash.npz"
+
+    def __init__(self, directory: str, threshold: float = 0.9):
+        """
+        Args:
+            directory (str): Directory of the parses and index.
+            threshold (float): Minimum estimated similarity reported by `find`.
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.index_path = os.path.join(directory, self.INDEX_FILE)
+        os.makedirs(directory, exist_ok=True)
+        self.index = (MinHashIndex.load(self.index_path) if os.path.exists(self.index_path)
+                      else MinHashIndex(threshold=threshold))
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.index)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def find(self, text: Optional[str] = None, signature: Optional[np.ndarray] = None,
+             threshold: Optional[float] = None) -> Optional[Tuple[str, float, str]]:
+        """
+        Finds the most similar stored parse of a text or signature.
+
+        Returns:
+            tuple: (key, estimated similarity, stored JSON) or None.
+        """
+        if signature is None:
+            signature = self.index.signature(text)
+        threshold = self.threshold if threshold is None else threshold
+        for key, similarity in self.index.query(signature=signature, threshold=threshold):
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    return key, similarity, f.read()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def add(self, key: str, value: str, text: Optional[str] = None,
+            signature: Optional[np.ndarray] = None) -> None:
+        """
+        Stores the JSON `value` of a parse under `key` and indexes its text
+        or signature.
+        """
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            f.write(value)
+        self.index.add(key, text, signature)
+        self._dirty = True
+
+    def save(self) -> None:
+        """Writes the index if it changed since it was loaded or saved."""
+        if self._dirty:
+            self.index.save(self.index_path)
+            self._dirty = False
+
+    def close(self) -> None:
+        self.save()
+
+    def __enter__(self) -> "DedupStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
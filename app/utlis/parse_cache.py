@@ -0,0 +1,139 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_resume_text(text: str) -> str:
+    """
+    Normalizes a resume text for cache keys: whitespace runs collapse to a
+    single space, so re-extractions that only differ in layout still hit.
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class ParseCache:
+    """
+    Persistent SQLite cache of LLM resume parses.
+
+    Keys hash the model, the JSON schema of the output model, the prompt
+    template and the normalized resume text, so any change to one of them is
+    a miss. Rows written under another schema are purged when the cache is
+    opened, which invalidates the whole cache automatically when
+    ResumeTemplate changes. Entries expire after `ttl` seconds and the least
+    recently used ones are evicted once the stored values exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str, schema_json: str, ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = 256 * 1024 * 1024):
+        """
+        Args:
+            path (str): SQLite database file.
+            schema_json (str): JSON schema of the cached output model.
+            ttl (float, optional): Lifetime of an entry in seconds.
+            max_bytes (int, optional): Maximum total size of the stored values.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.schema_hash = hashlib.sha256(schema_json.encode("utf-8")).hexdigest()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS parses ("
+                " key TEXT PRIMARY KEY, schema_hash TEXT NOT NULL, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS parses_accessed ON parses (accessed_at)")
+            self._db.execute("DELETE FROM parses WHERE schema_hash != ?", (self.schema_hash,))
+
+    def key(self, model: str, prompt_template: str, text: str) -> str:
+        """
+        Computes the cache key of a parse request.
+
+        Args:
+            model (str): Model name.
+            prompt_template (str): Prompt template the request was built from.
+            text (str): Raw resume text (normalized here).
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        digest = hashlib.sha256()
+        for part in (model, self.schema_hash, prompt_template, normalize_resume_text(text)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached JSON value for `key`, or None on a miss or when the
+        entry has expired.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute("SELECT value, created_at FROM parses WHERE key = ?",
+                                   (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM parses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE parses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Stores the JSON `value` under `key` and enforces the size cap.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO parses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.schema_hash, value, len(value.encode("utf-8")), now, now),
+            )
+            if self.ttl is not None:
+                self._db.execute("DELETE FROM parses WHERE created_at < ?", (now - self.ttl,))
+            if self.max_bytes is not None:
+                self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM parses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM parses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM parses WHERE key = ?", stale)
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the size of the store.
+        """
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        self._db.close()
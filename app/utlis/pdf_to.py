@@ -1,15 +1,12 @@
-import PyPDF2
+from app.utlis.extract_raw_data import pdf_to_txt
 
-def extract_text_from_pdf(file_path):
-    with open(file_path, "rb") as pdf_file:
-        reader = PyPDF2.PdfReader(pdf_file)
-        pages = [page.extract_text() or "" for page in reader.pages]
+def extract_text_from_pdf(file_path, workers=1):
     # Concaténer toutes les pages avec un saut de ligne
-    full_text = "\n".join(pages)
-    return full_text
+    return pdf_to_txt(file_path, workers=workers)
 
 # Exemple d'utilisation
-pdf_text = extract_text_from_pdf("/home/INT/idrissou.f/PycharmProjects/cvpro/app/utlis/CV_original .pdf")
-print(pdf_text)
-with open("/home/INT/idrissou.f/PycharmProjects/cvpro/app/utlis/CV_original.txt", "w") as text_file:
-    text_file.write(pdf_text)
\ No newline at end of file
+if __name__ == "__main__":
+    pdf_text = extract_text_from_pdf("/home/INT/idrissou.f/PycharmProjects/cvpro/app/utlis/CV_original .pdf")
+    print(pdf_text)
+    with open("/home/INT/idrissou.f/PycharmProjects/cvpro/app/utlis/CV_original.txt", "w") as text_file:
+        text_file.write(pdf_text)
@@ -0,0 +1,461 @@
+import argparse
+import gc
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked.
+    fcntl = None
+
+from app.utlis.extract_resume_part import ResumeTemplate, resume_schema_json
+
+INDEX_VERSION = 1
+
+# Index entry of a record: offset and length of its block in the data file,
+# start and length of its line in the (decompressed) block.
+Entry = Tuple[int, int, int, int]
+
+
+@lru_cache(maxsize=None)
+def _list_adapter() -> TypeAdapter:
+    return TypeAdapter(List[ResumeTemplate])
+
+
+@lru_cache(maxsize=None)
+def schema_hash() -> str:
+    """Hash of the current ResumeTemplate schema."""
+    return hashlib.sha256(resume_schema_json(compact=True).encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pauses the cyclic garbage collector: bulk loads allocate millions of
+    objects that all stay alive, and the collections they trigger scan the
+    whole growing heap, which costs more than the parsing itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ResumeStore:
+    """
+    Append-only JSONL store of parsed resumes, keyed by any string (file
+    name, text hash...), with an offset index for random access.
+
+    The data file holds one ResumeTemplate JSON per line. When compressed,
+    every `append_many` call writes one gzip member, so the file stays a
+    regular .jsonl.gz and a record is read by decompressing its member only.
+    The index `<path>.index` starts with a JSON header (version, compression,
+    schema hash) followed by one tab-separated line per appended record:
+    key, block offset, block length, start and length in the block. Appending
+    a key again supersedes its previous record; `compact` drops the
+    superseded ones.
+
+    Opening a store never modifies it, so it can be read while another
+    process appends. Appends and `compact` hold an exclusive lock on
+    `<path>.lock`, under which they first drop what an interrupted append
+    left behind (see `repair`).
+
+    Only validated ResumeTemplate instances are appended, so records written
+    under the current schema can be loaded without validation (`trusted`).
+
+    Bulk loads are limited by pydantic validation: with warm file caches, a
+    validated `load_all` is only about 2.5x faster than reading and
+    validating one JSON file per resume, and a trusted one about 5-10x (see
+    the bench command). The gain grows when the per-file reads hit the disk.
+    """
+
+    def __init__(self, path: str, compress: Optional[bool] = None):
+        """
+        Args:
+            path (str): Data file, created if missing.
+            compress (bool, optional): Gzip the records (default: when `path`
+                ends with .gz).
+
+        Raises:
+            ValueError: If the data file has no index, or was written with
+                another compression.
+        """
+        self.path = path
+        self.index_path = path + ".index"
+        self.compress = path.endswith(".gz") if compress is None else compress
+        self.lock_path = path + ".lock"
+        self.schema_hash = schema_hash()
+        self.records = 0
+        self._entries: Dict[str, Entry] = {}
+        self._serials: Dict[str, int] = {}
+        self._end = 0
+        self._index_end = 0
+        if os.path.exists(self.index_path):
+            self._load_index()
+        elif os.path.exists(path) and os.path.getsize(path):
+            raise ValueError(f"{path} has no index {self.index_path}")
+        else:
+            with open(path, "wb"), open(self.index_path, "w", encoding="utf-8") as index:
+                index.write(self._header() + "\n")
+            self._index_end = os.path.getsize(self.index_path)
+
+    def _header(self) -> str:
+        return json.dumps({"version": INDEX_VERSION, "compressed": self.compress,
+                           "schema_hash": self.schema_hash})
+
+    def _load_index(self) -> None:
+        """
+        Reads the index up to its last complete line pointing inside the data
+        file. A partial line, or data after the last indexed block, may be an
+        append in progress: they are ignored, not removed.
+        """
+        self.records = 0
+        self._entries = {}
+        self._serials = {}
+        self._end = 0
+        data_size = os.path.getsize(self.path)
+        with open(self.index_path, "rb") as index:
+            header = json.loads(index.readline())
+            if header["compressed"] != self.compress:
+                raise ValueError(f"{self.path} was written with compressed={header['compressed']}")
+            self.schema_hash = header["schema_hash"]
+            self._index_end = index.tell()
+            for line in index:
+                entry = self._parse_index_line(line, data_size)
+                if entry is None:
+                    break
+                key, entry = entry
+                self._entries.pop(key, None)  # Keeps the keys in file order.
+                self._entries[key] = entry
+                self._serials[key] = self.records
+                self._end = max(self._end, entry[0] + entry[1])
+                self.records += 1
+                self._index_end += len(line)
+
+    @contextmanager
+    def _locked(self):
+        """
+        Holds the exclusive write lock, with the index reloaded if another
+        writer changed the files, and the leftovers of an interrupted append
+        removed.
+        """
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if (os.path.getsize(self.index_path) != self._index_end
+                        or os.path.getsize(self.path) != self._end):
+                    self._load_index()
+                    self._truncate()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _truncate(self) -> None:
+        if os.path.getsize(self.index_path) > self._index_end:
+            with open(self.index_path, "r+b") as index:
+                index.truncate(self._index_end)
+        if os.path.getsize(self.path) > self._end:
+            with open(self.path, "r+b") as f:
+                f.truncate(self._end)
+
+    def repair(self) -> None:
+        """
+        Drops the partial index line and the unindexed data left by an
+        interrupted append. Appends do it themselves under the write lock;
+        without `fcntl` (Windows), only call this while nothing appends.
+        """
+        with self._locked():
+            self._load_index()
+            self._truncate()
+
+    @staticmethod
+    def _parse_index_line(line: bytes, data_size: int) -> Optional[Tuple[str, Entry]]:
+        """
+        Parses an index line, or returns None if it was not completely
+        written or points past the data file.
+        """
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            key, *numbers = line[:-1].decode("utf-8").split("\t")
+            entry = tuple(int(number) for number in numbers)
+        except (UnicodeDecodeError, ValueError):
+            return None
+        if len(entry) != 4 or entry[0] + entry[1] > data_size:
+            return None
+        return key, entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def keys(self) -> List[str]:
+        """Returns the keys in the order of their latest record."""
+        return list(self._entries)
+
+    def serials(self) -> Dict[str, int]:
+        """
+        Returns the serial number of the latest record of every key: its
+        position among all the records appended. Appending a key again gives
+        it a new serial; `compact` renumbers them all.
+        """
+        return dict(self._serials)
+
+    @property
+    def trusted(self) -> bool:
+        """Whether the records were validated under the current schema."""
+        return self.schema_hash == schema_hash()
+
+    def append(self, key: str, resume: ResumeTemplate) -> None:
+        self.append_many([(key, resume)])
+
+    def append_many(self, items: Iterable[Tuple[str, ResumeTemplate]]) -> int:
+        """
+        Appends records in one write (one gzip member when compressed).
+
+        Returns:
+            int: Number of records appended.
+
+        Raises:
+            TypeError: If a value is not a ResumeTemplate.
+            ValueError: If a key contains a tab or a newline, or the store
+                was written under another schema (see `compact`).
+        """
+        if not self.trusted:
+            raise ValueError(f"{self.path} was written under another ResumeTemplate schema, "
+                             "compact it first")
+        keys, lines = [], []
+        for key, resume in items:
+            if "\t" in key or "\n" in key:
+                raise ValueError(f"Keys cannot contain tabs or newlines: {key!r}")
+            if not isinstance(resume, ResumeTemplate):
+                raise TypeError(f"Expected a ResumeTemplate for {key!r}, got {type(resume).__name__}")
+            keys.append(key)
+            lines.append(resume.model_dump_json().encode("utf-8") + b"\n")
+        if not lines:
+            return 0
+
+        block = gzip.compress(b"".join(lines), mtime=0) if self.compress else b"".join(lines)
+        with self._locked():
+            offset = self._end
+            entries, start = [], 0
+            for line in lines:
+                if self.compress:
+                    entries.append((offset, len(block), start, len(line) - 1))
+                else:
+                    entries.append((offset + start, len(line), 0, len(line) - 1))
+                start += len(line)
+            index_lines = "".join(f"{key}\t{entry[0]}\t{entry[1]}\t{entry[2]}\t{entry[3]}\n"
+                                  for key, entry in zip(keys, entries)).encode("utf-8")
+
+            # Data first: an index line never points past the data file.
+            with open(self.path, "ab") as f:
+                f.write(block)
+            with open(self.index_path, "ab") as index:
+                index.write(index_lines)
+            for serial, (key, entry) in enumerate(zip(keys, entries), self.records):
+                self._entries.pop(key, None)
+                self._entries[key] = entry
+                self._serials[key] = serial
+            self._end = offset + len(block)
+            self._index_end += len(index_lines)
+            self.records += len(lines)
+        return len(lines)
+
+    def _block(self, f, offset: int, length: int) -> bytes:
+        f.seek(offset)
+        data = f.read(length)
+        return zlib.decompress(data, wbits=31) if self.compress else data
+
+    def get_json(self, key: str) -> Optional[bytes]:
+        """Returns the JSON bytes of the latest record of `key`, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        offset, length, start, size = entry
+        with open(self.path, "rb") as f:
+            return self._block(f, offset, length)[start:start + size]
+
+    def get(self, key: str, trusted: bool = False) -> Union[ResumeTemplate, dict, None]:
+        """
+        Returns the latest record of `key`, or None.
+
+        Args:
+            trusted (bool): Return the record as a dict without validating it,
+                if it was written under the current schema.
+        """
+        data = self.get_json(key)
+        if data is None:
+            return None
+        if trusted and self.trusted:
+            return from_json(data)
+        return ResumeTemplate.model_validate_json(data)
+
+    def _raw(self) -> bytes:
+        """Returns the live records as one JSON array, in file order."""
+        with open(self.path, "rb") as f:
+            if self.records == len(self._entries):
+                # Nothing superseded: the whole file is the array (up to its
+                # last indexed block, an append may be in progress).
+                data = f.read(self._end)
+                if self.compress:
+                    data = gzip.decompress(data)
+                return b"[" + data[:-1].replace(b"\n", b",") + b"]"
+            if not self.compress:
+                data = f.read(self._end)
+                return b"[" + b",".join(data[offset:offset + size]
+                                        for offset, _, _, size in self._entries.values()) + b"]"
+            spans, blocks = [], {}
+            for offset, length, start, size in self._entries.values():
+                if offset not in blocks:
+                    blocks = {offset: self._block(f, offset, length)}  # One block at a time.
+                spans.append(blocks[offset][start:start + size])
+        return b"[" + b",".join(spans) + b"]"
+
+    def load_all(self, trusted: bool = False) -> Union[List[ResumeTemplate], List[dict]]:
+        """
+        Loads every live record in one pass, validated from bytes by a single
+        TypeAdapter call.
+
+        Args:
+            trusted (bool): Skip validation and return dicts, if the records
+                were written under the current schema (validation is done
+                otherwise).
+
+        Returns:
+            list: Records in the order of `keys()`.
+        """
+        if not self._entries:
+            return []
+        data = self._raw()
+        with _gc_paused():
+            if trusted and self.trusted:
+                return from_json(data)
+            return _list_adapter().validate_json(data)
+
+    def items(self, trusted: bool = False) -> Iterator[Tuple[str, Union[ResumeTemplate, dict]]]:
+        """Yields (key, record) pairs, see `load_all`."""
+        return zip(self.keys(), self.load_all(trusted))
+
+    def compact(self) -> None:
+        """
+        Rewrites the store with the live records only, in one block. Records
+        written under another schema are validated against the current one
+        (raising pydantic.ValidationError if one no longer matches).
+        """
+        with self._locked():
+            resumes = self.load_all()
+            tmp_path = self.path + ".tmp"
+            for path in (tmp_path, tmp_path + ".index", tmp_path + ".lock"):
+                if os.path.exists(path):
+                    os.remove(path)
+            compacted = ResumeStore(tmp_path, self.compress)
+            compacted.append_many(zip(self.keys(), resumes))
+            os.replace(tmp_path, self.path)
+            os.replace(compacted.index_path, self.index_path)
+            os.remove(compacted.lock_path)
+        self.__init__(self.path, self.compress)
+
+
+def _bench(args) -> None:
+    from app.utlis.fake_llm_server import synthetic_inputs
+    from app.utlis.rule_parser import parse_resume_rules
+
+    resumes = [parse_resume_rules(text)[0] for _, text in synthetic_inputs(args.resumes)]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, resume in enumerate(resumes):
+            paths.append(os.path.join(directory, f"{i:06d}.json"))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write(resume.model_dump_json(indent=2))
+        start = time.perf_counter()
+        loaded = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded.append(ResumeTemplate.model_validate(json.load(f)))
+        baseline = time.perf_counter() - start
+        del loaded
+        print(f"{'per-file json.load + model_validate':>40}: {baseline:.3f}s")
+
+        for name in ("store.jsonl", "store.jsonl.gz"):
+            store = ResumeStore(os.path.join(directory, name))
+            store.append_many((f"{i:06d}", resume) for i, resume in enumerate(resumes))
+            for trusted in (False, True):
+                start = time.perf_counter()
+                loaded = ResumeStore(store.path).load_all(trusted=trusted)
+                elapsed = time.perf_counter() - start
+                del loaded
+                label = f"{name} load_all{' (trusted)' if trusted else ''}"
+                print(f"{label:>40}: {elapsed:.3f}s ({baseline / elapsed:.1f}x), "
+                      f"{os.path.getsize(store.path) / len(resumes):.0f} bytes/resume")
+    print("The per-file baseline reads from the page cache; on cold storage its "
+          "cost per file is higher.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append-only JSONL store of parsed resumes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Append parsed resume JSON files, keyed by file name.")
+    add.add_argument("store", help="Store data file (.jsonl or .jsonl.gz).")
+    add.add_argument("files", nargs="+", help="ResumeTemplate JSON files.")
+    export = sub.add_parser("export", help="Write every record as <key>.json.")
+    export.add_argument("store", help="Store data file.")
+    export.add_argument("-o", "--output-dir", required=True, help="Directory for the JSON files.")
+    stats = sub.add_parser("stats", help="Print the record counts and sizes.")
+    stats.add_argument("store", help="Store data file.")
+    compact = sub.add_parser("compact", help="Drop superseded records.")
+    compact.add_argument("store", help="Store data file.")
+    repair = sub.add_parser("repair", help="Drop what an interrupted append left behind.")
+    repair.add_argument("store", help="Store data file.")
+    bench = sub.add_parser("bench", help="Compare per-file loading with store loading.")
+    bench.add_argument("--resumes", type=int, default=2000, help="Number of synthetic resumes.")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        _bench(args)
+        return
+    store = ResumeStore(args.store)
+    if args.command == "add":
+        items = []
+        for path in args.files:
+            with open(path, "rb") as f:
+                items.append((os.path.splitext(os.path.basename(path))[0],
+                              ResumeTemplate.model_validate_json(f.read())))
+        print(f"Appended {store.append_many(items)} resumes")
+    elif args.command == "export":
+        os.makedirs(args.output_dir, exist_ok=True)
+        for key, resume in store.items():
+            with open(os.path.join(args.output_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+                f.write(resume.model_dump_json(indent=2))
+    elif args.command == "compact":
+        store.compact()
+        print(f"{len(store)} resumes, {os.path.getsize(store.path)} bytes")
+    elif args.command == "repair":
+        store.repair()
+        print(f"{store.records} records, {os.path.getsize(store.path)} bytes")
+    else:
+        print(f"{len(store)} resumes ({store.records - len(store)} superseded), "
+              f"{os.path.getsize(store.path)} bytes, "
+              f"{'current' if store.trusted else 'outdated'} schema")
+
+
+if __name__ == "__main__":
+    main()
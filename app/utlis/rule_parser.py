@@ -0,0 +1,408 @@
+import argparse
+import re
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utlis.extract_resume_part import (EMAIL_PATTERN, LINKEDIN_PATTERN, PHONE_PATTERN,
+                                           PROMPT_MODES, ResumeTemplate, get_openai_client,
+                                           parse_resume)
+from app.utlis.section_parse import (SECTION_MODELS, merge_sections, parse_section,
+                                     sections_complete, split_sections)
+
+# Minimum confidence for a section to be kept from the rules instead of being
+# sent to the LLM.
+DEFAULT_THRESHOLD = 0.8
+
+_BULLET = re.compile(r"^\s*[•\-*▪►·–◦●]\s*")
+_SEPARATORS = re.compile(r"\s*[•,;|·]\s*")
+_LABEL = re.compile(r"^[^:,]{2,40}:\s*(?=\S)")
+
+_MONTH_NAMES = (
+    ("january", "jan", "janvier", "janv"), ("february", "feb", "fevrier", "fev", "fevr"),
+    ("march", "mar", "mars"), ("april", "apr", "avril", "avr"), ("may", "mai"),
+    ("june", "jun", "juin"), ("july", "jul", "juillet", "juil"), ("august", "aug", "aout"),
+    ("september", "sep", "sept", "septembre"), ("october", "oct", "octobre"),
+    ("november", "nov", "novembre"), ("december", "dec", "decembre"),
+)
+_MONTHS = {name: f"{number:02d}" for number, names in enumerate(_MONTH_NAMES, 1) for name in names}
+_DATE = re.compile(
+    r"(?:\b(?P<month>[^\W\d_]{3,9})\.?\s+)?\b(?:(?P<mm>\d{1,2})/)?(?P<year>(?:19|20)\d{2})\b"
+    r"|(?P<present>\b(?:present|current|now|today|aujourd'hui|aujourd’hui|présent|en cours|actuel)\b)",
+    re.IGNORECASE,
+)
+# Words that may surround the dates of a date line ("De 2023 à 2025").
+_DATE_FILLER = re.compile(r"\b(?:de|du|from|to|à|au|since|depuis|until|jusqu'à)\b|[-–—:()]",
+                          re.IGNORECASE)
+
+_ENTRY_SPLIT = re.compile(r"\s+(?:at|chez|@|[-–—])\s+|\s*,\s*")
+_FIELD_OF_STUDY = re.compile(r"\b(?:in|of|en|de|d')\s*(.+)$", re.IGNORECASE)
+_LANGUAGE = re.compile(r"^(?P<language>[^\W\d_][^\W\d_' -]{1,30}?)\s*"
+                       r"(?:\((?P<paren>[^)]+)\)|[:\-–]\s*(?P<level>.+))?$")
+
+# A rule result: ResumeTemplate fields of the section -> confidence per field.
+RuleResult = Tuple[dict, Dict[str, float]]
+
+
+def strip_accents(text: str) -> str:
+    """Removes the accents of a text ("Télécom" -> "Telecom")."""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def find_dates(line: str) -> List[str]:
+    """
+    Returns the dates of a line, normalized to YYYY-MM or YYYY, "Present" for
+    ongoing positions.
+    """
+    dates = []
+    for match in _DATE.finditer(line):
+        if match.group("present"):
+            dates.append("Present")
+            continue
+        month = match.group("mm")
+        if month is None and match.group("month"):
+            month = _MONTHS.get(strip_accents(match.group("month")).lower())
+        dates.append(f"{match.group('year')}-{int(month):02d}" if month else match.group("year"))
+    return dates
+
+
+def _is_date_line(line: str) -> bool:
+    return bool(find_dates(line)) and not _DATE_FILLER.sub("", _DATE.sub("", line)).strip()
+
+
+def _items(text: str) -> List[str]:
+    """
+    Splits a list section into items: one per line, or per separator when the
+    items share a line. "Label: a, b" lines lose their label.
+    """
+    items = []
+    for line in text.splitlines():
+        line = _LABEL.sub("", _BULLET.sub("", line)).strip()
+        items += [item for item in _SEPARATORS.split(line) if item]
+    return items
+
+
+def parse_header(header: str, summary: str) -> RuleResult:
+    """
+    Finds the name, headline, contact details and summary of a resume.
+
+    The name is the first line that looks like one; contact details are only
+    looked up in the header, where numbers are not dates or figures of the
+    experience entries.
+    """
+    lines = [line.strip() for line in header.splitlines() if line.strip()]
+    contact_free = [line for line in lines if not (EMAIL_PATTERN.search(line)
+                                                   or PHONE_PATTERN.search(line)
+                                                   or LINKEDIN_PATTERN.search(line))]
+    name, name_confidence = (contact_free[0] if contact_free else ""), 0.0
+    if name and 2 <= len(name.split()) <= 5 and not re.search(r"[\d@/]", name):
+        name_confidence = 0.9
+    elif name:
+        name_confidence = 0.4
+    contact = {"name": name}
+    for field, pattern in (("email", EMAIL_PATTERN), ("phone", PHONE_PATTERN),
+                           ("linkedin", LINKEDIN_PATTERN)):
+        match = pattern.search(header)
+        contact[field] = match.group(0).strip() if match else None
+
+    rest = contact_free[1:]
+    introduction = rest[0] if rest and len(rest[0]) <= 80 else None
+    if summary:
+        professional_summary, summary_confidence = " ".join(summary.split()), 0.95
+    else:
+        remaining = " ".join(rest[1:] if introduction else rest)
+        professional_summary = remaining
+        summary_confidence = 0.6 if len(remaining) > 100 else 0.5
+    fields = {"contact_info": contact, "introduction": introduction,
+              "professional_summary": professional_summary}
+    confidence = {"contact_info": name_confidence, "introduction": name_confidence,
+                  "professional_summary": summary_confidence}
+    return fields, confidence
+
+
+def _split_entry_header(line: str) -> Tuple[str, str, Optional[str]]:
+    """
+    Splits "Title, Company | Location" (or "Title at Company", "Title -
+    Company") into its parts; missing parts are empty.
+    """
+    head, _, location = line.partition("|")
+    parts = _ENTRY_SPLIT.split(head.strip(), maxsplit=1)
+    first = parts[0].strip()
+    second = parts[1].strip() if len(parts) > 1 else ""
+    return first, second, location.strip() or None
+
+
+def _iter_entries(text: str):
+    """
+    Groups the lines of an experience-like section into entries of header
+    lines, date lines and bullet lines. A header line after dates or bullets
+    starts a new entry.
+    """
+    entry = None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if _BULLET.match(line):
+            if entry is not None:
+                entry["bullets"].append(_BULLET.sub("", line).strip())
+            continue
+        dates = find_dates(line)
+        if dates and _is_date_line(line):
+            if entry is None:
+                entry = {"headers": [], "dates": [], "bullets": []}
+            entry["dates"] += dates
+            continue
+        if entry is None or entry["dates"] or entry["bullets"]:
+            if entry is not None:
+                yield entry
+            entry = {"headers": [], "dates": [], "bullets": []}
+        if dates:
+            # Inline dates: "Title, Company (2020 - 2022)".
+            entry["dates"] += dates
+            matches = list(_DATE.finditer(line))
+            line = (line[:matches[0].start()] + line[matches[-1].end():]).strip(" ,|()-–—")
+        entry["headers"].append(line.strip())
+    if entry is not None:
+        yield entry
+
+
+def parse_experience(text: str, known_skills: List[str]) -> RuleResult:
+    """
+    Parses work experience entries. The skills used in a role are the known
+    skills of the resume mentioned in its description.
+    """
+    experiences, confidences = [], []
+    for entry in _iter_entries(text):
+        headers = entry["headers"] + ["", ""]
+        title, company, location = _split_entry_header(headers[0])
+        if not company and headers[1]:
+            company, _, location = headers[1].partition("|")
+            company, location = company.strip(), location.strip() or None
+        dates = entry["dates"]
+        body = " ".join(entry["bullets"]).lower()
+        experiences.append({
+            "company": company,
+            "job_title": title,
+            "start_date": dates[0] if dates else "",
+            "end_date": dates[1] if len(dates) > 1 else None,
+            "location": location,
+            "achievements": entry["bullets"],
+            "used_skills_and_tools": [skill for skill in known_skills if skill.lower() in body],
+        })
+        confidences.append(0.3 * bool(title) + 0.3 * bool(company) + 0.3 * bool(dates)
+                           + 0.1 * bool(entry["bullets"]))
+    confidence = min(confidences) if confidences else 0.0
+    return {"work_experience": experiences}, {"work_experience": confidence}
+
+
+def parse_education(text: str) -> RuleResult:
+    """
+    Parses "Degree, Institution" entries with their graduation year.
+    """
+    education, confidences = [], []
+    for entry in _iter_entries(text):
+        headers = entry["headers"] + ["", ""]
+        degree, institution, _ = _split_entry_header(headers[0])
+        if not institution:
+            institution = headers[1]
+        field = _FIELD_OF_STUDY.search(degree)
+        years = [int(date[:4]) for date in entry["dates"] if date != "Present"]
+        education.append({
+            "institution": institution,
+            "degree": degree,
+            "field_of_study": field.group(1).strip() if field else "",
+            "graduation_year": years[-1] if years else None,
+        })
+        confidences.append(0.3 * bool(degree) + 0.3 * bool(institution) + 0.2 * bool(field)
+                           + 0.2 * bool(years))
+    confidence = min(confidences) if confidences else 0.0
+    return {"education": education}, {"education": confidence}
+
+
+def parse_languages(text: str) -> RuleResult:
+    """
+    Parses "Language (Level)", "Language: Level" or bare language items.
+    """
+    languages, matched = [], 0
+    items = _items(text)
+    for item in items:
+        match = _LANGUAGE.match(item)
+        if match and len(match.group("language").split()) <= 3:
+            matched += 1
+            level = match.group("paren") or match.group("level")
+            languages.append({"language": match.group("language").strip(),
+                              "proficiency_level": level.strip() if level else None})
+    confidence = 0.95 * matched / len(items) if items else 0.0
+    return {"language_proficiency": languages}, {"language_proficiency": confidence}
+
+
+def parse_skills(text: str) -> RuleResult:
+    """
+    Parses a skills list; long items are likely sentences the rules cannot
+    classify.
+    """
+    items = _items(text)
+    short = [item for item in items if len(item.split()) <= 5]
+    confidence = 0.9 * len(short) / len(items) if items else 0.0
+    return {"skills_section": {"core_skills": short}}, {"skills_section": confidence}
+
+
+def parse_hobbies(text: str) -> RuleResult:
+    """
+    Parses a list of hobbies.
+    """
+    items = _items(text)
+    return ({"hobbies_and_interests": [{"hobbies": items}] if items else []},
+            {"hobbies_and_interests": 0.9 if items else 0.0})
+
+
+def _list_rule(field: str, build: Callable[[str], object], confidence: float):
+    def rule(text: str) -> RuleResult:
+        items = _items(text)
+        return {field: [build(item) for item in items]}, {field: confidence if items else 0.0}
+    return rule
+
+
+# Section -> rule. Sections without a rule (volunteer work, affiliations,
+# references) always go to the LLM.
+SECTION_RULES: Dict[str, Callable[[str], RuleResult]] = {
+    "education": parse_education,
+    "languages": parse_languages,
+    "skills": parse_skills,
+    "certifications": _list_rule("certifications", lambda item: item, 0.9),
+    "hobbies": parse_hobbies,
+    "publications": _list_rule("publications", lambda item: {"title": item}, 0.6),
+    "awards": _list_rule("awards", lambda item: {"title": item}, 0.6),
+    "projects": _list_rule("projects", lambda item: {"project_name": item}, 0.6),
+}
+
+
+def parse_sections_rules(sections: Dict[str, str]) -> Dict[str, RuleResult]:
+    """
+    Applies the rules to the sections of `split_sections`. The summary is
+    parsed with the header, as by `section_parse.parse_resume_sections`.
+
+    Returns:
+        Dict[str, RuleResult]: Section -> (fields, confidence per field).
+    """
+    sections = dict(sections)
+    results = {"header": parse_header(sections.pop("header", ""), sections.pop("summary", ""))}
+    known_skills = _items(sections.get("skills", ""))
+    for section, text in sections.items():
+        if section == "experience":
+            results[section] = parse_experience(text, known_skills)
+        elif section in SECTION_RULES:
+            results[section] = SECTION_RULES[section](text)
+        else:
+            field = next(iter(SECTION_MODELS[section].model_fields))
+            results[section] = {}, {field: 0.0}
+    return results
+
+
+def _section_confidence(result: RuleResult) -> float:
+    return min(result[1].values())
+
+
+def _to_resume(results: Dict[str, RuleResult]) -> ResumeTemplate:
+    return merge_sections({section: SECTION_MODELS[section].model_validate(fields)
+                           for section, (fields, _) in results.items() if fields})
+
+
+def parse_resume_rules(raw_resume: str) -> Tuple[ResumeTemplate, Dict[str, float]]:
+    """
+    Parses a resume with the rules only, in a few milliseconds on CPU.
+
+    Returns:
+        tuple: (ResumeTemplate, confidence between 0 and 1 of each field that
+        was found). Fields of sections the rules cannot parse have confidence
+        0, and no field exceeds 0.5 when the headings were not recognized.
+    """
+    sections = split_sections(raw_resume)
+    results = parse_sections_rules(sections)
+    confidences = {field: value for _, fields in results.values() for field, value in fields.items()}
+    if not sections_complete(sections, raw_resume):
+        # Headings were missed: any field may have swallowed other sections.
+        confidences = {field: min(value, 0.5) for field, value in confidences.items()}
+    return _to_resume(results), confidences
+
+
+def parse_resume_fast(raw_resume: str, threshold: float = DEFAULT_THRESHOLD, client=None,
+                      prompt_mode: str = "full", report=None, workers: Optional[int] = None,
+                      metrics=None):
+    """
+    Parses a resume with the rules, sending only the sections whose
+    confidence is below `threshold` to the LLM (concurrently, see
+    `section_parse.parse_section`).
+
+    Resumes whose headings are not recognized are parsed in one LLM call.
+
+    Args:
+        raw_resume (str): Extracted resume text.
+        threshold (float): Minimum confidence of a section kept from the rules.
+        client (OpenAI, optional): Client for the LLM calls.
+        prompt_mode (str): Schema embedded in the prompts, one of PROMPT_MODES.
+        report (callable, optional): Usage callback of the LLM calls.
+        workers (int, optional): Maximum concurrent LLM calls.
+        metrics (MetricsRecorder, optional): Recorder of the LLM call metrics.
+
+    Returns:
+        tuple: (ResumeTemplate, rule confidence of each field, list of the
+        sections parsed by the LLM, ["document"] for a whole-document call).
+    """
+    sections = split_sections(raw_resume)
+    if not sections_complete(sections, raw_resume):
+        parsed = parse_resume(raw_resume, client, prompt_mode=prompt_mode, report=report,
+                              metrics=metrics)
+        return parsed, {}, ["document"]
+
+    results = parse_sections_rules(sections)
+    confidences = {field: value for _, fields in results.values() for field, value in fields.items()}
+    uncertain = {section: (sections.get("header", "") + "\n\n" + sections.get("summary", "")).strip()
+                 if section == "header" else sections[section]
+                 for section, result in results.items() if _section_confidence(result) < threshold}
+    parsed = {section: SECTION_MODELS[section].model_validate(fields)
+              for section, (fields, _) in results.items() if fields and section not in uncertain}
+    if uncertain:
+        client = client or get_openai_client()
+        with ThreadPoolExecutor(max_workers=workers or len(uncertain)) as executor:
+            futures = {section: executor.submit(parse_section, section, text, client, prompt_mode,
+                                                report, metrics)
+                       for section, text in uncertain.items()}
+            parsed.update({section: future.result() for section, future in futures.items()})
+    return merge_sections(parsed), confidences, list(uncertain)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Parse a resume with rules, using the LLM only for uncertain sections.")
+    parser.add_argument("--input", default="CV_original.txt", help="Raw resume text file.")
+    parser.add_argument("--output", default="parsed_resume.json", help="Parsed resume JSON file.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum confidence of a section kept from the rules.")
+    parser.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                        help="Schema embedded in the prompts: pretty-printed, minified or none.")
+    parser.add_argument("--rules-only", action="store_true", help="Never call the LLM.")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        raw_resume = f.read()
+    start = time.perf_counter()
+    if args.rules_only:
+        parsed, confidences = parse_resume_rules(raw_resume)
+        llm_sections = []
+    else:
+        parsed, confidences, llm_sections = parse_resume_fast(raw_resume, args.threshold,
+                                                              prompt_mode=args.prompt_mode)
+    print(f"Parsed resume in {time.perf_counter() - start:.3f}s")
+    for field, confidence in confidences.items():
+        print(f"{field:>22}: {confidence:.2f}")
+    if llm_sections:
+        print("Sent to the LLM:", ", ".join(llm_sections))
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(parsed.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
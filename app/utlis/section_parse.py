@@ -0,0 +1,285 @@
+import argparse
+import json
+import re
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field, create_model
+
+from app.utlis.extract_resume_part import (MODEL, PROMPT_MODES, Affiliation, Award, ContactInfo,
+                                           Education, HobbiesAndInterests, LanguageProficiency,
+                                           Project, Publication, Reference, ResumeTemplate,
+                                           SkillSection, VolunteerExperience, WorkExperience,
+                                           get_openai_client, parse_resume, response_usage)
+from app.utlis.metrics import track_call
+
+# Headings recognized by `split_sections`, in English and French, normalized
+# as by `_normalize_heading`.
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "about me",
+                "objective", "career objective", "profil", "profil professionnel",
+                "a propos", "objectif"),
+    "experience": ("experience", "experiences", "work experience", "professional experience",
+                   "employment", "employment history", "work history", "career history",
+                   "experience professionnelle", "experiences professionnelles",
+                   "parcours professionnel"),
+    "education": ("education", "academic background", "qualifications", "formation", "formations",
+                  "diplomes", "parcours academique", "etudes"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "competences",
+               "competences techniques", "savoir faire"),
+    "languages": ("languages", "language skills", "langues"),
+    "projects": ("projects", "personal projects", "academic projects", "projets",
+                 "projets personnels", "projets academiques"),
+    "publications": ("publications", "papers", "articles"),
+    "awards": ("awards", "honors", "awards and honors", "prix", "distinctions",
+               "recompenses"),
+    "volunteer": ("volunteer experience", "volunteering", "community service", "benevolat",
+                  "engagement associatif"),
+    "certifications": ("certifications", "certificates", "licenses and certifications"),
+    "affiliations": ("affiliations", "memberships", "professional affiliations", "adhesions"),
+    "references": ("references",),
+    "hobbies": ("hobbies", "interests", "hobbies and interests", "centres d interet", "loisirs",
+                "centres d interets"),
+}
+
+_HEADING_TO_SECTION = {heading: section for section, headings in SECTION_HEADINGS.items()
+                       for heading in headings}
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize_heading(line: str) -> str:
+    text = unicodedata.normalize("NFKD", line.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def split_sections(raw_resume: str) -> Dict[str, str]:
+    """
+    Splits a raw resume into its sections by looking for known headings.
+
+    A heading is a line that, once lowercased and stripped of accents and
+    punctuation, is one of SECTION_HEADINGS. The text before the first
+    heading (name, title, contact details) is returned under "header", and
+    the texts of repeated headings are concatenated.
+
+    Args:
+        raw_resume (str): Extracted resume text.
+
+    Returns:
+        Dict[str, str]: Section name -> text of the section, in document order.
+    """
+    sections: Dict[str, List[str]] = {"header": []}
+    current = sections["header"]
+    for line in raw_resume.splitlines():
+        section = _HEADING_TO_SECTION.get(_normalize_heading(line))
+        if section is not None:
+            current = sections.setdefault(section, [])
+            continue
+        current.append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items()
+            if "".join(lines).strip()}
+
+
+def sections_complete(sections: Dict[str, str], raw_resume: str) -> bool:
+    """
+    Tells whether a `split_sections` result can be parsed section by section.
+
+    Content before the first heading only feeds the identity fields: when no
+    other section was found, or the header holds most of the text, headings
+    were missed and parsing the sections separately would drop content.
+    """
+    return (bool(sections.keys() - {"header", "summary"})
+            and len(sections.get("header", "")) <= len(raw_resume) / 2)
+
+
+class HeaderSection(BaseModel):
+    """Identity and summary of the candidate, from the top of the resume."""
+    contact_info: ContactInfo = Field(..., description="Candidate's contact information.")
+    introduction: Optional[str] = Field(None, description="Optional introduction or headline.")
+    professional_summary: str = Field(..., description="Professional summary or career objective.")
+
+
+def _list_section(name: str, field: str, item_type: type, description: str) -> Type[BaseModel]:
+    return create_model(name, __doc__=description,
+                        **{field: (List[item_type], Field(..., description=description))})
+
+
+# Section -> wrapper model parsed from its text. Each wrapper holds one or
+# more ResumeTemplate fields, merged back by `merge_sections`.
+SECTION_MODELS: Dict[str, Type[BaseModel]] = {
+    "header": HeaderSection,
+    "experience": _list_section("ExperienceSection", "work_experience", WorkExperience,
+                                "List of professional work experiences."),
+    "education": _list_section("EducationSection", "education", Education,
+                               "Educational background."),
+    "skills": create_model("SkillsSection", __doc__="Skills of the candidate.",
+                           skills_section=(SkillSection, Field(
+                               ..., description="Skills grouped by type."))),
+    "languages": _list_section("LanguagesSection", "language_proficiency", LanguageProficiency,
+                               "Languages and proficiency levels."),
+    "projects": _list_section("ProjectsSection", "projects", Project,
+                              "List of personal or academic projects."),
+    "publications": _list_section("PublicationsSection", "publications", Publication,
+                                  "Published works."),
+    "awards": _list_section("AwardsSection", "awards", Award, "Awards and honors received."),
+    "volunteer": _list_section("VolunteerSection", "volunteer_experience", VolunteerExperience,
+                               "List of volunteer work."),
+    "certifications": _list_section("CertificationsSection", "certifications", str,
+                                    "Certifications earned."),
+    "affiliations": _list_section("AffiliationsSection", "affiliations", Affiliation,
+                                  "Memberships or affiliations."),
+    "references": _list_section("ReferencesSection", "references", Reference,
+                                "Professional references."),
+    "hobbies": _list_section("HobbiesSection", "hobbies_and_interests", HobbiesAndInterests,
+                             "Candidate's hobbies and interests."),
+}
+
+SECTION_PROMPT_TEMPLATE = """
+You are a resume parser. Convert the following {section} section of a resume into a JSON object matching the {model} Pydantic schema.
+Ensure that the output keys match the schema exactly and return valid JSON.
+"""
+
+
+@lru_cache(maxsize=None)
+def build_section_prompt(section: str, prompt_mode: str = "full") -> str:
+    """
+    Builds the system prompt of one section, see `build_system_prompt`.
+    """
+    if prompt_mode not in PROMPT_MODES:
+        raise ValueError(f"Unknown prompt mode {prompt_mode!r}, expected one of {PROMPT_MODES}")
+    model = SECTION_MODELS[section]
+    prompt = SECTION_PROMPT_TEMPLATE.format(section=section, model=model.__name__)
+    if prompt_mode == "none":
+        return prompt
+    schema = model.model_json_schema(by_alias=False)
+    if prompt_mode == "compact":
+        schema_json = json.dumps(schema, separators=(",", ":"))
+    else:
+        schema_json = json.dumps(schema, indent=2)
+    return prompt + f"Here is the schema definition for {model.__name__}:\n{schema_json}\n"
+
+
+def parse_section(section: str, text: str, client=None, prompt_mode: str = "full",
+                  report=None, metrics=None) -> BaseModel:
+    """
+    Parses the text of one section into its SECTION_MODELS wrapper.
+
+    Raises:
+        ValueError: If the response does not match the section model.
+    """
+    model = SECTION_MODELS[section]
+    client = client or get_openai_client()
+    start = time.perf_counter()
+    with track_call(metrics, MODEL, section) as call:
+        response = client.responses.parse(
+            model=MODEL,
+            input=[
+                {"role": "system", "content": build_section_prompt(section, prompt_mode)},
+                {"role": "user", "content": text},
+            ],
+            temperature=0.0,
+            text_format=model,
+        )
+        usage = response_usage(response, time.perf_counter() - start)
+        call.set_usage(usage)
+        if report is not None:
+            report(dict(usage, section=section))
+        parsed = response.output_parsed
+        if not isinstance(parsed, model):
+            call.validation_failed = True
+            raise ValueError(f"La réponse n'est pas conforme au modèle {model.__name__}")
+    return parsed
+
+
+def merge_sections(parsed: Dict[str, BaseModel]) -> ResumeTemplate:
+    """
+    Merges parsed sections into one validated ResumeTemplate. Required fields
+    of sections that were not found are left empty.
+    """
+    fields = {"contact_info": {"name": ""}, "professional_summary": "",
+              "skills_section": {"core_skills": []}, "work_experience": []}
+    for section in parsed.values():
+        fields.update(section.model_dump())
+    return ResumeTemplate.model_validate(fields)
+
+
+def parse_resume_sections(raw_resume: str, client=None, workers: Optional[int] = None,
+                          prompt_mode: str = "full", report=None, metrics=None) -> ResumeTemplate:
+    """
+    Parses a resume section by section, with one concurrent API call per
+    section, so that the latency is bounded by the longest section instead of
+    the whole document.
+
+    The summary is parsed together with the header, since both feed the
+    ResumeTemplate identity fields; without either, no call is made for them
+    and the contact details are left empty rather than guessed. Resumes in
+    which no heading is recognized, or whose text is mostly before the first
+    recognized heading, are parsed in one call with `parse_resume`.
+
+    Args:
+        raw_resume (str): Extracted resume text.
+        client (OpenAI, optional): Client shared by the section calls.
+        workers (int, optional): Maximum concurrent calls (default: one per
+            section).
+        prompt_mode (str): Schema embedded in the prompts, one of PROMPT_MODES.
+        report (callable, optional): Called with the `response_usage` of each
+            call, with an extra "section" key.
+        metrics (MetricsRecorder, optional): Recorder of the call metrics,
+            keyed by section.
+
+    Returns:
+        ResumeTemplate: The merged resume.
+
+    Raises:
+        ValueError: If a section response does not match its model.
+    """
+    sections = split_sections(raw_resume)
+    if not sections_complete(sections, raw_resume):
+        return parse_resume(raw_resume, client, prompt_mode=prompt_mode, report=report,
+                            metrics=metrics)
+    summary = sections.pop("summary", "")
+    header = "\n\n".join(text for text in (sections.pop("header", ""), summary) if text.strip())
+    if header:
+        sections["header"] = header
+
+    client = client or get_openai_client()
+    with ThreadPoolExecutor(max_workers=workers or len(sections)) as executor:
+        futures = {section: executor.submit(parse_section, section, text, client, prompt_mode,
+                                            report, metrics)
+                   for section, text in sections.items()}
+        return merge_sections({section: future.result() for section, future in futures.items()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a resume text section by section.")
+    parser.add_argument("--input", default="CV_original.txt", help="Raw resume text file.")
+    parser.add_argument("--output", default="parsed_resume.json", help="Parsed resume JSON file.")
+    parser.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                        help="Schema embedded in the prompts: pretty-printed, minified or none.")
+    parser.add_argument("--split-only", action="store_true",
+                        help="Only print the detected sections, without calling the API.")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        raw_resume = f.read()
+    if args.split_only:
+        for section, text in split_sections(raw_resume).items():
+            print(f"{section:>15}: {len(text)} characters")
+        return
+
+    def report(usage):
+        print(f"{usage['section']:>15}: {usage['input_tokens']} input tokens, "
+              f"{usage['output_tokens']} output tokens, {usage['seconds']:.2f}s")
+
+    start = time.perf_counter()
+    parsed = parse_resume_sections(raw_resume, prompt_mode=args.prompt_mode, report=report)
+    print(f"Parsed resume in {time.perf_counter() - start:.2f}s")
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(parsed.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.utlis.rule_parser import strip_accents
+
+VERSION = 1
+
+# Segments are merged into one when there are more than this many.
+MAX_SEGMENTS = 8
+
+# Serial number in its ResumeStore of the record each id was indexed from,
+# -1 for ids not added by `SkillIndex.sync`.
+SERIAL_DTYPE = np.dtype("<i8")
+
+# Delta dtypes of the posting lists, by code, smallest first.
+_DTYPES = (np.dtype("u1"), np.dtype("<u2"), np.dtype("<u4"))
+
+SKILL_ALIASES = {
+    "js": "javascript", "ts": "typescript", "nodejs": "node.js", "node": "node.js",
+    "k8s": "kubernetes", "postgres": "postgresql", "golang": "go", "py": "python",
+    "sklearn": "scikit-learn", "scikit learn": "scikit-learn", "tf": "tensorflow",
+    "ml": "machine learning", "dl": "deep learning", "gcp": "google cloud",
+    "amazon web services": "aws", "ms excel": "excel", "microsoft excel": "excel",
+}
+
+_SPACES = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[^\w+#.]+|[^\w+#]+$")
+_PARENTHESIS = re.compile(r"\(([^)]*)\)")
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\()|(\))|([^\s()"]+)')
+
+
+def normalize_skill(skill: str) -> str:
+    """
+    Normalizes a skill name: lowercase without accents, single spaces,
+    surrounding punctuation removed ("C++" and "C#" kept), common aliases
+    resolved ("K8s" -> "kubernetes").
+    """
+    term = _SPACES.sub(" ", strip_accents(skill).lower()).strip()
+    term = _EDGE_PUNCTUATION.sub("", term)
+    return SKILL_ALIASES.get(term, term)
+
+
+def skill_terms(skill: str) -> Set[str]:
+    """
+    Returns the index terms of a skill: its normalized name, and for
+    "Natural Language Processing (NLP)" both the name and the acronym.
+    """
+    terms = {normalize_skill(_PARENTHESIS.sub("", skill))}
+    terms.update(normalize_skill(inner) for inner in _PARENTHESIS.findall(skill))
+    terms.discard("")
+    return terms
+
+
+def resume_skills(resume) -> Set[str]:
+    """
+    Returns the index terms of the skills of a resume (core skills, tools and
+    technologies, skills and tools used in each role).
+
+    Args:
+        resume: ResumeTemplate or its dict.
+    """
+    if not isinstance(resume, dict):
+        resume = resume.model_dump()
+    section = resume.get("skills_section") or {}
+    skills = list(section.get("core_skills") or []) + list(section.get("tools_and_technologies") or [])
+    for role in resume.get("work_experience") or []:
+        skills += role.get("used_skills_and_tools") or []
+    terms = set()
+    for skill in skills:
+        terms |= skill_terms(skill)
+    return terms
+
+
+def encode_postings(ids: np.ndarray) -> Tuple[int, int, bytes]:
+    """
+    Delta-encodes a sorted posting list with the smallest dtype holding its
+    largest gap.
+
+    Returns:
+        Tuple[int, int, bytes]: First id, dtype code in _DTYPES, and the
+        bytes of the gaps.
+    """
+    gaps = np.diff(ids)
+    largest = int(gaps.max()) if len(gaps) else 0
+    code = next(i for i, dtype in enumerate(_DTYPES) if largest <= np.iinfo(dtype).max)
+    return int(ids[0]), code, gaps.astype(_DTYPES[code]).tobytes()
+
+
+class _Segment:
+    """
+    Immutable part of the index: a term directory `<name>.json` (term ->
+    [first id, count, offset, dtype code]) and the memory-mapped gaps of
+    the posting lists `<name>.bin`.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        with open(os.path.join(directory, f"{name}.json"), "r", encoding="utf-8") as f:
+            self.terms: Dict[str, List[int]] = json.load(f)
+        path = os.path.join(directory, f"{name}.bin")
+        self.data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else b""
+
+    def postings(self, term: str) -> Optional[np.ndarray]:
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        first, count, offset, code = entry
+        dtype = _DTYPES[code]
+        gaps = np.frombuffer(self.data, dtype=dtype, count=count - 1, offset=offset)
+        ids = np.empty(count, dtype=np.uint32)
+        ids[0] = first
+        np.cumsum(gaps, dtype=np.uint32, out=ids[1:])
+        ids[1:] += np.uint32(first)
+        return ids
+
+    @staticmethod
+    def write(directory: str, name: str, postings: Dict[str, np.ndarray]) -> None:
+        """Writes a segment from sorted uint32 posting lists."""
+        terms = {}
+        offset = 0
+        with open(os.path.join(directory, f"{name}.bin"), "wb") as f:
+            for term in sorted(postings):
+                first, code, data = encode_postings(postings[term])
+                terms[term] = [first, len(postings[term]), offset, code]
+                f.write(data)
+                offset += len(data)
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, separators=(",", ":"))
+
+
+class SkillIndex:
+    """
+    Inverted index of resume skills: normalized skill term -> sorted ids of
+    the resumes listing it, for boolean queries such as
+    `python AND (pytorch OR tensorflow) AND NOT java`.
+
+    Ids are row numbers in keys.txt, with the store serial of each resume in
+    serials.bin. Each `add` writes a new segment of delta-encoded posting
+    lists, merged into one when more than MAX_SEGMENTS accumulate, and a new
+    live-<rows>.bin in which the previous id of a re-added key is cleared.
+    meta.json (row count, segment list and live file) is replaced last and
+    is the only file naming them: an interrupted add leaves the index as it
+    was.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {"version": VERSION, "rows": 0, "segments": [], "next_segment": 0}
+        self.keys: List[str] = []
+        keys_path = os.path.join(directory, "keys.txt")
+        if os.path.exists(keys_path):
+            with open(keys_path, "r", encoding="utf-8") as f:
+                self.keys = [line.rstrip("\n") for _, line in zip(range(self.meta["rows"]), f)]
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        self.segments = [_Segment(directory, name) for name in self.meta["segments"]]
+        self._live: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    @property
+    def live(self) -> np.ndarray:
+        """Boolean array over the ids, false for superseded ones."""
+        if self._live is None:
+            rows = self.meta["rows"]
+            path = os.path.join(self.directory, self.meta.get("live", "live.bin"))
+            self._live = (np.fromfile(path, dtype=np.uint8, count=rows).astype(bool) if rows
+                          else np.zeros(0, dtype=bool))
+        return self._live
+
+    @property
+    def serials(self) -> np.ndarray:
+        """Store serial of every id, see SERIAL_DTYPE."""
+        rows = self.meta["rows"]
+        path = os.path.join(self.directory, "serials.bin")
+        serials = (np.fromfile(path, dtype=SERIAL_DTYPE, count=rows) if os.path.exists(path)
+                   else np.zeros(0, dtype=SERIAL_DTYPE))
+        # Indexes built before the serials were kept.
+        return np.concatenate([serials, np.full(rows - len(serials), -1, dtype=SERIAL_DTYPE)])
+
+    def postings(self, term: str) -> np.ndarray:
+        """
+        Returns the sorted ids of the live resumes having a skill term (the
+        term is normalized here).
+        """
+        parts = [ids for ids in (segment.postings(normalize_skill(term)) for segment in self.segments)
+                 if ids is not None]
+        if not parts:
+            return np.zeros(0, dtype=np.uint32)
+        ids = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        return ids[self.live[ids]]
+
+    def terms(self) -> Dict[str, int]:
+        """Returns the document frequency of every term, superseded ids included."""
+        counts: Dict[str, int] = {}
+        for segment in self.segments:
+            for term, entry in segment.terms.items():
+                counts[term] = counts.get(term, 0) + entry[1]
+        return counts
+
+    def add(self, items: Iterable[Tuple[str, object]],
+            serials: Optional[Dict[str, int]] = None) -> int:
+        """
+        Indexes (key, resume) pairs in a new segment.
+
+        Args:
+            items: Keys with their ResumeTemplate or dict.
+            serials (Dict[str, int], optional): ResumeStore serial of the
+                record of each key.
+
+        Returns:
+            int: Number of resumes added.
+        """
+        keys, postings = [], {}
+        row = self.meta["rows"]
+        for key, resume in items:
+            if "\n" in key:
+                raise ValueError(f"Keys cannot contain newlines: {key!r}")
+            for term in resume_skills(resume):
+                postings.setdefault(term, []).append(row)
+            keys.append(key)
+            row += 1
+        return self.add_postings(keys, {term: np.asarray(ids, dtype=np.uint32)
+                                        for term, ids in postings.items()},
+                                 [serials.get(key, -1) for key in keys] if serials else None)
+
+    def add_postings(self, keys: Sequence[str], postings: Dict[str, np.ndarray],
+                     serials: Optional[Sequence[int]] = None) -> int:
+        """
+        Adds resumes from precomputed posting lists, whose ids count from the
+        current number of rows.
+
+        Args:
+            serials (Sequence[int], optional): Store serial of each resume
+                (default: -1).
+
+        Returns:
+            int: Number of resumes added.
+        """
+        if not keys:
+            return 0
+        rows = self.meta["rows"]
+        serials = np.full(len(keys), -1, dtype=SERIAL_DTYPE) if serials is None else serials
+        serials = np.ascontiguousarray(serials, dtype=SERIAL_DTYPE)
+        if len(serials) != len(keys):
+            raise ValueError(f"Got {len(serials)} serials for {len(keys)} keys")
+
+        # Staged first, unnamed by meta.json: the segment, the keys and
+        # serials past the committed row count, and the new live file.
+        name = f"segment-{self.meta['next_segment']:06d}"
+        _Segment.write(self.directory, name, postings)
+        with open(os.path.join(self.directory, "keys.txt"), "a", encoding="utf-8") as f:
+            f.truncate(sum(len(key.encode("utf-8")) + 1 for key in self.keys))
+            f.writelines(f"{key}\n" for key in keys)
+        with open(os.path.join(self.directory, "serials.bin"), "ab") as f:
+            f.truncate(rows * SERIAL_DTYPE.itemsize)
+            f.write(serials.tobytes())
+        live = np.concatenate([self.live.astype(np.uint8), np.ones(len(keys), dtype=np.uint8)])
+        live[[self._rows[key] for key in keys if key in self._rows]] = 0
+        old_live = os.path.join(self.directory, self.meta.get("live", "live.bin"))
+        live_name = f"live-{rows + len(keys)}.bin"
+        live.tofile(os.path.join(self.directory, live_name))
+
+        self.meta["rows"] = rows + len(keys)
+        self.meta["segments"].append(name)
+        self.meta["next_segment"] += 1
+        self.meta["live"] = live_name
+        self._write_meta()
+
+        for row, key in enumerate(keys, rows):
+            self._rows[key] = row
+        self.keys.extend(keys)
+        self._live = live.astype(bool)
+        self.segments.append(_Segment(self.directory, name))
+        try:
+            os.remove(old_live)
+        except OSError:
+            pass  # Missing (empty index).
+        if len(self.segments) > MAX_SEGMENTS:
+            self.merge()
+        return len(keys)
+
+    def _write_meta(self) -> None:
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def merge(self) -> None:
+        """
+        Merges all the segments into one, dropping superseded ids.
+        """
+        postings = {}
+        for term in self.terms():
+            ids = self.postings(term)
+            if len(ids):
+                postings[term] = ids
+        old = self.meta["segments"]
+        name = f"segment-{self.meta['next_segment']:06d}"
+        _Segment.write(self.directory, name, postings)
+        self.meta["segments"] = [name]
+        self.meta["next_segment"] += 1
+        self._write_meta()
+        self.segments = [_Segment(self.directory, name)]
+        for segment_name in old:
+            for extension in ("json", "bin"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{segment_name}.{extension}"))
+                except OSError:
+                    pass  # Still mapped (Windows): removed by a later merge.
+
+    def sync(self, store) -> int:
+        """
+        Indexes the resumes of a ResumeStore that are not in the index yet,
+        or whose record was replaced since they were indexed.
+
+        Returns:
+            int: Number of resumes added.
+        """
+        serials = store.serials()
+        known = self.serials
+        stale = [key for key in store.keys()
+                 if key not in self._rows or known[self._rows[key]] != serials[key]]
+        if len(stale) > len(store) // 10:
+            wanted = set(stale)
+            records = (item for item in store.items(trusted=True) if item[0] in wanted)
+        else:
+            records = ((key, store.get(key, trusted=True)) for key in stale)
+        return self.add(records, serials)
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Evaluates a boolean query, see `parse_query`.
+
+        Returns:
+            np.ndarray: Sorted ids of the matching live resumes.
+        """
+        return self._evaluate(parse_query(query))
+
+    def search_keys(self, query: str) -> List[str]:
+        """Returns the keys of the resumes matching a boolean query."""
+        return [self.keys[row] for row in self.search(query)]
+
+    def _evaluate(self, node) -> np.ndarray:
+        op = node[0]
+        if op == "term":
+            return self.postings(node[1])
+        if op == "not":
+            mask = self.live.copy()
+            mask[self._evaluate(node[1])] = False
+            return np.flatnonzero(mask).astype(np.uint32)
+        if op == "or":
+            mask = np.zeros(len(self.live), dtype=bool)
+            for child in node[1]:
+                mask[self._evaluate(child)] = True
+            return np.flatnonzero(mask).astype(np.uint32)
+        # AND: filter the smallest positive operand by binary search in the
+        # others, then drop the negated operands instead of complementing them.
+        positive = sorted((self._evaluate(child) for child in node[1] if child[0] != "not"), key=len)
+        negative = [child[1] for child in node[1] if child[0] == "not"]
+        result = positive[0] if positive else np.flatnonzero(self.live).astype(np.uint32)
+        for ids in positive[1:]:
+            if not len(result):
+                break
+            result = result[self._contains(ids, result)]
+        for child in negative:
+            if not len(result):
+                break
+            result = result[~self._contains(self._evaluate(child), result)]
+        return result
+
+    def _contains(self, ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Returns which of `values` are in the sorted array `ids`: by binary
+        search for few values, with a bitmap over all the ids otherwise.
+        """
+        if not len(ids):
+            return np.zeros(len(values), dtype=bool)
+        if len(values) > len(self.live) // 64:
+            bitmap = np.zeros(len(self.live), dtype=bool)
+            bitmap[ids] = True
+            return bitmap[values]
+        positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+        return ids[positions] == values
+
+
+def parse_query(query: str):
+    """
+    Parses a boolean skill query into a tree of ("term", skill), ("not",
+    node), ("and", [nodes]) and ("or", [nodes]).
+
+    AND, OR and NOT are uppercase operators, NOT binding tightest and AND
+    before OR; parentheses group. Consecutive words form one skill
+    ("machine learning AND python"), double quotes protect operators and
+    parentheses inside a skill name.
+
+    Raises:
+        ValueError: If the query is malformed.
+    """
+    tokens = []
+    for quoted, opening, closing, word in _QUERY_TOKEN.findall(query):
+        if opening or closing:
+            tokens.append(opening or closing)
+        elif word in ("AND", "OR", "NOT"):
+            tokens.append(word)
+        else:
+            term = quoted if quoted else word
+            if tokens and isinstance(tokens[-1], list):
+                tokens[-1].append(term)
+            else:
+                tokens.append([term])
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        children = [parse_and()]
+        while peek() == "OR":
+            advance()
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and():
+        children = [parse_not()]
+        while peek() == "AND":
+            advance()
+            children.append(parse_not())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_not():
+        if peek() == "NOT":
+            advance()
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token == "(":
+            advance()
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError(f"Missing closing parenthesis in query {query!r}")
+            advance()
+            return node
+        if isinstance(token, list):
+            advance()
+            return ("term", " ".join(token))
+        raise ValueError(f"Expected a skill at {token or 'end'!r} in query {query!r}")
+
+    node = parse_or()
+    if peek() is not None:
+        raise ValueError(f"Unexpected {peek()!r} in query {query!r}")
+    return node
+
+
+def _bench(args) -> None:
+    rng = np.random.default_rng(0)
+    n = args.resumes
+    # Zipf-like skill popularity: a few skills are on most resumes.
+    weights = 1.0 / np.arange(1, args.vocabulary + 1) ** 1.1
+    weights /= weights.sum()
+    skills_per_resume = rng.integers(5, 30, n)
+    docs = np.repeat(np.arange(n, dtype=np.uint32), skills_per_resume)
+    terms = rng.choice(args.vocabulary, size=len(docs), p=weights)
+    pairs = np.unique(terms.astype(np.uint64) << np.uint64(32) | docs)
+    terms, docs = (pairs >> np.uint64(32)).astype(np.int64), (pairs & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    bounds = np.searchsorted(terms, np.arange(args.vocabulary + 1))
+    names = ["python", "pytorch", "docker", "java", "kubernetes", "aws", "sql", "react"]
+    names += [f"skill-{i}" for i in range(len(names), args.vocabulary)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = SkillIndex(directory)
+        start = time.perf_counter()
+        batch = n // args.segments
+        for first in range(0, n, batch):
+            last = min(first + batch, n)
+            postings = {}
+            for term in range(args.vocabulary):
+                ids = docs[bounds[term]:bounds[term + 1]]
+                ids = ids[(ids >= first) & (ids < last)]
+                if len(ids):
+                    postings[names[term]] = ids
+            index.add_postings([f"resume-{i:07d}" for i in range(first, last)], postings)
+        build = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                   if name.endswith(".bin") and name.startswith("segment"))
+        print(f"Indexed {n} resumes, {len(docs)} postings in {build:.2f}s, "
+              f"{len(index.segments)} segments, {size / len(docs):.2f} bytes/posting")
+
+        index = SkillIndex(directory)
+        queries = ["python AND pytorch AND docker", "python OR java", "java AND NOT python",
+                   "(pytorch OR kubernetes) AND aws AND NOT react", "skill-500 AND skill-900",
+                   "NOT sql"]
+        for query in queries:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                count = len(index.search(query))
+                timings.append(time.perf_counter() - start)
+            print(f"{query:>48}: {count} resumes, {np.median(timings) * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inverted index of resume skills.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index the resumes of a store missing from the index.")
+    build.add_argument("store", help="ResumeStore data file.")
+    build.add_argument("index", help="Skill index directory.")
+    search = sub.add_parser("search", help="Print the keys of the resumes matching a query.")
+    search.add_argument("index", help="Skill index directory.")
+    search.add_argument("query", help='Boolean query, e.g. "python AND (pytorch OR tensorflow)".')
+    search.add_argument("--limit", type=int, default=20, help="Number of keys printed.")
+    merge = sub.add_parser("merge", help="Merge the segments and drop superseded resumes.")
+    merge.add_argument("index", help="Skill index directory.")
+    bench = sub.add_parser("bench", help="Time queries over synthetic resumes.")
+    bench.add_argument("--resumes", type=int, default=1_000_000, help="Number of resumes.")
+    bench.add_argument("--vocabulary", type=int, default=5000, help="Number of distinct skills.")
+    bench.add_argument("--segments", type=int, default=4, help="Number of add batches.")
+    bench.add_argument("--repeat", type=int, default=10, help="Runs per query.")
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        _bench(args)
+    elif args.command == "build":
+        from app.utlis.resume_store import ResumeStore
+
+        index = SkillIndex(args.index)
+        start = time.perf_counter()
+        added = index.sync(ResumeStore(args.store))
+        print(f"Indexed {added} resumes in {time.perf_counter() - start:.2f}s, {len(index)} resumes")
+    elif args.command == "merge":
+        SkillIndex(args.index).merge()
+    else:
+        index = SkillIndex(args.index)
+        start = time.perf_counter()
+        keys = index.search_keys(args.query)
+        elapsed = time.perf_counter() - start
+        for key in keys[:args.limit]:
+            print(key)
+        print(f"{len(keys)} of {len(index)} resumes match ({elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
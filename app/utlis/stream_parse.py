@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import time
+import typing
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.utlis.extract_resume_part import (MODEL, PROMPT_MODES, ResumeTemplate, build_system_prompt,
+                                           response_usage)
+from app.utlis.metrics import track_call
+
+
+class PartialSection(NamedTuple):
+    """
+    Part of a resume validated while the response streams in.
+
+    kind is "item" for one element of a list field (`index` is its
+    position), "field" for a complete top-level field and "resume" for the
+    final ResumeTemplate.
+    """
+    kind: str
+    field: Optional[str]
+    index: Optional[int]
+    value: object
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(field: str) -> TypeAdapter:
+    return TypeAdapter(ResumeTemplate.model_fields[field].annotation)
+
+
+@lru_cache(maxsize=None)
+def _item_adapter(field: str) -> Optional[TypeAdapter]:
+    """Adapter of the items of a list field (None for other fields)."""
+    annotation = ResumeTemplate.model_fields[field].annotation
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if typing.get_origin(candidate) in (list, List):
+            return TypeAdapter(typing.get_args(candidate)[0])
+    return None
+
+
+class IncrementalResumeScanner:
+    """
+    Scans the JSON text of a ResumeTemplate as it streams in and validates
+    every top-level field, and every item of the list fields, as soon as its
+    closing token arrives.
+
+    Only string, bracket and separator tokens are tracked, so each character
+    is looked at once; the completed spans are then validated with the
+    TypeAdapter of their field. Deltas are kept as a list of chunks, joined
+    only when a span completes, and dropped once no open span needs them, so
+    a character-by-character stream stays linear.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._base = 0  # Position of the first kept character.
+        self._length = 0  # Characters fed so far.
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._field: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._value_is_array = False
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+
+    def feed(self, delta: str) -> List[PartialSection]:
+        """
+        Consumes the next piece of JSON text.
+
+        Returns:
+            List[PartialSection]: Fields and list items completed by `delta`
+            that match their model.
+        """
+        completed = []
+        start = self._length
+        self._chunks.append(delta)
+        self._length += len(delta)
+        for i, c in enumerate(delta, start):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._field = json.loads(self._span(self._key_start, i + 1))
+                        self._key_start = None
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = i
+                elif self._depth == 2 and self._value_is_array and self._item_start is None:
+                    self._item_start = i
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    self._value_is_array = c == "["
+                    self._item_index = 0
+                elif self._depth == 3 and self._value_is_array and self._item_start is None:
+                    self._item_start = i
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._item_start is not None:
+                    completed += self._item(self._span(self._item_start, i + 1))
+                elif self._depth == 1 and self._item_start is not None:
+                    completed += self._item(self._span(self._item_start, i))  # Last scalar item.
+                if self._depth == 1:
+                    completed += self._value(self._span(self._value_start, i + 1))
+                elif self._depth == 0 and self._value_start is not None:
+                    completed += self._value(self._span(self._value_start, i))  # Last scalar field.
+            elif c == ":" and self._depth == 1:
+                self._value_start = i + 1
+            elif c == ",":
+                if self._depth == 1 and self._value_start is not None:
+                    completed += self._value(self._span(self._value_start, i))
+                elif self._depth == 2 and self._item_start is not None:
+                    completed += self._item(self._span(self._item_start, i))
+            elif (self._depth == 2 and self._value_is_array and self._item_start is None
+                  and not c.isspace()):
+                self._item_start = i
+        if self._key_start is None and self._value_start is None and self._item_start is None:
+            self._chunks = []
+            self._base = self._length
+        return completed
+
+    def _span(self, start: int, stop: int) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0][start - self._base:stop - self._base]
+
+    def _item(self, span: str) -> List[PartialSection]:
+        self._item_start = None
+        index = self._item_index
+        self._item_index += 1
+        adapter = _item_adapter(self._field) if self._field in ResumeTemplate.model_fields else None
+        if adapter is None:
+            return []
+        try:
+            return [PartialSection("item", self._field, index, adapter.validate_json(span))]
+        except ValidationError:
+            return []
+
+    def _value(self, span: str) -> List[PartialSection]:
+        field, self._field, self._value_start = self._field, None, None
+        if field not in ResumeTemplate.model_fields:
+            return []
+        try:
+            return [PartialSection("field", field, None, _field_adapter(field).validate_json(span))]
+        except ValidationError:
+            return []
+
+
+def _request(raw_resume: str, prompt_mode: str) -> dict:
+    return {
+        "model": MODEL,
+        "input": [
+            {"role": "system", "content": build_system_prompt(prompt_mode)},
+            {"role": "user", "content": raw_resume},
+        ],
+        "temperature": 0.0,
+        "text_format": ResumeTemplate,
+    }
+
+
+def _final_resume(response) -> ResumeTemplate:
+    parsed = response.output_parsed
+    if not isinstance(parsed, ResumeTemplate):
+        raise ValueError("La réponse n'est pas conforme au modèle ResumeTemplate")
+    return parsed
+
+
+def parse_resume_streaming(raw_resume: str, on_section: Callable[[PartialSection], None],
+                           client=None, prompt_mode: str = "full", metrics=None) -> ResumeTemplate:
+    """
+    Parses a resume with a streamed response, calling `on_section` with every
+    field and list item as soon as it is complete and valid.
+
+    Args:
+        raw_resume (str): Extracted resume text.
+        on_section (callable): Called with each PartialSection, in the order
+            of the JSON output.
+        client (OpenAI, optional): Client to use, defaults to
+            `get_openai_client()`.
+        prompt_mode (str): Schema embedded in the prompt, one of PROMPT_MODES.
+        metrics (MetricsRecorder, optional): Recorder of the API call metrics.
+
+    Returns:
+        ResumeTemplate: The complete validated resume.
+
+    Raises:
+        ValueError: If the final response does not match ResumeTemplate.
+    """
+    from app.utlis.extract_resume_part import get_openai_client
+
+    client = client or get_openai_client()
+    scanner = IncrementalResumeScanner()
+    start = time.perf_counter()
+    with track_call(metrics, MODEL) as call:
+        with client.responses.stream(**_request(raw_resume, prompt_mode)) as stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    for section in scanner.feed(event.delta):
+                        on_section(section)
+            response = stream.get_final_response()
+        call.set_usage(response_usage(response, time.perf_counter() - start))
+        try:
+            return _final_resume(response)
+        except ValueError:
+            call.validation_failed = True
+            raise
+
+
+async def stream_resume_sections(raw_resume: str, client=None, prompt_mode: str = "full",
+                                 metrics=None) -> AsyncIterator[PartialSection]:
+    """
+    Parses a resume with a streamed response and yields every field and list
+    item as soon as it is complete and valid, then the whole resume as a
+    PartialSection of kind "resume".
+
+    Args:
+        raw_resume (str): Extracted resume text.
+        client (AsyncOpenAI, optional): Client to use, defaults to
+            `get_async_openai_client()`.
+        prompt_mode (str): Schema embedded in the prompt, one of PROMPT_MODES.
+        metrics (MetricsRecorder, optional): Recorder of the API call metrics.
+
+    Raises:
+        ValueError: If the final response does not match ResumeTemplate.
+    """
+    from app.utlis.extract_resume_part import get_async_openai_client
+
+    client = client or get_async_openai_client()
+    scanner = IncrementalResumeScanner()
+    start = time.perf_counter()
+    with track_call(metrics, MODEL) as call:
+        async with client.responses.stream(**_request(raw_resume, prompt_mode)) as stream:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    for section in scanner.feed(event.delta):
+                        yield section
+            response = await stream.get_final_response()
+        call.set_usage(response_usage(response, time.perf_counter() - start))
+        try:
+            resume = _final_resume(response)
+        except ValueError:
+            call.validation_failed = True
+            raise
+    yield PartialSection("resume", None, None, resume)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Parse a resume, printing each section as soon as it is streamed.")
+    parser.add_argument("--input", default="CV_original.txt", help="Raw resume text file.")
+    parser.add_argument("--output", default="parsed_resume.json", help="Parsed resume JSON file.")
+    parser.add_argument("--prompt-mode", choices=PROMPT_MODES, default="full",
+                        help="Schema embedded in the prompt: pretty-printed, minified or none.")
+    args = parser.parse_args(argv)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        raw_resume = f.read()
+
+    async def run():
+        start = time.perf_counter()
+        async for section in stream_resume_sections(raw_resume, prompt_mode=args.prompt_mode):
+            label = section.field if section.index is None else f"{section.field}[{section.index}]"
+            print(f"{time.perf_counter() - start:6.2f}s  {section.kind:>6}  {label or ''}")
+            if section.kind == "resume":
+                with open(args.output, "w", encoding="utf-8") as f:
+                    f.write(section.value.model_dump_json(indent=2))
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
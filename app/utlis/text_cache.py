@@ -0,0 +1,128 @@
+import hashlib
+import os
+from typing import Optional
+
+
+class TextCache:
+    """
+    Content-addressed on-disk cache for extracted resume text.
+
+    Entries are keyed by a SHA-256 of the file bytes plus the extractor
+    version, so re-uploads of the same document hit the cache whatever their
+    name, and upgrading the extractor invalidates every entry at once.
+    The store is capped in bytes and evicts least recently used entries
+    (entry mtimes are bumped on every hit).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Directory holding the cache entries.
+            max_bytes (int): Maximum total size of the stored text.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path, _ in self._entries())
+
+    @staticmethod
+    def key_for(filepath, version: str) -> str:
+        """
+        Computes the cache key of a file.
+
+        Args:
+            filepath: Path to the file, its content as a bytes-like object, or
+                a seekable binary file object (rewound to where it was).
+            version (str): Version of the extractor producing the text.
+
+        Returns:
+            str: Hex digest identifying the file content and extractor.
+        """
+        digest = hashlib.sha256(version.encode("utf-8") + b"\0")
+        if isinstance(filepath, (bytes, bytearray, memoryview)):
+            digest.update(filepath)
+        elif isinstance(filepath, (str, os.PathLike)):
+            with open(filepath, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        else:
+            position = filepath.tell()
+            for block in iter(lambda: filepath.read(1024 * 1024), b""):
+                digest.update(block)
+            filepath.seek(position)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".txt")
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".txt"):
+                    yield entry.path, entry.stat().st_mtime_ns
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached text for `key`, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                text = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Stores `text` under `key`, evicting old entries if the cap is exceeded.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            previous_size = os.path.getsize(path)
+        except FileNotFoundError:
+            previous_size = 0
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        # An overwritten entry is replaced, not added.
+        self._size += os.path.getsize(path) - previous_size
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used entries until the store fits its cap.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self._size = sum(os.path.getsize(path) for path, _ in entries)
+        for path, _ in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current size of the store.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": self._size,
+        }
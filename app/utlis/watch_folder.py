@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from functools import partial
+from multiprocessing import Pool
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.utlis.batch_extract import SUPPORTED_EXTENSIONS, extract_record
+
+MANIFEST_VERSION = 1
+
+# The manifest is rewritten after this many processed files, so an
+# interrupted run keeps most of its progress.
+SAVE_EVERY = 100
+
+# Failed files are retried on the next runs after an exponential backoff,
+# from RETRY_BASE seconds up to RETRY_MAX seconds between attempts.
+RETRY_BASE = 60.0
+RETRY_MAX = 24 * 3600.0
+
+# Extraction failures that a retry cannot fix: the file is only tried again
+# once it changes, or once the limits it failed under change.
+PERMANENT_ERRORS = ("ExtractionLimitError:", "ValueError: Unsupported file format")
+
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    """
+    Loads the manifest of already processed files (empty if missing).
+
+    Returns:
+        Dict[str, dict]: Path relative to the watched folder -> entry with
+        size, mtime_ns, sha256, text/parsed output paths and error, plus the
+        attempt count and retry time of failed files, or the limits of
+        permanently failed ones.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["files"]
+
+
+def save_manifest(path: str, files: Dict[str, dict]) -> None:
+    """
+    Writes the manifest atomically.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f)
+    os.replace(tmp_path, path)
+
+
+def iter_folder(folder: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Walks `folder` with os.scandir, yielding (relative path, stat) for every
+    supported file. This is the only per-file work done on unchanged files.
+    """
+    stack = [folder]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(SUPPORTED_EXTENSIONS) and entry.is_file():
+                    yield os.path.relpath(entry.path, folder), entry.stat()
+
+
+def _due(entry: dict, now: float, limits: list) -> bool:
+    """
+    Returns whether an unchanged file that failed should be tried again.
+    """
+    if entry["error"] is None:
+        return False
+    if entry.get("permanent"):
+        return entry.get("limits") != limits
+    return entry.get("retry_at", 0) <= now
+
+
+def scan(folder: str, files: Dict[str, dict], now: Optional[float] = None,
+         limits: Optional[list] = None):
+    """
+    Compares the folder with the manifest using size and mtime only. Failed
+    files are also returned once their retry time has passed, and files that
+    failed permanently once the extraction limits change.
+
+    Args:
+        now (float, optional): Current time.time(), for the retries.
+        limits (list, optional): [max_bytes, max_pages, timeout] of the run.
+
+    Returns:
+        tuple: (dict of new or modified relative paths to their stat, list
+        of relative paths that disappeared since the last run).
+    """
+    now = time.time() if now is None else now
+    seen = set()
+    changed = {}
+    for relpath, stat in iter_folder(folder):
+        seen.add(relpath)
+        entry = files.get(relpath)
+        if (entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns
+                or _due(entry, now, limits or [None, None, None])):
+            changed[relpath] = stat
+    removed = [relpath for relpath in files if relpath not in seen]
+    return changed, removed
+
+
+def run_once(folder: str, manifest_path: str, output_dir: str, parse: bool = False,
+             dedup_dir: Optional[str] = None, workers: Optional[int] = None,
+             max_bytes: Optional[int] = None, max_pages: Optional[int] = None,
+             timeout: Optional[float] = None) -> dict:
+    """
+    Processes the files of `folder` that are new or changed since the last run.
+
+    Changed files, and failed files due for a retry, are extracted across a
+    process pool. Their text is written to `output_dir` as <sha256>.txt and,
+    with `parse`, their parsed resume as <sha256>.json. A file whose content
+    hash did not change (touched, copied back) is not parsed again.
+
+    Files over a limit or of an unsupported format are marked as permanent
+    failures and not retried; other failures are retried with backoff.
+
+    Args:
+        folder (str): Watched folder.
+        manifest_path (str): Manifest of processed files.
+        output_dir (str): Directory for the extracted text and parsed JSON.
+        parse (bool): Also parse the resumes with the OpenAI API.
+        dedup_dir (str, optional): Reuse parses of near-duplicates, see
+            `extract_resume_part.parse_resume_deduplicated`.
+        workers (int, optional): Extraction processes (default: one per CPU).
+        max_bytes (int, optional): Skip larger files.
+        max_pages (int, optional): Skip PDFs with more pages.
+        timeout (float, optional): Seconds allowed per file.
+
+    Returns:
+        dict: Counts of scanned, processed, parsed, failed and removed files.
+    """
+    files = load_manifest(manifest_path)
+    limits = [max_bytes, max_pages, timeout]
+    changed, removed = scan(folder, files, limits=limits)
+    for relpath in removed:
+        del files[relpath]
+    stats = {"scanned": len(files.keys() | changed.keys()),
+             "processed": 0, "parsed": 0, "errors": 0, "removed": len(removed)}
+    if not changed:
+        if removed:
+            save_manifest(manifest_path, files)
+        return stats
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(folder, relpath) for relpath in changed]
+    # One near-duplicate index for the run, written when it ends.
+    if parse and dedup_dir:
+        from app.utlis.near_duplicates import DedupStore
+
+        dedup_context = DedupStore(dedup_dir)
+    else:
+        dedup_context = nullcontext()
+    with dedup_context as dedup, Pool(processes=workers) as pool:
+        extract = partial(extract_record, max_bytes=max_bytes, max_pages=max_pages, timeout=timeout)
+        for record in pool.imap_unordered(extract, paths):
+            relpath = os.path.relpath(record["path"], folder)
+            # Stat from the scan: a file modified while being extracted is
+            # then seen as changed again on the next run.
+            stat = changed[relpath]
+            previous = files.get(relpath, {})
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": record["sha256"],
+                     "text": None, "parsed": None, "error": record["error"]}
+            if record["error"] is None:
+                stem = os.path.join(output_dir, record["sha256"])
+                entry["text"] = stem + ".txt"
+                with open(entry["text"], "w", encoding="utf-8") as f:
+                    f.write(record["text"])
+                if previous.get("sha256") == record["sha256"]:
+                    entry["parsed"] = previous.get("parsed")
+                if parse and not entry["parsed"]:
+                    try:
+                        entry["parsed"] = _parse(record["text"], stem + ".json", dedup)
+                        stats["parsed"] += 1
+                    except Exception as e:
+                        entry["error"] = f"{type(e).__name__}: {e}"
+            if record["error"] is not None and record["error"].startswith(PERMANENT_ERRORS):
+                entry["permanent"] = True
+                entry["limits"] = limits
+            elif entry["error"] is not None:
+                # Transient failures (timeouts, 429/5xx) are retried with
+                # backoff; the count restarts when the file changes.
+                same_file = (previous.get("size"), previous.get("mtime_ns")) == (stat.st_size,
+                                                                                 stat.st_mtime_ns)
+                entry["attempts"] = previous.get("attempts", 0) + 1 if same_file else 1
+                entry["retry_at"] = time.time() + min(RETRY_MAX,
+                                                      RETRY_BASE * 2 ** (entry["attempts"] - 1))
+            files[relpath] = entry
+            stats["processed"] += 1
+            stats["errors"] += entry["error"] is not None
+            if stats["processed"] % SAVE_EVERY == 0:
+                if dedup is not None:
+                    dedup.save()
+                save_manifest(manifest_path, files)
+    save_manifest(manifest_path, files)
+    return stats
+
+
+def _parse(text: str, output_path: str, dedup) -> str:
+    from app.utlis.extract_resume_part import parse_resume, parse_resume_deduplicated
+
+    if dedup is not None:
+        parsed, _, _ = parse_resume_deduplicated(text, dedup)
+    else:
+        parsed = parse_resume(text)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(parsed.model_dump_json(indent=2))
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract (and optionally parse) only the new or changed CVs of a folder.")
+    parser.add_argument("folder", help="Folder to ingest.")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for text and parsed JSON.")
+    parser.add_argument("--manifest", help="Manifest file (default: <output-dir>/manifest.json).")
+    parser.add_argument("--parse", action="store_true", help="Also parse the resumes with the OpenAI API.")
+    parser.add_argument("--dedup-dir", help="Reuse parses of near-duplicate resumes stored here.")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Extraction processes (default: one per CPU).")
+    parser.add_argument("--max-bytes", type=int, default=None, help="Skip larger files.")
+    parser.add_argument("--max-pages", type=int, default=None, help="Skip PDFs with more pages.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per file.")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Keep polling the folder at this interval instead of running once.")
+    args = parser.parse_args(argv)
+    manifest_path = args.manifest or os.path.join(args.output_dir, "manifest.json")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    while True:
+        start = time.perf_counter()
+        stats = run_once(args.folder, manifest_path, args.output_dir, args.parse,
+                         args.dedup_dir, args.workers, args.max_bytes, args.max_pages, args.timeout)
+        print(f"{stats['scanned']} files, {stats['processed']} processed, {stats['parsed']} parsed, "
+              f"{stats['errors']} errors, {stats['removed']} removed "
+              f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
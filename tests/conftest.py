@@ -0,0 +1,35 @@
+import pytest
+
+RESUME_TEXT = """Amina Diallo
+Data Engineer
+amina.diallo@example.com | +33 6 12 34 56 78
+
+PROFESSIONAL SUMMARY
+Data engineer building batch and streaming pipelines.
+
+PROFESSIONAL EXPERIENCE
+Data Engineer, Acme Analytics | Paris
+2021 - Present
+• Built a Spark pipeline in Python
+• Deployed Airflow on Kubernetes
+
+Software Developer, Orange | Rennes
+2018 - 2020
+• Maintained a REST API in Java
+
+EDUCATION
+Master of Science in Computer Science, Université de Rennes
+2018
+
+SKILLS
+Python, Spark, Airflow, Kubernetes, Java
+
+LANGUAGES
+French (Native) • English (Fluent)
+"""
+
+
+@pytest.fixture
+def resume_text() -> str:
+    return RESUME_TEXT
+
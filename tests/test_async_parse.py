@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from app.utlis import client_pool
+from app.utlis.async_parse import AsyncResumeParser
+from app.utlis.fake_llm_server import FakeLLMServer, FakeLLMSettings, synthetic_inputs
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    settings = dict(client_pool._settings)
+    with FakeLLMServer(FakeLLMSettings(latency=0.01, latency_sigma=0.0, error_429=0.5,
+                                       retry_after=0.01, seed=3)) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "fake-key")
+        client_pool.configure(reset_timeout=0.2)
+        yield server
+    client_pool.configure(**settings)
+
+
+def _parse_all(items, **options):
+    async def run():
+        engine = AsyncResumeParser(concurrency=8, max_retries=10, **options)
+        return [result async for result in engine.parse_many(items)], engine
+
+    return asyncio.run(run())
+
+
+def test_rate_limit_burst_does_not_open_the_circuit(fake_api):
+    results, engine = _parse_all(synthetic_inputs(30, experiences=1))
+    assert [result.error for result in results] == [None] * 30
+    assert fake_api.stats["429"] > 0
+    assert client_pool.get_breaker().state == "closed"
+    assert engine.concurrency.limit < 8
+
+
+def test_open_circuit_is_waited_out(fake_api):
+    breaker = client_pool.get_breaker()
+    for _ in range(breaker.failure_threshold):
+        breaker.on_failure()
+    assert breaker.state == "open"
+    results, _ = _parse_all(synthetic_inputs(10, experiences=1))
+    assert [result.error for result in results] == [None] * 10
+    assert all(result.attempts > 1 for result in results)
+    assert breaker.state == "closed"
@@ -0,0 +1,108 @@
+import os
+from datetime import date
+
+import pytest
+
+from app.utlis.features import (DEGREE_LEVELS, FeatureTable, canonical_language, degree_level,
+                                experience_months, month_index)
+from app.utlis.extract_resume_part import ResumeTemplate
+from app.utlis.resume_store import ResumeStore
+
+
+def _resume(name: str, degree: str) -> ResumeTemplate:
+    return ResumeTemplate(contact_info={"name": name}, professional_summary="",
+                          skills_section={"core_skills": []}, work_experience=[],
+                          education=[{"institution": "University", "degree": degree,
+                                      "field_of_study": ""}])
+
+
+def test_month_index():
+    assert month_index("2020-03", 0) == 2020 * 12 + 2
+    assert month_index("Mar 2020", 0) == 2020 * 12 + 2
+    assert month_index("2020", 0) == 2020 * 12
+    assert month_index("Present", 42) == 42
+    assert month_index("unknown", 42) is None
+
+
+def test_experience_months_counts_overlaps_once():
+    roles = [{"start_date": "2020-01", "end_date": "2020-12"},
+             {"start_date": "2020-06", "end_date": "2021-05"},
+             {"start_date": "2023-01", "end_date": None}]
+    assert experience_months(roles, as_of=2023 * 12 + 11) == 17 + 12
+
+
+@pytest.mark.parametrize("degree, level", [
+    ("Master of Science in Computer Science", "master"),
+    ("MS in Data Science", "master"),
+    ("MS Office certificate", "unknown"),
+    ("BA (Hons) History", "bachelor"),
+    ("BS", "bachelor"),
+    ("Bac S", "secondary"),
+    ("Bac + 5", "master"),
+    ("PhD Physics", "doctorate"),
+])
+def test_degree_level(degree, level):
+    assert DEGREE_LEVELS[degree_level(degree)] == level
+
+
+def test_canonical_language():
+    assert canonical_language("Anglais (courant)") == "english"
+    assert canonical_language("  ") is None
+
+
+def test_ongoing_roles_are_counted_to_the_query_date(tmp_path):
+    table = FeatureTable(str(tmp_path))
+    ongoing = {"work_experience": [{"start_date": "2020-01", "end_date": "Present"}]}
+    ended = {"work_experience": [{"start_date": "2020-01", "end_date": "2021-12"}]}
+    table.append([("ongoing", ongoing), ("ended", ended)], as_of=date(2022, 12, 1))
+    table.append([("later", ongoing)], as_of=date(2024, 12, 1))
+    table = FeatureTable(str(tmp_path))
+    assert table.months(date(2024, 12, 1)).tolist() == [60, 24, 60]
+    assert table.filter(min_months=48, as_of=date(2024, 12, 1)) == ["ongoing", "later"]
+    # A query date before a row's as_of keeps the months stored for that row.
+    assert table.filter(min_months=48, as_of=date(2023, 1, 1)) == ["later"]
+
+
+def test_filters(tmp_path):
+    table = FeatureTable(str(tmp_path))
+    master = {"education": [{"degree": "MSc Data Science", "graduation_year": 2018}],
+              "language_proficiency": [{"language": "English"}, {"language": "Français"}]}
+    bachelor = {"education": [{"degree": "Bachelor of Arts", "graduation_year": 2018}]}
+    table.append([("master", master), ("none", {})], as_of=date(2024, 1, 1))
+    table.append([("none", bachelor)], as_of=date(2024, 1, 1))
+    assert len(table) == 2
+    assert table.filter(min_degree="bachelor") == ["master", "none"]
+    assert table.filter(min_degree="master") == ["master"]
+    assert table.filter(languages=["english", "french"]) == ["master"]
+    assert table.filter(languages=["german"]) == []
+    assert table.filter(max_graduation_year=2018) == ["master", "none"]
+
+
+def test_sync_refreshes_replaced_records(tmp_path):
+    store = ResumeStore(str(tmp_path / "store.jsonl"))
+    store.append_many([("a", _resume("A", "Bachelor of Science")), ("b", _resume("B", ""))])
+    table = FeatureTable(str(tmp_path / "table"))
+    assert table.sync(store) == 2 and table.sync(store) == 0
+    store.append("a", _resume("A", "PhD Physics"))
+    assert table.sync(store) == 1
+    table = FeatureTable(str(tmp_path / "table"))
+    assert table.filter(min_degree="doctorate") == ["a"]
+    assert table.filter(min_degree="bachelor") == ["a"]
+    assert table.sync(store) == 0
+
+
+def test_interrupted_append_leaves_the_table_as_it_was(tmp_path, monkeypatch):
+    table = FeatureTable(str(tmp_path))
+    table.append([("a", {}), ("b", {})])
+
+    def interrupted(src, dst):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(os, "replace", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        table.append([("a", {"work_experience": [{"start_date": "2020-01"}]}), ("c", {})])
+    monkeypatch.undo()
+    table = FeatureTable(str(tmp_path))
+    assert table.filter() == ["a", "b"]
+    table.append([("c", {})])
+    assert FeatureTable(str(tmp_path)).filter() == ["a", "b", "c"]
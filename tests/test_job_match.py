@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.utlis.job_match import JobMatcher, bm25_matrix, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Strong experience with C++, C# and ASP.NET; K8s a plus.") == [
+        "c++", "c#", "asp.net", "kubernetes"]
+    assert tokenize("Développeur Python") == ["developpeur", "python"]
+
+
+def test_bm25_matrix_weights_rare_terms_higher():
+    rows = np.array([0, 0, 1, 2], dtype=np.int32)
+    cols = np.array([0, 1, 0, 0], dtype=np.int32)
+    tf = np.ones(4, dtype=np.float32)
+    matrix = bm25_matrix(rows, cols, tf, n_docs=3, n_terms=2).toarray()
+    assert matrix[0, 1] > matrix[0, 0] > 0
+    assert matrix[1, 1] == 0
+
+
+def _matcher():
+    return JobMatcher.build([
+        ("spark", {"skills_section": {"core_skills": ["Python", "Spark", "Airflow"]},
+                   "work_experience": [{"job_title": "Data Engineer",
+                                        "achievements": ["Built Spark pipelines on Kubernetes"]}]}),
+        ("java", {"skills_section": {"core_skills": ["Java", "Spring"]},
+                  "work_experience": [{"job_title": "Backend Developer",
+                                       "achievements": ["Maintained a Java REST API"]}]}),
+        ("cook", {"skills_section": {"core_skills": ["Cooking"]},
+                  "professional_summary": "Ran a restaurant kitchen"}),
+    ])
+
+
+def test_top_k_ranks_and_explains():
+    matches = _matcher().top_k("Python, Spark and Airflow, Kubernetes a plus", k=5)
+    assert [match.key for match in matches] == ["spark"]
+    match = matches[0]
+    assert abs(sum(match.fields.values()) - match.score) < 1e-4
+    assert {term for term, _ in match.terms["skills"]} == {"python", "spark", "airflow"}
+    assert _matcher().top_k("no matching words at all") == []
+
+
+def test_save_and_load(tmp_path):
+    matcher = _matcher()
+    matcher.save(str(tmp_path))
+    loaded = JobMatcher.load(str(tmp_path))
+    query = "Java developer with Spring"
+    assert loaded.keys == matcher.keys
+    assert np.allclose(loaded.score(query), matcher.score(query))
+    assert loaded.top_k(query, k=1)[0].key == "java"
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.utlis.near_duplicates import DedupStore, MinHashIndex, shingles
+
+
+def test_shingles():
+    assert shingles("Jane  DOE, data engineer", size=2) == ["jane doe", "doe data", "data engineer"]
+    assert shingles("Jane", size=3) == ["jane"]
+
+
+def test_minhash_finds_near_duplicates(resume_text):
+    index = MinHashIndex()
+    index.add("original", resume_text)
+    index.add("other", "A completely different resume about cooking, gardening and painting.")
+    edited = resume_text.replace("amina.diallo@example.com", "amina@example.org")
+    matches = index.query(edited, threshold=0.7)
+    assert [key for key, _ in matches] == ["original"]
+    assert 0.7 <= matches[0][1] < 1.0
+    assert index.query(resume_text)[0] == ("original", 1.0)
+
+
+def test_minhash_remove_and_replace(resume_text):
+    index = MinHashIndex()
+    index.add("a", resume_text)
+    index.add("a", "something else entirely")
+    assert len(index) == 1
+    assert index.query(resume_text) == []
+    index.remove("a")
+    assert len(index) == 0 and index.query("something else entirely") == []
+
+
+def test_minhash_save_and_load(tmp_path, resume_text):
+    index = MinHashIndex(num_perm=64, bands=8, seed=3)
+    index.add("a", resume_text)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = MinHashIndex.load(path)
+    assert (loaded.num_perm, loaded.bands, loaded.seed) == (64, 8, 3)
+    assert loaded.query(resume_text) == [("a", 1.0)]
+
+
+def test_interrupted_save_keeps_the_previous_index(tmp_path, monkeypatch, resume_text):
+    index = MinHashIndex()
+    index.add("a", resume_text)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    index.add("b", "another resume")
+
+    def interrupted(file, **arrays):
+        file.write(b"PK partial")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(np, "savez", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        index.save(path)
+    assert MinHashIndex.load(path).keys == ["a"]
+
+
+def test_dedup_store_writes_index_on_close(tmp_path, resume_text):
+    directory = str(tmp_path)
+    with DedupStore(directory) as store:
+        assert store.find(resume_text) is None
+        store.add("a", '{"parsed": true}', resume_text)
+        key, similarity, value = store.find(resume_text)
+        assert (key, similarity, value) == ("a", 1.0, '{"parsed": true}')
+        assert not (tmp_path / DedupStore.INDEX_FILE).exists()
+    assert (tmp_path / DedupStore.INDEX_FILE).exists()
+    assert DedupStore(directory).find(resume_text)[0] == "a"
@@ -0,0 +1,32 @@
+import time
+
+from app.utlis.parse_cache import ParseCache
+
+
+def test_parse_cache_keys_normalize_whitespace(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.db"), "{}")
+    assert cache.key("m", "prompt", "Jane  Doe\n\nEngineer") == cache.key("m", "prompt", "Jane Doe Engineer")
+    assert cache.key("m", "prompt", "Jane Doe") != cache.key("other", "prompt", "Jane Doe")
+    cache.close()
+
+
+def test_parse_cache_schema_change_purges(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ParseCache(path, '{"v": 1}')
+    cache.put("k", "{}")
+    assert cache.get("k") == "{}"
+    cache.close()
+    assert ParseCache(path, '{"v": 1}').get("k") == "{}"
+    assert ParseCache(path, '{"v": 2}').get("k") is None
+
+
+def test_parse_cache_ttl_and_size_cap(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.db"), "{}", ttl=0.05, max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "67890")
+    cache.put("c", "abcde")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 10
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    cache.close()
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from app.utlis.extract_resume_part import ResumeTemplate
+from app.utlis.resume_store import ResumeStore
+
+
+def _resume(name: str) -> ResumeTemplate:
+    return ResumeTemplate(contact_info={"name": name}, professional_summary="",
+                          skills_section={"core_skills": []}, work_experience=[])
+
+
+@pytest.fixture(params=["store.jsonl", "store.jsonl.gz"])
+def path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+def test_append_get_and_load_all(path):
+    store = ResumeStore(path)
+    store.append_many([("a", _resume("A")), ("b", _resume("B"))])
+    store.append("c", _resume("C"))
+    reopened = ResumeStore(path)
+    assert reopened.keys() == ["a", "b", "c"]
+    assert reopened.get("b").contact_info.name == "B"
+    assert reopened.get("b", trusted=True)["contact_info"]["name"] == "B"
+    assert reopened.get("missing") is None
+    assert [resume.contact_info.name for resume in reopened.load_all()] == ["A", "B", "C"]
+    assert [resume["contact_info"]["name"] for resume in reopened.load_all(trusted=True)] == [
+        "A", "B", "C"]
+
+
+def test_superseded_records_and_compact(path):
+    store = ResumeStore(path)
+    store.append_many([("a", _resume("A")), ("b", _resume("B"))])
+    store.append("a", _resume("A2"))
+    assert store.keys() == ["b", "a"]
+    assert [resume.contact_info.name for resume in store.load_all()] == ["B", "A2"]
+    store.compact()
+    assert store.records == 2
+    assert [name for name, _ in ResumeStore(path).items()] == ["b", "a"]
+
+
+def test_interrupted_append_is_dropped(path):
+    store = ResumeStore(path)
+    store.append("a", _resume("A"))
+    with open(path, "ab") as f:
+        f.write(b"partial block")
+    with open(store.index_path, "ab") as f:
+        f.write(b"b\t12")
+    sizes = os.path.getsize(path), os.path.getsize(store.index_path)
+    reopened = ResumeStore(path)
+    assert reopened.keys() == ["a"]
+    assert [resume.contact_info.name for resume in reopened.load_all()] == ["A"]
+    # Possibly an append in progress: reading leaves it alone.
+    assert (os.path.getsize(path), os.path.getsize(store.index_path)) == sizes
+    reopened.append("c", _resume("C"))
+    assert [resume.contact_info.name for resume in ResumeStore(path).load_all()] == ["A", "C"]
+
+
+def test_rejects_invalid_keys_and_values(path):
+    store = ResumeStore(path)
+    with pytest.raises(ValueError):
+        store.append("a\tb", _resume("A"))
+    with pytest.raises(TypeError):
+        store.append("a", {"contact_info": {"name": "A"}})
+
+
+def test_repair(path):
+    store = ResumeStore(path)
+    store.append("a", _resume("A"))
+    sizes = os.path.getsize(path), os.path.getsize(store.index_path)
+    with open(path, "ab") as f:
+        f.write(b"partial block")
+    ResumeStore(path).repair()
+    assert (os.path.getsize(path), os.path.getsize(store.index_path)) == sizes
+
+
+def test_appends_of_two_writers(path):
+    first, second = ResumeStore(path), ResumeStore(path)
+    first.append("a", _resume("A"))
+    second.append("b", _resume("B"))
+    first.append("c", _resume("C"))
+    assert first.keys() == ["a", "b", "c"]
+    assert [resume.contact_info.name for resume in ResumeStore(path).load_all()] == ["A", "B", "C"]
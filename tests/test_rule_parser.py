@@ -0,0 +1,65 @@
+import pytest
+
+from app.utlis import rule_parser
+from app.utlis.extract_resume_part import PHONE_PATTERN
+from app.utlis.rule_parser import find_dates, parse_header, parse_resume_fast, parse_resume_rules
+from app.utlis.section_parse import SECTION_MODELS, split_sections
+
+
+@pytest.mark.parametrize("text, phone", [
+    ("+33 6 12 34 56 78", "+33 6 12 34 56 78"),
+    ("Phone: (555) 123-4567", "(555) 123-4567"),
+    ("06.12.34.56.78", "06.12.34.56.78"),
+    ("2018 - 2020", None),
+    ("2018-2020", None),
+    ("2018.01 - 2020.03", None),
+    ("2020-01-15", None),
+])
+def test_phone_pattern(text, phone):
+    match = PHONE_PATTERN.search(text)
+    assert (match.group(0) if match else None) == phone
+
+
+def test_find_dates():
+    assert find_dates("Jan 2020 - Present") == ["2020-01", "Present"]
+    assert find_dates("03/2019 – 2021") == ["2019-03", "2021"]
+    assert find_dates("no date here") == []
+
+
+def test_header_contacts_are_not_taken_from_other_sections():
+    fields, _ = parse_header("Jane Doe\njane@example.com", "")
+    assert fields["contact_info"] == {"name": "Jane Doe", "email": "jane@example.com",
+                                      "phone": None, "linkedin": None}
+
+
+def test_parse_resume_rules(resume_text):
+    resume, confidence = parse_resume_rules(resume_text)
+    assert resume.contact_info.name == "Amina Diallo"
+    assert resume.contact_info.phone == "+33 6 12 34 56 78"
+    assert [role.company for role in resume.work_experience] == ["Acme Analytics", "Orange"]
+    assert resume.work_experience[0].start_date == "2021"
+    assert resume.work_experience[0].end_date == "Present"
+    assert "Python" in resume.work_experience[0].used_skills_and_tools
+    assert resume.education[0].graduation_year == 2018
+    assert [entry.language for entry in resume.language_proficiency] == ["French", "English"]
+    assert confidence["work_experience"] > 0.8
+
+
+def test_resume_without_header(monkeypatch):
+    text = ("SUMMARY\nData engineer with ten years of experience.\n\n"
+            "EXPERIENCE\nData Engineer, Acme | Paris\n2018 - 2020\n- Built pipelines\n\n"
+            "SKILLS\nPython, SQL\n")
+    assert "header" not in split_sections(text)
+    sent = {}
+
+    def parse_section(section, text, *args):
+        sent[section] = text
+        return SECTION_MODELS[section].model_validate({"contact_info": {"name": "Unknown"},
+                                                       "professional_summary": text})
+
+    monkeypatch.setattr(rule_parser, "parse_section", parse_section)
+    resume, _, llm_sections = parse_resume_fast(text, client=object())
+    assert llm_sections == ["header"]
+    assert sent["header"].startswith("Data engineer")
+    assert resume.contact_info.phone is None
+    assert resume.work_experience[0].company == "Acme"
@@ -0,0 +1,47 @@
+from app.utlis import section_parse
+from app.utlis.section_parse import SECTION_MODELS, merge_sections, sections_complete, split_sections
+
+
+def test_split_sections(resume_text):
+    sections = split_sections(resume_text)
+    assert list(sections) == ["header", "summary", "experience", "education", "skills", "languages"]
+    assert sections["header"].splitlines()[0] == "Amina Diallo"
+    assert sections["skills"] == "Python, Spark, Airflow, Kubernetes, Java"
+    assert sections_complete(sections, resume_text)
+
+
+def test_split_sections_without_headings():
+    text = "Jane Doe\nSome text without any heading\n"
+    sections = split_sections(text)
+    assert list(sections) == ["header"]
+    assert not sections_complete(sections, text)
+
+
+def test_merge_sections():
+    resume = merge_sections({
+        "header": SECTION_MODELS["header"].model_validate(
+            {"contact_info": {"name": "Jane Doe"}, "professional_summary": "Engineer"}),
+        "certifications": SECTION_MODELS["certifications"].model_validate(
+            {"certifications": ["AWS Solutions Architect"]}),
+    })
+    assert resume.contact_info.name == "Jane Doe"
+    assert resume.certifications == ["AWS Solutions Architect"]
+    assert resume.work_experience == []
+
+
+def test_no_header_call_without_header_text(monkeypatch):
+    text = ("EXPERIENCE\nData Engineer, Acme | Paris\n2018 - 2020\n- Built pipelines\n\n"
+            "SKILLS\nPython, SQL\n")
+    sent = []
+
+    def parse_section(section, text, *args):
+        sent.append(section)
+        if section == "experience":
+            return SECTION_MODELS[section].model_validate({"work_experience": []})
+        return SECTION_MODELS[section].model_validate({"skills_section": {"core_skills": ["Python"]}})
+
+    monkeypatch.setattr(section_parse, "parse_section", parse_section)
+    resume = section_parse.parse_resume_sections(text, client=object())
+    assert sorted(sent) == ["experience", "skills"]
+    assert resume.contact_info.name == "" and resume.contact_info.email is None
+    assert resume.skills_section.core_skills == ["Python"]
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.utlis import skill_index
+from app.utlis.extract_resume_part import ResumeTemplate
+from app.utlis.resume_store import ResumeStore
+from app.utlis.skill_index import (SkillIndex, encode_postings, normalize_skill, parse_query,
+                                   skill_terms)
+
+
+def _resume(skills) -> ResumeTemplate:
+    return ResumeTemplate(contact_info={"name": "X"}, professional_summary="",
+                          skills_section={"core_skills": skills}, work_experience=[])
+
+
+def test_normalize_skill():
+    assert normalize_skill("  K8s ") == "kubernetes"
+    assert normalize_skill("C++") == "c++"
+    assert normalize_skill("C#,") == "c#"
+    assert normalize_skill("Réseaux  Neuronaux") == "reseaux neuronaux"
+    assert skill_terms("Natural Language Processing (NLP)") == {"natural language processing", "nlp"}
+
+
+def test_encode_postings_uses_smallest_dtype():
+    first, code, data = encode_postings(np.array([5, 6, 300], dtype=np.uint32))
+    assert (first, code) == (5, 1)
+    assert np.frombuffer(data, dtype="<u2").tolist() == [1, 294]
+
+
+def test_parse_query():
+    assert parse_query("machine learning AND NOT java") == (
+        "and", [("term", "machine learning"), ("not", ("term", "java"))])
+    assert parse_query('python AND (pytorch OR "c++ (modern)")') == (
+        "and", [("term", "python"), ("or", [("term", "pytorch"), ("term", "c++ (modern)")])])
+    for malformed in ("python AND", "(python", "python )", ""):
+        with pytest.raises(ValueError):
+            parse_query(malformed)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SkillIndex(str(tmp_path))
+    index.add([("a", {"skills_section": {"core_skills": ["Python", "PyTorch"]}}),
+               ("b", {"skills_section": {"core_skills": ["Python", "TensorFlow"]},
+                      "work_experience": [{"used_skills_and_tools": ["Java"]}]}),
+               ("c", {"skills_section": {"core_skills": ["Java", "Go"]}})])
+    index.add([("d", {"skills_section": {"core_skills": ["python", "golang"]}})])
+    return index
+
+
+def test_boolean_queries(index):
+    assert index.search_keys("python") == ["a", "b", "d"]
+    assert index.search_keys("python AND (pytorch OR tensorflow)") == ["a", "b"]
+    assert index.search_keys("python AND NOT java") == ["a", "d"]
+    assert index.search_keys("NOT python") == ["c"]
+    assert index.search_keys("go OR pytorch") == ["a", "c", "d"]
+    assert index.search_keys("rust") == []
+
+
+def test_re_adding_a_key_supersedes_it(index, tmp_path):
+    index.add([("a", {"skills_section": {"core_skills": ["Rust"]}})])
+    assert index.search_keys("python") == ["b", "d"]
+    assert index.search_keys("rust") == ["a"]
+    reopened = SkillIndex(str(tmp_path))
+    assert len(reopened) == 4
+    assert reopened.search_keys("python OR rust") == ["b", "d", "a"]
+
+
+def test_segments_are_merged(tmp_path, monkeypatch):
+    monkeypatch.setattr(skill_index, "MAX_SEGMENTS", 2)
+    index = SkillIndex(str(tmp_path))
+    for i in range(4):
+        index.add([(f"k{i}", {"skills_section": {"core_skills": ["Python" if i % 2 else "Java"]}})])
+    assert len(index.segments) <= 2
+    assert SkillIndex(str(tmp_path)).search_keys("python") == ["k1", "k3"]
+
+
+def test_sync_reindexes_replaced_records(tmp_path):
+    store = ResumeStore(str(tmp_path / "store.jsonl"))
+    store.append_many([("a", _resume(["Python"])), ("b", _resume(["Java"]))])
+    index = SkillIndex(str(tmp_path / "index"))
+    assert index.sync(store) == 2 and index.sync(store) == 0
+    store.append("a", _resume(["Rust"]))
+    assert index.sync(store) == 1
+    index = SkillIndex(str(tmp_path / "index"))
+    assert index.search_keys("python") == []
+    assert index.search_keys("rust OR java") == ["b", "a"]
+    assert index.sync(store) == 0
+
+
+def test_interrupted_add_leaves_the_index_as_it_was(index, tmp_path, monkeypatch):
+    def interrupted(src, dst):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(os, "replace", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        index.add([("a", {"skills_section": {"core_skills": ["Rust"]}})])
+    monkeypatch.undo()
+    reopened = SkillIndex(str(tmp_path))
+    assert reopened.search_keys("python") == ["a", "b", "d"]
+    assert reopened.search_keys("rust") == []
+    reopened.add([("e", {"skills_section": {"core_skills": ["Rust"]}})])
+    assert SkillIndex(str(tmp_path)).search_keys("rust OR pytorch") == ["a", "e"]
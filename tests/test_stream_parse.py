@@ -0,0 +1,52 @@
+from app.utlis.extract_resume_part import ResumeTemplate
+from app.utlis.stream_parse import IncrementalResumeScanner
+
+
+def _scan(text: str, step: int):
+    scanner = IncrementalResumeScanner()
+    sections = []
+    for i in range(0, len(text), step):
+        sections += scanner.feed(text[i:i + step])
+    return sections
+
+
+def test_fields_and_items_are_emitted_once_closed():
+    resume = ResumeTemplate.model_validate({
+        "contact_info": {"name": 'Jane "JD" Doe'},
+        "professional_summary": "",
+        "skills_section": {"core_skills": ["C++", "{braces}", "a, b"]},
+        "work_experience": [{"company": "Acme", "job_title": "Engineer", "start_date": "2020-01",
+                             "achievements": ["Escaped \\ backslash", "Quoted \"text\""],
+                             "used_skills_and_tools": []}],
+    })
+    text = resume.model_dump_json()
+    for step in (1, 7, len(text)):
+        sections = _scan(text, step)
+        fields = {section.field: section.value for section in sections if section.kind == "field"}
+        assert fields["contact_info"] == resume.contact_info
+        assert fields["skills_section"] == resume.skills_section
+        assert fields["work_experience"] == resume.work_experience
+        items = [section for section in sections
+                 if section.kind == "item" and section.field == "work_experience"]
+        assert [(item.index, item.value) for item in items] == [(0, resume.work_experience[0])]
+
+
+def test_items_are_emitted_before_their_list_closes():
+    resume = ResumeTemplate.model_validate({
+        "contact_info": {"name": "Jane Doe"},
+        "professional_summary": "",
+        "skills_section": {"core_skills": []},
+        "work_experience": [{"company": "Acme", "job_title": "Engineer", "start_date": "2020-01",
+                             "achievements": [], "used_skills_and_tools": []}],
+    })
+    text = resume.model_dump_json(include={"work_experience"})
+    end_of_item = text.index("}") + 1
+    scanner = IncrementalResumeScanner()
+    sections = scanner.feed(text[:end_of_item])
+    assert [(section.kind, section.field) for section in sections] == [("item", "work_experience")]
+    assert [section.kind for section in scanner.feed(text[end_of_item:])] == ["field"]
+
+
+def test_invalid_values_are_skipped():
+    sections = _scan('{"contact_info": {"email": "x"}, "introduction": "Hello"}', 1)
+    assert [(section.field, section.value) for section in sections] == [("introduction", "Hello")]
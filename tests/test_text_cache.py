@@ -0,0 +1,38 @@
+import time
+
+from app.utlis.text_cache import TextCache
+
+
+def test_text_cache_hit_and_miss(tmp_path):
+    cache = TextCache(str(tmp_path))
+    key = TextCache.key_for(b"%PDF content", "v1")
+    assert key != TextCache.key_for(b"%PDF content", "v2")
+    assert cache.get(key) is None
+    cache.put(key, "extracted\r\ntext")
+    assert cache.get(key) == "extracted\r\ntext"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_text_cache_overwrite_replaces_size(tmp_path):
+    cache = TextCache(str(tmp_path), max_bytes=100)
+    key = TextCache.key_for(b"a", "v1")
+    for _ in range(5):
+        cache.put(key, "x" * 50)
+    assert cache.stats()["bytes"] == 50
+    cache.put(key, "x" * 20)
+    assert cache.stats()["bytes"] == 20
+    assert cache.get(key) == "x" * 20
+    assert TextCache(str(tmp_path)).stats()["bytes"] == 20
+
+
+def test_text_cache_evicts_least_recently_used(tmp_path):
+    cache = TextCache(str(tmp_path), max_bytes=100)
+    keys = [TextCache.key_for(bytes([i]), "v1") for i in range(3)]
+    cache.put(keys[0], "a" * 40)
+    cache.put(keys[1], "b" * 40)
+    time.sleep(0.01)
+    cache.get(keys[0])
+    cache.put(keys[2], "c" * 40)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.stats()["bytes"] == 80
@@ -0,0 +1,25 @@
+import json
+
+from app.utlis.watch_folder import run_once
+
+
+def test_limit_and_format_failures_are_permanent(tmp_path):
+    folder = tmp_path / "cvs"
+    folder.mkdir()
+    (folder / "CV.TXT").write_text("Jane Doe\nData engineer\n" * 50, encoding="utf-8")
+    (folder / "Short.Txt").write_text("Jane Doe\n", encoding="utf-8")
+    (folder / "bad.pdf").write_bytes(b"\x00\x01 not a document")
+    manifest = str(tmp_path / "manifest.json")
+    output = str(tmp_path / "out")
+
+    stats = run_once(str(folder), manifest, output, workers=1, max_bytes=100)
+    assert (stats["scanned"], stats["processed"], stats["errors"]) == (3, 3, 2)
+    files = json.load(open(manifest, encoding="utf-8"))["files"]
+    assert files["CV.TXT"]["error"].startswith("ExtractionLimitError")
+    assert files["CV.TXT"]["permanent"] and files["bad.pdf"]["permanent"]
+    assert files["Short.Txt"]["error"] is None
+
+    # Not retried while the files and limits stay the same.
+    assert run_once(str(folder), manifest, output, workers=1, max_bytes=100)["processed"] == 0
+    stats = run_once(str(folder), manifest, output, workers=1)
+    assert (stats["processed"], stats["errors"]) == (2, 1)